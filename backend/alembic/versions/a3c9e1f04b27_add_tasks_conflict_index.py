@@ -0,0 +1,28 @@
+"""add_tasks_conflict_index
+
+Revision ID: a3c9e1f04b27
+Revises: 19ae4512bf7f
+Create Date: 2026-10-17 09:12:40.518204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a3c9e1f04b27'
+down_revision: Union[str, Sequence[str], None] = '19ae4512bf7f'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_tasks_user_blocking_start', 'tasks', ['user_id', 'is_blocking', 'start_time'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_tasks_user_blocking_start', table_name='tasks')
@@ -0,0 +1,54 @@
+"""add_usage_daily_rollup
+
+Revision ID: a7c2e9f4b168
+Revises: f3b9d1e7a624
+Create Date: 2026-10-17 18:12:09.533812
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a7c2e9f4b168'
+down_revision: Union[str, Sequence[str], None] = 'f3b9d1e7a624'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('usage_daily_rollup',
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('model', sa.String(), nullable=False),
+        sa.Column('feature', sa.String(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('requests', sa.Integer(), nullable=False),
+        sa.Column('prompt_tokens', sa.Integer(), nullable=False),
+        sa.Column('completion_tokens', sa.Integer(), nullable=False),
+        sa.Column('total_tokens', sa.Integer(), nullable=False),
+        sa.Column('cost_usd', sa.Float(), nullable=False),
+        sa.Column('latency_ms_sum', sa.Float(), nullable=False),
+        sa.PrimaryKeyConstraint('day', 'model', 'feature', 'user_id')
+    )
+
+    # Backfill from the existing log; from here on TokenLogWriter keeps it current.
+    # date() truncates a timestamp on both SQLite and PostgreSQL.
+    op.execute("""
+        INSERT INTO usage_daily_rollup
+            (day, model, feature, user_id, requests, prompt_tokens, completion_tokens,
+             total_tokens, cost_usd, latency_ms_sum)
+        SELECT date(timestamp), COALESCE(model, 'unknown'), feature, COALESCE(user_id, 0), COUNT(*),
+               COALESCE(SUM(prompt_tokens), 0), COALESCE(SUM(completion_tokens), 0),
+               COALESCE(SUM(total_tokens), 0), COALESCE(SUM(cost_usd), 0), COALESCE(SUM(latency_ms), 0)
+        FROM token_logs
+        WHERE timestamp IS NOT NULL
+        GROUP BY date(timestamp), COALESCE(model, 'unknown'), feature, COALESCE(user_id, 0)
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('usage_daily_rollup')
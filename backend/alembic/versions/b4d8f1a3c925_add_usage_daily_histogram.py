@@ -0,0 +1,63 @@
+"""add_usage_daily_histogram
+
+Revision ID: b4d8f1a3c925
+Revises: a7c2e9f4b168
+Create Date: 2026-10-17 18:47:30.118204
+
+"""
+import math
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b4d8f1a3c925'
+down_revision: Union[str, Sequence[str], None] = 'a7c2e9f4b168'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Frozen copy of app.latency_sketch's bucketing, so this migration keeps its meaning
+GAMMA = 1.04
+
+
+def _bucket(value):
+    if value is None or value < 1:
+        return 0
+    return 1 + int(math.floor(math.log(value) / math.log(GAMMA)))
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    histogram = op.create_table('usage_daily_histogram',
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('model', sa.String(), nullable=False),
+        sa.Column('feature', sa.String(), nullable=False),
+        sa.Column('metric', sa.String(), nullable=False),
+        sa.Column('bucket', sa.Integer(), nullable=False),
+        sa.Column('count', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('day', 'model', 'feature', 'metric', 'bucket')
+    )
+
+    # Backfill: SQLite has no log(), so the existing log is bucketed here rather than in SQL
+    bind = op.get_bind()
+    counts = {}
+    result = bind.execution_options(stream_results=True).execute(sa.text(
+        "SELECT timestamp, COALESCE(model, 'unknown'), feature, latency_ms, total_tokens "
+        "FROM token_logs WHERE timestamp IS NOT NULL"
+    ).columns(sa.column('timestamp', sa.DateTime())))
+    for timestamp, model, feature, latency_ms, total_tokens in result:
+        day = timestamp.date()
+        for metric, value in (('latency_ms', latency_ms), ('tokens', total_tokens)):
+            key = (day, model, feature, metric, _bucket(value))
+            counts[key] = counts.get(key, 0) + 1
+
+    rows = [dict(day=k[0], model=k[1], feature=k[2], metric=k[3], bucket=k[4], count=c) for k, c in counts.items()]
+    for i in range(0, len(rows), 1000):
+        op.bulk_insert(histogram, rows[i:i + 1000])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('usage_daily_histogram')
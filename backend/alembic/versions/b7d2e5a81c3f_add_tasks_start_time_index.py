@@ -0,0 +1,28 @@
+"""add_tasks_start_time_index
+
+Revision ID: b7d2e5a81c3f
+Revises: a3c9e1f04b27
+Create Date: 2026-10-17 11:02:17.304911
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7d2e5a81c3f'
+down_revision: Union[str, Sequence[str], None] = 'a3c9e1f04b27'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_tasks_start_time', 'tasks', ['start_time'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_tasks_start_time', table_name='tasks')
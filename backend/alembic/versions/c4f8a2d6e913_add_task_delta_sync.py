@@ -0,0 +1,62 @@
+"""add_task_delta_sync
+
+Revision ID: c4f8a2d6e913
+Revises: b7d2e5a81c3f
+Create Date: 2026-10-17 13:26:51.092446
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4f8a2d6e913'
+down_revision: Union[str, Sequence[str], None] = 'b7d2e5a81c3f'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Existing rows start at version 0; clients begin with a full snapshot anyway
+    with op.batch_alter_table('users') as batch_op:
+        batch_op.add_column(sa.Column('task_version', sa.Integer(), nullable=False, server_default='0'))
+        batch_op.add_column(sa.Column('task_sync_floor', sa.Integer(), nullable=False, server_default='0'))
+
+    with op.batch_alter_table('tasks') as batch_op:
+        batch_op.add_column(sa.Column('version', sa.Integer(), nullable=False, server_default='0'))
+        batch_op.add_column(sa.Column('updated_at', sa.DateTime(), nullable=True))
+    op.create_index('ix_tasks_user_version', 'tasks', ['user_id', 'version'], unique=False)
+
+    op.create_table(
+        'task_tombstones',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('task_id', sa.Integer(), nullable=False),
+        sa.Column('version', sa.Integer(), nullable=False),
+        sa.Column('deleted_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_task_tombstones_id'), 'task_tombstones', ['id'], unique=False)
+    op.create_index(op.f('ix_task_tombstones_deleted_at'), 'task_tombstones', ['deleted_at'], unique=False)
+    op.create_index('ix_task_tombstones_user_version', 'task_tombstones', ['user_id', 'version'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_task_tombstones_user_version', table_name='task_tombstones')
+    op.drop_index(op.f('ix_task_tombstones_deleted_at'), table_name='task_tombstones')
+    op.drop_index(op.f('ix_task_tombstones_id'), table_name='task_tombstones')
+    op.drop_table('task_tombstones')
+
+    op.drop_index('ix_tasks_user_version', table_name='tasks')
+    with op.batch_alter_table('tasks') as batch_op:
+        batch_op.drop_column('updated_at')
+        batch_op.drop_column('version')
+
+    with op.batch_alter_table('users') as batch_op:
+        batch_op.drop_column('task_sync_floor')
+        batch_op.drop_column('task_version')
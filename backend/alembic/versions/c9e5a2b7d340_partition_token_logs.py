@@ -0,0 +1,125 @@
+"""partition_token_logs
+
+Revision ID: c9e5a2b7d340
+Revises: b4d8f1a3c925
+Create Date: 2026-10-17 19:26:52.407719
+
+"""
+from datetime import datetime
+from typing import Sequence, Union
+
+from alembic import context, op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c9e5a2b7d340'
+down_revision: Union[str, Sequence[str], None] = 'b4d8f1a3c925'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+MONTHS_AHEAD = 2
+COLUMNS = "id, user_id, feature, model, prompt_tokens, completion_tokens, total_tokens, cost_usd, latency_ms, timestamp"
+
+
+def _month_start(dt):
+    return datetime(dt.year, dt.month, 1)
+
+
+def _next_month(dt):
+    return datetime(dt.year + dt.month // 12, dt.month % 12 + 1, 1)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    partitions = op.create_table('token_log_partitions',
+        sa.Column('name', sa.String(), nullable=False),
+        sa.Column('range_start', sa.DateTime(), nullable=False),
+        sa.Column('range_end', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('name')
+    )
+
+    # Other databases rotate tables at runtime (app/log_partitions.py)
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+
+    now = datetime.utcnow()
+    first = None
+    if not context.is_offline_mode():
+        first = op.get_bind().execute(sa.text("SELECT min(timestamp) FROM token_logs")).scalar()
+    first = first or now
+
+    op.execute("ALTER TABLE token_logs RENAME TO token_logs_unpartitioned")
+    op.execute("ALTER INDEX IF EXISTS token_logs_pkey RENAME TO token_logs_unpartitioned_pkey")
+    op.execute("DROP INDEX IF EXISTS ix_token_logs_id")
+    op.execute("DROP INDEX IF EXISTS ix_token_logs_timestamp")
+
+    # The partition key must be part of the primary key
+    op.execute("""
+        CREATE TABLE token_logs (
+            id INTEGER NOT NULL DEFAULT nextval('token_logs_id_seq'),
+            user_id INTEGER REFERENCES users (id),
+            feature VARCHAR NOT NULL,
+            model VARCHAR,
+            prompt_tokens INTEGER,
+            completion_tokens INTEGER,
+            total_tokens INTEGER,
+            cost_usd FLOAT,
+            latency_ms FLOAT,
+            timestamp TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+            PRIMARY KEY (id, timestamp)
+        ) PARTITION BY RANGE (timestamp)
+    """)
+    op.execute("ALTER SEQUENCE token_logs_id_seq OWNED BY token_logs.id")
+    op.execute("CREATE INDEX ix_token_logs_id ON token_logs (id)")
+    op.execute("CREATE INDEX ix_token_logs_timestamp ON token_logs (timestamp)")
+
+    rows = []
+    start, last = _month_start(first), _month_start(now)
+    for _ in range(MONTHS_AHEAD):
+        last = _next_month(last)
+    while start <= last:
+        end = _next_month(start)
+        name = f"token_logs_p{start:%Y%m}"
+        op.execute(f"CREATE TABLE {name} PARTITION OF token_logs FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')")
+        rows.append({"name": name, "range_start": start, "range_end": end})
+        start = end
+    op.execute("CREATE TABLE token_logs_default PARTITION OF token_logs DEFAULT")
+    op.bulk_insert(partitions, rows)
+
+    op.execute(f"""
+        INSERT INTO token_logs ({COLUMNS})
+        SELECT id, user_id, feature, model, prompt_tokens, completion_tokens, total_tokens, cost_usd, latency_ms,
+               COALESCE(timestamp, now() AT TIME ZONE 'utc')
+        FROM token_logs_unpartitioned
+    """)
+    op.execute("DROP TABLE token_logs_unpartitioned")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute("ALTER TABLE token_logs RENAME TO token_logs_partitioned")
+        op.execute("DROP INDEX IF EXISTS ix_token_logs_id")
+        op.execute("DROP INDEX IF EXISTS ix_token_logs_timestamp")
+        op.execute("""
+            CREATE TABLE token_logs (
+                id INTEGER NOT NULL DEFAULT nextval('token_logs_id_seq') PRIMARY KEY,
+                user_id INTEGER REFERENCES users (id),
+                feature VARCHAR NOT NULL,
+                model VARCHAR,
+                prompt_tokens INTEGER,
+                completion_tokens INTEGER,
+                total_tokens INTEGER,
+                cost_usd FLOAT,
+                latency_ms FLOAT,
+                timestamp TIMESTAMP WITHOUT TIME ZONE
+            )
+        """)
+        op.execute("ALTER SEQUENCE token_logs_id_seq OWNED BY token_logs.id")
+        op.execute(f"INSERT INTO token_logs ({COLUMNS}) SELECT {COLUMNS} FROM token_logs_partitioned")
+        op.execute("DROP TABLE token_logs_partitioned CASCADE")
+        op.execute("CREATE INDEX ix_token_logs_id ON token_logs (id)")
+        op.execute("CREATE INDEX ix_token_logs_timestamp ON token_logs (timestamp)")
+
+    op.drop_table('token_log_partitions')
@@ -0,0 +1,52 @@
+"""add_job_status_counts
+
+Revision ID: d2f6b8a4e157
+Revises: c9e5a2b7d340
+Create Date: 2026-10-17 21:04:37.118204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd2f6b8a4e157'
+down_revision: Union[str, Sequence[str], None] = 'c9e5a2b7d340'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+STATUSES = ('CREATED', 'QUEUED', 'PARSING', 'PARSED', 'ACCEPTED', 'FAILED')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('job_status_counts',
+        sa.Column('status', sa.String(), nullable=False),
+        sa.Column('jobs', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('status')
+    )
+
+    # Backfill from the existing jobs; from here on the job_stats flush hook keeps it current.
+    # Every status gets a row, so concurrent writers only ever UPDATE it.
+    op.execute("""
+        INSERT INTO job_status_counts (status, jobs)
+        SELECT CAST(status AS VARCHAR), COUNT(*)
+        FROM jobs
+        WHERE status IS NOT NULL
+        GROUP BY status
+    """)
+    for status in STATUSES:
+        op.execute(sa.text(
+            "INSERT INTO job_status_counts (status, jobs) SELECT :status, 0 "
+            "WHERE NOT EXISTS (SELECT 1 FROM job_status_counts WHERE status = :status)"
+        ).bindparams(status=status))
+
+    op.create_index('ix_jobs_created_at_user_id', 'jobs', ['created_at', 'user_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_jobs_created_at_user_id', table_name='jobs')
+    op.drop_table('job_status_counts')
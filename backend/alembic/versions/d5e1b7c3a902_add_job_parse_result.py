@@ -0,0 +1,32 @@
+"""add_job_parse_result
+
+Revision ID: d5e1b7c3a902
+Revises: c4f8a2d6e913
+Create Date: 2026-10-17 15:02:37.418205
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd5e1b7c3a902'
+down_revision: Union[str, Sequence[str], None] = 'c4f8a2d6e913'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.batch_alter_table('jobs') as batch_op:
+        batch_op.add_column(sa.Column('parse_result', sa.JSON(), nullable=True))
+        batch_op.add_column(sa.Column('parse_input_hash', sa.String(length=64), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('jobs') as batch_op:
+        batch_op.drop_column('parse_input_hash')
+        batch_op.drop_column('parse_result')
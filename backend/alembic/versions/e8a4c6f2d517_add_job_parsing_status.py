@@ -0,0 +1,32 @@
+"""add_job_parsing_status
+
+Revision ID: e8a4c6f2d517
+Revises: d5e1b7c3a902
+Create Date: 2026-10-17 15:48:12.630174
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e8a4c6f2d517'
+down_revision: Union[str, Sequence[str], None] = 'd5e1b7c3a902'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Only PostgreSQL has a native enum type; SQLite stores the name as plain text
+    if op.get_bind().dialect.name == 'postgresql':
+        with op.get_context().autocommit_block():
+            op.execute("ALTER TYPE jobstatus ADD VALUE IF NOT EXISTS 'PARSING'")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # PostgreSQL can't drop an enum value; move stuck jobs back so the value is unused
+    op.execute("UPDATE jobs SET status = 'CREATED' WHERE status = 'PARSING'")
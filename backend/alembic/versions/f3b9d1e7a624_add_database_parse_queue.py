@@ -0,0 +1,58 @@
+"""add_database_parse_queue
+
+Revision ID: f3b9d1e7a624
+Revises: e8a4c6f2d517
+Create Date: 2026-10-17 17:05:41.208337
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f3b9d1e7a624'
+down_revision: Union[str, Sequence[str], None] = 'e8a4c6f2d517'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if op.get_bind().dialect.name == 'postgresql':
+        with op.get_context().autocommit_block():
+            op.execute("ALTER TYPE jobstatus ADD VALUE IF NOT EXISTS 'QUEUED'")
+
+    with op.batch_alter_table('jobs') as batch_op:
+        batch_op.add_column(sa.Column('queued_at', sa.DateTime(), nullable=True))
+        batch_op.add_column(sa.Column('claimed_by', sa.String(), nullable=True))
+        batch_op.add_column(sa.Column('claimed_at', sa.DateTime(), nullable=True))
+        batch_op.create_index('ix_jobs_status_queued_at', ['status', 'queued_at'], unique=False)
+
+    op.create_table('parse_workers',
+        sa.Column('id', sa.String(), nullable=False),
+        sa.Column('hostname', sa.String(), nullable=False),
+        sa.Column('pid', sa.Integer(), nullable=False),
+        sa.Column('started_at', sa.DateTime(), nullable=True),
+        sa.Column('last_heartbeat', sa.DateTime(), nullable=True),
+        sa.Column('jobs_parsed', sa.Integer(), nullable=False),
+        sa.Column('jobs_failed', sa.Integer(), nullable=False),
+        sa.Column('busy_seconds', sa.Float(), nullable=False),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_parse_workers_last_heartbeat'), 'parse_workers', ['last_heartbeat'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_parse_workers_last_heartbeat'), table_name='parse_workers')
+    op.drop_table('parse_workers')
+
+    # Queued jobs go back to CREATED; PostgreSQL can't drop the enum value itself
+    op.execute("UPDATE jobs SET status = 'CREATED' WHERE status = 'QUEUED'")
+    with op.batch_alter_table('jobs') as batch_op:
+        batch_op.drop_index('ix_jobs_status_queued_at')
+        batch_op.drop_column('claimed_at')
+        batch_op.drop_column('claimed_by')
+        batch_op.drop_column('queued_at')
@@ -0,0 +1,433 @@
+"""
+Cache Backends
+==============
+Storage behind the LLM, transcription and template caches.
+
+- InProcessCache: TTL/LRU caches in this process's memory (the default).
+  Fast, but each uvicorn/gunicorn worker has its own copy and restarts
+  start cold. Sync routes hit it from many threadpool threads at once, so
+  keys are spread over lock-striped shards: threads only contend when
+  their keys hash to the same shard.
+- SQLiteCache: a table in a local SQLite file (WAL mode) shared by every
+  worker on the host and kept across restarts.
+
+Values must be JSON-serializable and are stored as compact JSON bytes,
+zlib-compressed when that is smaller. Both backends expire entries after
+`ttl` seconds, hold at most `maxsize` entries and `max_bytes` of stored
+payload, and offer an atomic set_if_absent. SQLiteCache evicts the oldest
+entries, InProcessCache the least recently used entries of the full shard.
+
+stats() reports hits, misses, evictions (capacity), expirations (TTL),
+bytes in use and mean entry size. Counters are per process.
+
+Select with CACHE_BACKEND ("memory" or "sqlite") and CACHE_SQLITE_PATH.
+"""
+
+import abc
+import json
+import logging
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Any, Callable, Optional
+
+from cachetools import TTLCache
+
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_STRIPES = 16
+DEFAULT_MAX_BYTES = 8 * 1024 * 1024
+SQLITE_SCHEMA_VERSION = 2
+
+
+def encode_value(value: Any) -> bytes:
+    """Compact JSON, compressed if that helps. The first byte records which."""
+    raw = json.dumps(value, separators=(",", ":")).encode()
+    packed = zlib.compress(raw, 6)
+    return b"z" + packed if len(packed) < len(raw) else b"j" + raw
+
+
+def decode_value(blob: bytes) -> Any:
+    body = blob[1:]
+    return json.loads(zlib.decompress(body) if blob[:1] == b"z" else body)
+
+
+class CacheBackend(abc.ABC):
+    """Common interface and accounting. Backends implement the abstract storage methods."""
+
+    kind = "base"
+
+    def __init__(self, name: str, maxsize: int, ttl: int, max_bytes: int):
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._expirations = 0
+        self._counter_lock = threading.Lock()
+
+    @property
+    def hits(self) -> int:
+        return self._hits
+
+    @property
+    def misses(self) -> int:
+        return self._misses
+
+    @property
+    def evictions(self) -> int:
+        return self._evictions
+
+    @property
+    def expirations(self) -> int:
+        return self._expirations
+
+    def _count(self, **deltas: int) -> None:
+        with self._counter_lock:
+            for name, delta in deltas.items():
+                setattr(self, f"_{name}", getattr(self, f"_{name}") + delta)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Look up key, counting the hit or miss."""
+        value = self.peek(key)
+        if value is None:
+            self._count(misses=1)
+            return default
+        self._count(hits=1)
+        return value
+
+    @abc.abstractmethod
+    def peek(self, key: str) -> Any:
+        """Look up key without touching the counters (None if absent)."""
+
+    @abc.abstractmethod
+    def set(self, key: str, value: Any) -> None:
+        ...
+
+    @abc.abstractmethod
+    def set_if_absent(self, key: str, value: Any) -> bool:
+        """Store value only if key has no live entry. Returns whether it was stored."""
+
+    @abc.abstractmethod
+    def delete(self, key: str) -> None:
+        ...
+
+    @abc.abstractmethod
+    def clear(self) -> None:
+        ...
+
+    @abc.abstractmethod
+    def bytes_in_use(self) -> int:
+        ...
+
+    @abc.abstractmethod
+    def __len__(self) -> int:
+        ...
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        self.set(key, value)
+
+    def __contains__(self, key: str) -> bool:
+        return self.peek(key) is not None
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        size = len(self)
+        used = self.bytes_in_use()
+        return {
+            "backend": self.kind,
+            "current_size": size,
+            "max_size": self.maxsize,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 3) if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "bytes_in_use": used,
+            "max_bytes": self.max_bytes,
+            "mean_entry_bytes": round(used / size) if size else 0
+        }
+
+
+class _MeteredTTLCache(TTLCache):
+    """TTLCache of encoded values, bounded by bytes and entry count, counting what it drops."""
+
+    def __init__(self, max_bytes: int, max_entries: int, ttl: int, timer: Callable[[], float]):
+        super().__init__(maxsize=max_bytes, ttl=ttl, timer=timer, getsizeof=len)
+        self.max_entries = max_entries
+        self.evictions = 0
+        self.expirations = 0
+
+    def popitem(self):
+        item = super().popitem()
+        self.evictions += 1
+        return item
+
+    def expire(self, time=None):
+        expired = super().expire(time)
+        self.expirations += len(expired)
+        return expired
+
+    def __setitem__(self, key, value):
+        if key not in self:
+            self.expire()
+            while len(self) >= self.max_entries:
+                self.popitem()
+        super().__setitem__(key, value)
+
+
+class _Stripe:
+    """One shard of an InProcessCache: a TTLCache, its lock and its counters."""
+
+    __slots__ = ("lock", "cache", "hits", "misses", "rejected")
+
+    def __init__(self, cache: _MeteredTTLCache):
+        self.lock = threading.Lock()
+        self.cache = cache
+        self.hits = 0
+        self.misses = 0
+        self.rejected = 0  # Values larger than the shard's whole byte budget
+
+
+class InProcessCache(CacheBackend):
+    kind = "memory"
+
+    def __init__(self, name: str, maxsize: int, ttl: int, max_bytes: int = DEFAULT_MAX_BYTES,
+                 timer: Callable[[], float] = time.monotonic, stripes: int = DEFAULT_STRIPES):
+        super().__init__(name, maxsize, ttl, max_bytes)
+        # maxsize and max_bytes are split across the shards so the totals never exceed them
+        count = max(1, min(stripes, maxsize))
+        self._stripes = [
+            _Stripe(_MeteredTTLCache(
+                max_bytes=max_bytes // count,
+                max_entries=maxsize // count + (1 if i < maxsize % count else 0),
+                ttl=ttl,
+                timer=timer
+            ))
+            for i in range(count)
+        ]
+
+    def _stripe(self, key: str) -> _Stripe:
+        return self._stripes[hash(key) % len(self._stripes)]
+
+    @property
+    def hits(self) -> int:
+        return sum(stripe.hits for stripe in self._stripes)
+
+    @property
+    def misses(self) -> int:
+        return sum(stripe.misses for stripe in self._stripes)
+
+    @property
+    def evictions(self) -> int:
+        return sum(stripe.cache.evictions + stripe.rejected for stripe in self._stripes)
+
+    @property
+    def expirations(self) -> int:
+        return sum(stripe.cache.expirations for stripe in self._stripes)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        stripe = self._stripe(key)
+        with stripe.lock:
+            blob = stripe.cache.get(key)
+            if blob is None:
+                stripe.misses += 1
+                return default
+            stripe.hits += 1
+        return decode_value(blob)
+
+    def peek(self, key: str) -> Any:
+        stripe = self._stripe(key)
+        with stripe.lock:
+            blob = stripe.cache.get(key)
+        return None if blob is None else decode_value(blob)
+
+    def _store(self, stripe: _Stripe, key: str, blob: bytes) -> bool:
+        if len(blob) > stripe.cache.maxsize:
+            stripe.rejected += 1
+            logger.warning(f"Cache '{self.name}': {len(blob)} byte entry exceeds the shard budget, not cached")
+            return False
+        stripe.cache[key] = blob
+        return True
+
+    def set(self, key: str, value: Any) -> None:
+        blob = encode_value(value)
+        stripe = self._stripe(key)
+        with stripe.lock:
+            self._store(stripe, key, blob)
+
+    def set_if_absent(self, key: str, value: Any) -> bool:
+        blob = encode_value(value)
+        stripe = self._stripe(key)
+        with stripe.lock:
+            if stripe.cache.get(key) is not None:
+                return False
+            return self._store(stripe, key, blob)
+
+    def delete(self, key: str) -> None:
+        stripe = self._stripe(key)
+        with stripe.lock:
+            stripe.cache.pop(key, None)
+
+    def clear(self) -> None:
+        for stripe in self._stripes:
+            with stripe.lock:
+                stripe.cache.clear()
+
+    def bytes_in_use(self) -> int:
+        total = 0
+        for stripe in self._stripes:
+            with stripe.lock:
+                stripe.cache.expire()
+                total += stripe.cache.currsize
+        return total
+
+    def __len__(self) -> int:
+        total = 0
+        for stripe in self._stripes:
+            with stripe.lock:
+                stripe.cache.expire()
+                total += len(stripe.cache)
+        return total
+
+
+class SQLiteCache(CacheBackend):
+    """
+    Entries live in one `cache_entries` table, namespaced by cache name. Each
+    thread uses its own connection; writes take the database lock briefly
+    (BEGIN IMMEDIATE), which also makes set_if_absent atomic across processes.
+    """
+
+    kind = "sqlite"
+
+    def __init__(self, name: str, maxsize: int, ttl: int, path: str, max_bytes: int = DEFAULT_MAX_BYTES,
+                 timer: Callable[[], float] = time.time):
+        super().__init__(name, maxsize, ttl, max_bytes)
+        self.path = path
+        self._timer = timer
+        self._local = threading.local()
+        with self._write() as conn:
+            # The cache is disposable: an older layout is simply dropped
+            if conn.execute("PRAGMA user_version").fetchone()[0] < SQLITE_SCHEMA_VERSION:
+                conn.execute("DROP TABLE IF EXISTS cache_entries")
+                conn.execute(f"PRAGMA user_version = {SQLITE_SCHEMA_VERSION}")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache_entries ("
+                " namespace TEXT NOT NULL, key TEXT NOT NULL, value BLOB NOT NULL, size INTEGER NOT NULL,"
+                " expires_at REAL NOT NULL, PRIMARY KEY (namespace, key))"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_cache_entries_expiry ON cache_entries (namespace, expires_at)")
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _write(self):
+        return _Transaction(self._conn())
+
+    def peek(self, key: str) -> Any:
+        row = self._conn().execute(
+            "SELECT value FROM cache_entries WHERE namespace = ? AND key = ? AND expires_at > ?",
+            (self.name, key, self._timer())
+        ).fetchone()
+        return decode_value(row[0]) if row else None
+
+    def _insert(self, conn: sqlite3.Connection, key: str, blob: bytes, replace: bool) -> bool:
+        now = self._timer()
+        verb = "INSERT OR REPLACE" if replace else "INSERT OR IGNORE"
+        self._expire(conn, now)
+        stored = conn.execute(
+            f"{verb} INTO cache_entries (namespace, key, value, size, expires_at) VALUES (?, ?, ?, ?, ?)",
+            (self.name, key, blob, len(blob), now + self.ttl)
+        ).rowcount == 1
+        if stored:
+            self._evict(conn)
+        return stored
+
+    def _expire(self, conn: sqlite3.Connection, now: float) -> None:
+        expired = conn.execute(
+            "DELETE FROM cache_entries WHERE namespace = ? AND expires_at <= ?", (self.name, now)
+        ).rowcount
+        if expired:
+            self._count(expirations=expired)
+
+    def _evict(self, conn: sqlite3.Connection) -> None:
+        # Keep the newest entries that fit both budgets; drop the rest
+        evicted = conn.execute(
+            "DELETE FROM cache_entries WHERE namespace = ? AND key IN ("
+            " SELECT key FROM ("
+            "  SELECT key,"
+            "   SUM(size) OVER (ORDER BY expires_at DESC, key) AS kept_bytes,"
+            "   ROW_NUMBER() OVER (ORDER BY expires_at DESC, key) AS kept_rows"
+            "  FROM cache_entries WHERE namespace = ?)"
+            " WHERE kept_bytes > ? OR kept_rows > ?)",
+            (self.name, self.name, self.max_bytes, self.maxsize)
+        ).rowcount
+        if evicted:
+            self._count(evictions=evicted)
+
+    def set(self, key: str, value: Any) -> None:
+        blob = encode_value(value)
+        with self._write() as conn:
+            self._insert(conn, key, blob, replace=True)
+
+    def set_if_absent(self, key: str, value: Any) -> bool:
+        blob = encode_value(value)
+        with self._write() as conn:
+            return self._insert(conn, key, blob, replace=False)
+
+    def delete(self, key: str) -> None:
+        with self._write() as conn:
+            conn.execute("DELETE FROM cache_entries WHERE namespace = ? AND key = ?", (self.name, key))
+
+    def clear(self) -> None:
+        with self._write() as conn:
+            conn.execute("DELETE FROM cache_entries WHERE namespace = ?", (self.name,))
+
+    def bytes_in_use(self) -> int:
+        return self._conn().execute(
+            "SELECT COALESCE(SUM(size), 0) FROM cache_entries WHERE namespace = ? AND expires_at > ?",
+            (self.name, self._timer())
+        ).fetchone()[0]
+
+    def __len__(self) -> int:
+        return self._conn().execute(
+            "SELECT COUNT(*) FROM cache_entries WHERE namespace = ? AND expires_at > ?",
+            (self.name, self._timer())
+        ).fetchone()[0]
+
+
+class _Transaction:
+    """BEGIN IMMEDIATE ... COMMIT/ROLLBACK on an autocommit sqlite3 connection."""
+
+    def __init__(self, conn: sqlite3.Connection):
+        self.conn = conn
+
+    def __enter__(self) -> sqlite3.Connection:
+        self.conn.execute("BEGIN IMMEDIATE")
+        return self.conn
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.conn.execute("ROLLBACK" if exc_type else "COMMIT")
+
+
+def make_cache_backend(name: str, maxsize: int, ttl: int, max_bytes: int = DEFAULT_MAX_BYTES,
+                       backend: Optional[str] = None) -> CacheBackend:
+    """Build the configured backend for one named cache."""
+    backend = backend or settings.CACHE_BACKEND
+    if backend == "sqlite":
+        return SQLiteCache(name, maxsize, ttl, path=settings.CACHE_SQLITE_PATH, max_bytes=max_bytes)
+    if backend == "memory":
+        return InProcessCache(name, maxsize, ttl, max_bytes=max_bytes)
+    raise ValueError(f"Unknown CACHE_BACKEND: {backend}")
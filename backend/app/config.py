@@ -24,6 +24,34 @@ class Settings(BaseSettings):
     JWT_ACCESS_TOKEN_EXPIRE_MINUTES: int = 15  # 15 minutes
     JWT_REFRESH_TOKEN_EXPIRE_DAYS: int = 7  # 7 days
     
+    # Scheduling
+    SLOT_SEARCH_HORIZON_DAYS: int = 14  # How far ahead conflict suggestions may look
+    
+    # Retention
+    TASK_RETENTION_DAYS: int = 3  # Matches the frontend's view window
+    RETENTION_SWEEP_INTERVAL_SECONDS: int = 3600  # 0 disables the in-process sweeper
+    TOMBSTONE_RETENTION_DAYS: int = 30  # Sync cursors older than this get a full resync
+    
+    # Parsing
+    PARSE_WORKERS: int = 4  # Concurrent background parses per API process (POST /jobs/{id}/parse?async=true)
+    PARSE_QUEUE_BACKEND: str = "inprocess"  # inprocess (API workers parse) or database (python -m app.worker parses)
+    PARSE_CLAIM_TIMEOUT_SECONDS: int = 300  # A claimed job not finished by then is requeued (worker died)
+    PARSE_WORKER_HEARTBEAT_SECONDS: int = 15
+    
+    # Usage logging
+    TOKEN_LOG_FLUSH_INTERVAL_MS: int = 500  # TokenLog rows are bulk-inserted at least this often
+    TOKEN_LOG_BATCH_SIZE: int = 200  # ...or as soon as this many are waiting
+    TOKEN_LOG_QUEUE_SIZE: int = 10000  # When full, callers write their row synchronously
+    TOKEN_LOG_RETENTION_DAYS: int = 180  # Raw rows older than this are dropped a partition at a time (0 keeps all)
+    TOKEN_LOG_PARTITIONS_AHEAD: int = 2  # Monthly PostgreSQL partitions created in advance
+    
+    # Caching
+    CACHE_BACKEND: str = "memory"  # memory (per worker) or sqlite (shared by workers on a host)
+    CACHE_SQLITE_PATH: str = "momentra_cache.db"
+    LLM_CACHE_MAX_BYTES: int = 8 * 1024 * 1024  # Compressed payload budgets
+    TEMPLATE_CACHE_MAX_BYTES: int = 4 * 1024 * 1024
+    TRANSCRIPTION_CACHE_MAX_BYTES: int = 1024 * 1024
+    
     model_config = SettingsConfigDict(
         # In production, we prefer environment variables over .env files
         env_file=".env" if ENVIRONMENT == "development" else None,
@@ -6,8 +6,12 @@ from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 from .models import Base
 from .config import settings
+from . import task_sync  # noqa: F401  Registers the task versioning flush hook
+from . import job_stats  # noqa: F401  Registers the job status count flush hook
+from .metrics import instrument_engine
 
 engine = create_engine(settings.DATABASE_URL)
+instrument_engine(engine)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 def get_db():
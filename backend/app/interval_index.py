@@ -0,0 +1,170 @@
+"""
+Interval Index
+==============
+In-memory index of time ranges for fast overlap (conflict) queries.
+
+IntervalIndex keeps sorted start/end arrays and answers "what overlaps
+[start, end)?" in O(log n + k) using bisect. Conflicts against the database
+are checked in SQL (see JobService._overlapping_tasks_query); this index
+serves ranges that only exist in memory, such as candidates of a job that is
+still being parsed.
+
+Overlap semantics match JobService._times_overlap: a missing (or non-positive)
+end time is treated as start + 30 minutes.
+"""
+
+import bisect
+import heapq
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+DEFAULT_DURATION = timedelta(minutes=30)
+
+
+def _naive_utc(dt: Optional[datetime]) -> Optional[datetime]:
+    if dt is not None and dt.tzinfo is not None:
+        return dt.astimezone(timezone.utc).replace(tzinfo=None)
+    return dt
+
+
+def effective_range(start: Optional[datetime], end: Optional[datetime]) -> Optional[Tuple[datetime, datetime]]:
+    """Normalize a (start, end) pair to naive UTC, applying the 30 min default duration."""
+    start = _naive_utc(start)
+    end = _naive_utc(end)
+    if start is None:
+        return None
+    if end is None or end <= start:
+        end = start + DEFAULT_DURATION
+    return start, end
+
+
+class IntervalIndex:
+    """
+    Sorted start/end arrays over half-open intervals.
+
+    Entries are (start, end, key, is_blocking). Lookups bisect on start and
+    bound the left edge by the longest interval seen, so a query scans only
+    intervals that can possibly reach into the requested range.
+    """
+
+    def __init__(self, entries: Iterable[Tuple[datetime, Optional[datetime], object, bool]] = ()):
+        self._starts: List[datetime] = []
+        self._ends: List[datetime] = []
+        self._keys: List[object] = []
+        self._blocking: List[bool] = []
+        self._positions: Dict[object, datetime] = {}
+        self._max_span = timedelta(0)
+
+        rows = []
+        for start, end, key, is_blocking in entries:
+            rng = effective_range(start, end)
+            if rng:
+                rows.append((rng[0], rng[1], key, bool(is_blocking)))
+        rows.sort(key=lambda r: r[0])
+        for start, end, key, is_blocking in rows:
+            self._starts.append(start)
+            self._ends.append(end)
+            self._keys.append(key)
+            self._blocking.append(is_blocking)
+            self._positions[key] = start
+            self._max_span = max(self._max_span, end - start)
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def __contains__(self, key) -> bool:
+        return key in self._positions
+
+    def add(self, start: Optional[datetime], end: Optional[datetime], key, is_blocking: bool = True) -> None:
+        """Insert (or replace) an interval. Entries without a start are ignored."""
+        self.remove(key)
+        rng = effective_range(start, end)
+        if not rng:
+            return
+        start, end = rng
+        i = bisect.bisect_right(self._starts, start)
+        self._starts.insert(i, start)
+        self._ends.insert(i, end)
+        self._keys.insert(i, key)
+        self._blocking.insert(i, bool(is_blocking))
+        self._positions[key] = start
+        self._max_span = max(self._max_span, end - start)
+
+    def remove(self, key) -> bool:
+        start = self._positions.pop(key, None)
+        if start is None:
+            return False
+        i = bisect.bisect_left(self._starts, start)
+        while self._keys[i] != key:
+            i += 1
+        del self._starts[i], self._ends[i], self._keys[i], self._blocking[i]
+        return True
+
+    def overlapping(self, start: Optional[datetime], end: Optional[datetime], blocking_only: bool = False) -> Iterator[Tuple[datetime, datetime, object]]:
+        """Yield (start, end, key) of every interval overlapping [start, end), in start order."""
+        rng = effective_range(start, end)
+        if not rng or not self._keys:
+            return
+        q_start, q_end = rng
+        lo = bisect.bisect_right(self._starts, q_start - self._max_span)
+        hi = bisect.bisect_left(self._starts, q_end)
+        for i in range(lo, hi):
+            if self._ends[i] > q_start and (self._blocking[i] or not blocking_only):
+                yield self._starts[i], self._ends[i], self._keys[i]
+
+    def first_overlap(self, start: Optional[datetime], end: Optional[datetime], blocking_only: bool = False, exclude=None):
+        """Return the key of the earliest-starting overlapping interval, or None."""
+        for _, _, key in self.overlapping(start, end, blocking_only=blocking_only):
+            if key != exclude:
+                return key
+        return None
+
+
+def sweep_overlaps(fixed: Iterable[Tuple[datetime, Optional[datetime], object]], probes: Iterable[Tuple[datetime, Optional[datetime], object]]):
+    """
+    Find every overlapping pair involving a probe, in one sweep-line pass.
+
+    `fixed` are ranges already on the calendar (overlaps among them are not
+    reported); `probes` are the ranges being checked. Runs in
+    O((n + m) log(n + m) + k) for n fixed, m probes and k reported pairs.
+
+    Returns (fixed_hits, probe_hits):
+    - fixed_hits[probe_key]: overlapping fixed keys, earliest start first
+    - probe_hits[probe_key]: set of other probe keys it overlaps
+    """
+    events = []
+    for kind, items in ((0, fixed), (1, probes)):
+        for start, end, key in items:
+            rng = effective_range(start, end)
+            if rng:
+                events.append((rng[0], kind, len(events), rng[1], key))
+    events.sort(key=lambda e: (e[0], e[1], e[2]))
+
+    fixed_hits: Dict[object, List[object]] = {}
+    probe_hits: Dict[object, set] = {}
+    active_fixed: list = []   # heap of (end, seq, start, key)
+    active_probes: list = []
+
+    for start, kind, seq, end, key in events:
+        for active in (active_fixed, active_probes):
+            while active and active[0][0] <= start:
+                heapq.heappop(active)
+
+        if kind == 1:
+            fixed_hits.setdefault(key, []).extend((f_start, f_seq, f_key) for _, f_seq, f_start, f_key in active_fixed)
+            probe_hits.setdefault(key, set())
+            for _, _, _, p_key in active_probes:
+                probe_hits[key].add(p_key)
+                probe_hits[p_key].add(key)
+            heapq.heappush(active_probes, (end, seq, start, key))
+        else:
+            for _, _, _, p_key in active_probes:
+                fixed_hits[p_key].append((start, seq, key))
+            heapq.heappush(active_fixed, (end, seq, start, key))
+
+    ordered = {}
+    for key, hits in fixed_hits.items():
+        # Ties on start keep the caller's input order (e.g. start_time, id)
+        hits.sort(key=lambda h: (h[0], h[1]))
+        ordered[key] = [k for _, _, k in hits]
+    return ordered, probe_hits
@@ -0,0 +1,74 @@
+"""
+Job Status Counts
+=================
+Jobs per status for the admin conversion funnel, so /admin/stats never
+groups the whole jobs table.
+
+A before_flush hook on every Session moves the counts as jobs are created,
+change status or are deleted, in the same transaction as the change. Core
+UPDATEs of jobs.status bypass the hook and must call record_status_moves()
+(see worker.py). The migration backfills the counts from existing jobs and
+creates a row for every status.
+"""
+
+from collections import Counter
+from typing import Dict
+
+from sqlalchemy import event, inspect, insert, select, update
+from sqlalchemy.orm import Session
+
+from .models import Job, JobStatusCount
+from .schemas import JobStatus
+
+_counts = JobStatusCount.__table__
+
+
+def _apply_moves(connection, moves: Dict[JobStatus, int]) -> None:
+    for status, delta in moves.items():
+        if not delta:
+            continue
+        updated = connection.execute(
+            update(_counts).where(_counts.c.status == status.name).values(jobs=_counts.c.jobs + delta)
+        ).rowcount
+        if not updated:
+            connection.execute(insert(_counts).values(status=status.name, jobs=delta))
+
+
+@event.listens_for(Session, "before_flush")
+def _count_status_changes(session, flush_context, instances):
+    moves = Counter()
+    for job in session.new:
+        if isinstance(job, Job):
+            moves[job.status or JobStatus.CREATED] += 1
+    for job in session.dirty:
+        if not isinstance(job, Job):
+            continue
+        history = inspect(job).attrs.status.history
+        if not history.added:
+            continue
+        if history.deleted:
+            old = history.deleted[0]
+        else:
+            # Set without being loaded first: read the stored status
+            old = session.connection().execute(select(Job.status).where(Job.id == job.id)).scalar()
+        new = history.added[0]
+        if old != new:
+            moves[old] -= 1
+            moves[new] += 1
+    for job in session.deleted:
+        if isinstance(job, Job):
+            moves[job.status] -= 1
+    moves.pop(None, None)
+    if moves:
+        # Core statements on the session's connection, so they don't re-enter the flush
+        _apply_moves(session.connection(), moves)
+
+
+def record_status_moves(db: Session, moves: Dict[JobStatus, int]) -> None:
+    """Apply status count deltas for jobs changed with a Core UPDATE."""
+    _apply_moves(db.connection(), moves)
+
+
+def job_status_counts(db: Session) -> Dict[str, int]:
+    """Jobs per status name, leaving out statuses with none."""
+    return {row.status: row.jobs for row in db.query(JobStatusCount) if row.jobs}
@@ -0,0 +1,73 @@
+"""
+Latency Sketch
+==============
+Log-bucketed histograms (DDSketch-style) for LLM latency and tokens per call.
+
+A value v >= 1 lands in bucket 1 + floor(log(v) / log(GAMMA)); values below
+1 (a cache-speed call, a zero-token local parse) share bucket 0. Every
+bucket covers a fixed ratio GAMMA, so any quantile read back is within
+RELATIVE_ACCURACY of the true value, at any scale, with a few hundred
+buckets at most. Sketches merge by adding bucket counts. That makes them
+cheap to persist: usage_rollup stores one counter per (day, model, feature,
+metric, bucket) and upserts batch sketches with plain additions, and a
+window of days is read back by summing its buckets.
+"""
+
+import math
+from typing import Dict, Optional
+
+GAMMA = 1.04
+RELATIVE_ACCURACY = (GAMMA - 1) / (GAMMA + 1)  # ~2%
+_LOG_GAMMA = math.log(GAMMA)
+
+
+def bucket_of(value: float) -> int:
+    if value is None or value < 1:
+        return 0
+    return 1 + int(math.floor(math.log(value) / _LOG_GAMMA))
+
+
+def bucket_value(bucket: int) -> float:
+    """Representative value of a bucket: its range's point of least relative error."""
+    if bucket <= 0:
+        return 0.0
+    return GAMMA ** (bucket - 1) * 2 * GAMMA / (GAMMA + 1)
+
+
+class LogHistogram:
+    def __init__(self, buckets: Optional[Dict[int, int]] = None):
+        self.buckets: Dict[int, int] = dict(buckets or {})
+
+    @property
+    def count(self) -> int:
+        return sum(self.buckets.values())
+
+    def add(self, value: float, count: int = 1) -> None:
+        self.add_bucket(bucket_of(value), count)
+
+    def add_bucket(self, bucket: int, count: int) -> None:
+        self.buckets[bucket] = self.buckets.get(bucket, 0) + count
+
+    def merge(self, other: "LogHistogram") -> None:
+        for b, c in other.buckets.items():
+            self.buckets[b] = self.buckets.get(b, 0) + c
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Value at quantile q (0..1), or None for an empty sketch."""
+        total = self.count
+        if not total:
+            return None
+        rank = q * (total - 1)
+        seen = 0
+        for b in sorted(self.buckets):
+            seen += self.buckets[b]
+            if seen > rank:
+                return bucket_value(b)
+        return bucket_value(max(self.buckets))
+
+    def summary(self, quantiles=(0.5, 0.9, 0.99)) -> dict:
+        result = {}
+        for q in quantiles:
+            value = self.quantile(q)
+            result[f"p{round(q * 100):g}"] = round(value, 1) if value is not None else None
+        return result
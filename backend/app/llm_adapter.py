@@ -1,7 +1,8 @@
 import os
-from openai import OpenAI
+import asyncio
+from openai import OpenAI, AsyncOpenAI
 from pydantic import BaseModel, Field
-from typing import List, Optional
+from typing import Awaitable, Callable, List, Optional
 from pathlib import Path
 from dotenv import load_dotenv
 
@@ -25,6 +26,11 @@ if not api_key:
     # raise ValueError(f"❌ OPENAI_API_KEY not found. Looked in: {env_path}")
 
 client = OpenAI(api_key=api_key)
+async_client = AsyncOpenAI(api_key=api_key)
+
+# Bump whenever the system prompt or AIParseResult changes: jobs keep their parse result
+# under a hash of its inputs that includes this (see JobService._parse_input_hash)
+PROMPT_VERSION = 1
 
 # --- AI Specific Schemas (Internal to this adapter) ---
 class AICandidate(BaseModel):
@@ -56,6 +62,7 @@ class AIParseResult(BaseModel):
 
 from datetime import datetime
 from .local_parser import parse_simple_task
+from .metrics import local_parser
 
 class LLMAdapter:
     def parse_text(self, text: str, user_local_time: str = None, ai_temperature: float = 0.0, personal_context: str = None, user_id: int = None) -> dict:
@@ -66,8 +73,128 @@ class LLMAdapter:
         personal_context: Optional string containing user's personal context/preferences
         user_id: Optional user ID for token usage tracking
         """
+        from .llm_tracking import call_llm_with_tracking
+
+        def call(request: dict) -> dict:
+            return call_llm_with_tracking(client=client, **request)
+
+        return self._parse(text, user_local_time, ai_temperature, personal_context, user_id, call)
+
+    async def parse_text_async(self, text: str, user_local_time: str = None, ai_temperature: float = 0.0, personal_context: str = None, user_id: int = None) -> dict:
+        """
+        Async version of parse_text: the OpenAI round trip is awaited on the event loop
+        instead of holding a threadpool slot. Same arguments, caching and fallbacks.
+        """
+        from .llm_tracking import call_llm_with_tracking_async
+
+        async def call(request: dict) -> dict:
+            return await call_llm_with_tracking_async(client=async_client, **request)
+
+        return await self._parse_async(text, user_local_time, ai_temperature, personal_context, user_id, call)
+
+    async def parse_text_stream(self, text: str, on_item: Callable[[str, dict], Awaitable[None]], user_local_time: str = None, ai_temperature: float = 0.0, personal_context: str = None, user_id: int = None) -> dict:
+        """
+        parse_text_async with a streamed completion: each task, command and ambiguity is
+        awaited through on_item(kind, item) as soon as the model finishes writing it.
+        The full result is still returned. Items emitted before an error stay emitted; results
+        from the cache, the local parser or a concurrent identical call emit nothing, so the
+        caller handles whatever of the result was not streamed.
+        """
+        from .llm_tracking import stream_llm_with_tracking_async
+        from .stream_parser import ParseResultScanner
+
+        async def call(request: dict) -> dict:
+            scanner = ParseResultScanner()
+
+            async def on_delta(delta: str):
+                for kind, item in scanner.feed(delta):
+                    await on_item(kind, item)
+
+            return await stream_llm_with_tracking_async(client=async_client, on_delta=on_delta, **request)
+
+        return await self._parse_async(text, user_local_time, ai_temperature, personal_context, user_id, call)
+
+    def _parse(self, text: str, user_local_time: str, ai_temperature: float, personal_context: str, user_id: int, call: Callable[[dict], dict]) -> dict:
+        """
+        Everything around the model call, shared by the parse_text variants: the paths that need
+        no LLM, then call(request) at most once per key across concurrent identical parses.
+        """
+        early = self._parse_without_llm(text, user_local_time, ai_temperature, personal_context, user_id)
+        if early is not None:
+            return early
+
+        from .rate_limit import get_cache_key, llm_cache, llm_flight
+        key = get_cache_key(text, user_local_time)
+
+        def call_llm():
+            # A call that just finished for this key may have filled the cache
+            cached = llm_cache.peek(key)
+            if cached:
+                return cached
+            try:
+                result = call(self._llm_request(text, user_local_time, ai_temperature, personal_context, user_id))
+                self._cache_result(text, user_local_time, ai_temperature, personal_context, result)
+                return result
+            except Exception as e:
+                return self._error_result(e)
+
+        # Concurrent identical parses share one LLM call
+        return llm_flight.do(key, call_llm)
+
+    async def _parse_async(self, text: str, user_local_time: str, ai_temperature: float, personal_context: str, user_id: int, call: Callable[[dict], Awaitable[dict]]) -> dict:
+        """_parse for the async variants, with call awaited on the event loop."""
+        # Cache lookup is in-memory, but the local parser path logs usage to the DB
+        early = await asyncio.to_thread(self._parse_without_llm, text, user_local_time, ai_temperature, personal_context, user_id)
+        if early is not None:
+            return early
+
+        from .rate_limit import get_cache_key, llm_cache, llm_flight
+        key = get_cache_key(text, user_local_time)
+
+        async def call_llm():
+            cached = llm_cache.peek(key)
+            if cached:
+                return cached
+            try:
+                result = await call(self._llm_request(text, user_local_time, ai_temperature, personal_context, user_id))
+                self._cache_result(text, user_local_time, ai_temperature, personal_context, result)
+                return result
+            except Exception as e:
+                return self._error_result(e)
+
+        return await llm_flight.do_async(key, call_llm)
+
+    def _llm_request(self, text: str, user_local_time: str, ai_temperature: float, personal_context: str, user_id: int) -> dict:
+        """Arguments of the tracked scheduler call, apart from the client."""
+        return {
+            "user_id": user_id,
+            "feature_name": "scheduler",
+            "messages": self._build_messages(text, user_local_time, personal_context),
+            "response_format": AIParseResult,
+            "temperature": ai_temperature,
+            "max_tokens": 500
+        }
+
+    def _cache_result(self, text: str, user_local_time: str, ai_temperature: float, personal_context: str, result: dict) -> None:
+        """Cache a successful LLM response, and its template when it can be shared."""
+        from .rate_limit import cache_response
+        from .template_cache import cache_template
+
+        cache_response(text, user_local_time, result)
+        if self._templatable(ai_temperature, personal_context):
+            cache_template(text, user_local_time, result)
+
+    @staticmethod
+    def _error_result(error: Exception) -> dict:
+        print(f"OpenAI Error: {error}")
+        # Fallback to an error state or empty result so app doesn't crash
+        return {"tasks": [], "commands": [], "ambiguities": [{"type": "error", "message": f"AI Parsing Error: {str(error)}"}]}
+
+    def _parse_without_llm(self, text: str, user_local_time: str, ai_temperature: float, personal_context: str, user_id: int) -> Optional[dict]:
+        """Cache hit, local parser or no-key mock result; None when the LLM is needed."""
         # --- CHECK CACHE FIRST ---
         from .rate_limit import get_cached_response, cache_response
+        from .template_cache import get_templated_response
         
         # Start with base cache key
         cache_key_elements = [text, user_local_time]
@@ -86,12 +213,19 @@ class LLMAdapter:
         cached = get_cached_response(text, user_local_time)
         if cached:
             return cached
+
+        # Same phrasing seen on another day, at another time or by another user
+        if self._templatable(ai_temperature, personal_context):
+            templated = get_templated_response(text, user_local_time)
+            if templated:
+                return templated
             
         # --- LOCAL GUARD (FAST PATH) ---
         # Try to parse simple commands locally before hitting the LLM
         # Only use if temperature is low (user doesn't want creative interpretation)
         if ai_temperature < 0.3:
             local_result = parse_simple_task(text, user_local_time)
+            local_parser.inc("hit" if local_result else "miss")
             if local_result:
                 print(f"⚡ Local Parser used for: '{text}'")
                 
@@ -124,7 +258,16 @@ class LLMAdapter:
                  "commands": [],
                  "ambiguities": []
              }
-             
+
+        return None
+
+    @staticmethod
+    def _templatable(ai_temperature: float, personal_context: str) -> bool:
+        """Templates are shared across users, so only deterministic, non-personalized parses use them."""
+        return ai_temperature == 0 and not personal_context
+
+    def _build_messages(self, text: str, user_local_time: str = None, personal_context: str = None) -> list:
+        """System prompt (with the user's date/time context) and user message for the scheduler call."""
         # Parse user's local time if provided, otherwise use server time
         if user_local_time:
             try:
@@ -179,33 +322,10 @@ Rules:
 8. ambiguities[].options[].value must be a JSON string of task parameters.
 """
 
-        try:
-            from .llm_tracking import call_llm_with_tracking
-            
-            messages = [
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": text},
-            ]
-            
-            result = call_llm_with_tracking(
-                client=client,
-                user_id=user_id,
-                feature_name="scheduler",
-                messages=messages,
-                response_format=AIParseResult,
-                temperature=ai_temperature,
-                max_tokens=500
-            )
-            
-            # Cache the successful response
-            cache_response(text, user_local_time, result)
-            
-            return result
-
-        except Exception as e:
-            print(f"OpenAI Error: {e}")
-            # Fallback to an error state or empty result so app doesn't crash
-            return {"tasks": [], "commands": [], "ambiguities": [{"type": "error", "message": f"AI Parsing Error: {str(e)}"}]}
+        return [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": text},
+        ]
 
     def transcribe_audio(self, file_path: str) -> str:
         """
@@ -241,3 +361,30 @@ Rules:
         except Exception as e:
             print(f"Transcription Error: {e}")
             raise e
+
+    async def transcribe_audio_async(self, file_path: str) -> str:
+        """Async version of transcribe_audio using the AsyncOpenAI client."""
+        from .rate_limit import get_cached_transcription, cache_transcription
+        if not client.api_key or client.api_key == "sk-proj-xxxxxxxxxxxxxxxxxxxxxxxx":
+             return "Mock transcription: Meeting with team tomorrow at 10am."
+             
+        try:
+            with open(file_path, "rb") as f:
+                audio_bytes = f.read()
+            
+            cached = get_cached_transcription(audio_bytes)
+            if cached:
+                return cached
+            
+            transcription = await async_client.audio.transcriptions.create(
+                model="whisper-1", 
+                file=(os.path.basename(file_path), audio_bytes),
+                response_format="text"
+            )
+            
+            cache_transcription(audio_bytes, transcription)
+            
+            return transcription
+        except Exception as e:
+            print(f"Transcription Error: {e}")
+            raise e
@@ -2,18 +2,32 @@
 LLM Tracking Service
 ====================
 Wrapper for OpenAI API calls with automatic token usage and cost tracking.
+
+Usage rows don't cost the caller a database round trip: log_token_usage()
+hands them to token_log_writer, a background thread that bulk-inserts them
+every TOKEN_LOG_FLUSH_INTERVAL_MS or TOKEN_LOG_BATCH_SIZE rows and flushes
+what's left on shutdown. When its queue is full (the database can't keep up)
+or it isn't running (scripts, tests), the row is written synchronously.
 """
 
 import time
-from openai import OpenAI
+import logging
+import queue
+import threading
+from openai import OpenAI, AsyncOpenAI
 from sqlalchemy.orm import Session
 from datetime import datetime
-from typing import Optional, Type
+from typing import Awaitable, Callable, List, Optional, Type
 from pydantic import BaseModel
+from sqlalchemy import insert
 
+from .config import settings
 from .database import SessionLocal
+from .metrics import llm_call_duration, llm_tokens
 from .models import TokenLog
 
+logger = logging.getLogger(__name__)
+
 # --- Pricing Constants (per token) ---
 # GPT-4o-mini pricing as of January 2026
 GPT_4O_MINI_INPUT_COST_PER_TOKEN = 0.15 / 1_000_000   # $0.15 per 1M input tokens
@@ -64,12 +78,7 @@ def call_llm_with_tracking(
         )
         
         # Extract usage data
-        if response.usage:
-            usage_data = {
-                "prompt_tokens": response.usage.prompt_tokens,
-                "completion_tokens": response.usage.completion_tokens,
-                "total_tokens": response.usage.total_tokens
-            }
+        usage_data = _usage_of(response)
         
         # Return parsed result
         return response.choices[0].message.parsed.model_dump()
@@ -91,6 +100,106 @@ def call_llm_with_tracking(
             )
 
 
+async def call_llm_with_tracking_async(
+    client: AsyncOpenAI,
+    user_id: Optional[int],
+    feature_name: str,
+    messages: list,
+    response_format: Type[BaseModel],
+    model: str = DEFAULT_MODEL,
+    temperature: float = 0.0,
+    max_tokens: int = 500
+) -> dict:
+    """
+    Async version of call_llm_with_tracking for an AsyncOpenAI client.
+    The request is awaited on the event loop; only the TokenLog write goes to a worker thread.
+    """
+    start_time = time.perf_counter()
+    usage_data = None
+    
+    try:
+        response = await client.beta.chat.completions.parse(
+            model=model,
+            messages=messages,
+            response_format=response_format,
+            max_tokens=max_tokens,
+            temperature=temperature
+        )
+        usage_data = _usage_of(response)
+        return response.choices[0].message.parsed.model_dump()
+        
+    finally:
+        if usage_data:
+            latency_ms = (time.perf_counter() - start_time) * 1000
+            log_token_usage(
+                user_id=user_id,
+                feature=feature_name,
+                model=model,
+                prompt_tokens=usage_data["prompt_tokens"],
+                completion_tokens=usage_data["completion_tokens"],
+                total_tokens=usage_data["total_tokens"],
+                latency_ms=latency_ms
+            )
+
+
+async def stream_llm_with_tracking_async(
+    client: AsyncOpenAI,
+    user_id: Optional[int],
+    feature_name: str,
+    messages: list,
+    response_format: Type[BaseModel],
+    on_delta: Callable[[str], Awaitable[None]],
+    model: str = DEFAULT_MODEL,
+    temperature: float = 0.0,
+    max_tokens: int = 500
+) -> dict:
+    """
+    Streaming version of call_llm_with_tracking_async: each content delta is awaited through
+    on_delta as it arrives; the parsed result is returned once the completion ends.
+    """
+    start_time = time.perf_counter()
+    usage_data = None
+
+    try:
+        async with client.beta.chat.completions.stream(
+            model=model,
+            messages=messages,
+            response_format=response_format,
+            max_tokens=max_tokens,
+            temperature=temperature,
+            stream_options={"include_usage": True}
+        ) as stream:
+            async for event in stream:
+                if event.type == "content.delta":
+                    await on_delta(event.delta)
+            response = await stream.get_final_completion()
+        usage_data = _usage_of(response)
+        return response.choices[0].message.parsed.model_dump()
+
+    finally:
+        if usage_data:
+            latency_ms = (time.perf_counter() - start_time) * 1000
+            log_token_usage(
+                user_id=user_id,
+                feature=feature_name,
+                model=model,
+                prompt_tokens=usage_data["prompt_tokens"],
+                completion_tokens=usage_data["completion_tokens"],
+                total_tokens=usage_data["total_tokens"],
+                latency_ms=latency_ms
+            )
+
+
+def _usage_of(response) -> Optional[dict]:
+    if not response.usage:
+        return None
+    return {
+        "prompt_tokens": response.usage.prompt_tokens,
+        "completion_tokens": response.usage.completion_tokens,
+        "total_tokens": response.usage.total_tokens
+    }
+
+
 def log_token_usage(
     user_id: Optional[int],
     feature: str,
@@ -101,8 +210,8 @@ def log_token_usage(
     latency_ms: float = 0.0
 ) -> None:
     """
-    Saves a TokenLog entry to the database.
-    Uses a fresh session to ensure commit even if caller fails.
+    Records a TokenLog entry: queued for token_log_writer's next batch, or written right
+    away (in a fresh session, so it commits even if the caller fails) when it can't take it.
     """
     # Calculate cost
     if model == "local-regex":
@@ -116,26 +225,126 @@ def log_token_usage(
         input_cost = prompt_tokens * GPT_4O_MINI_INPUT_COST_PER_TOKEN
         output_cost = completion_tokens * GPT_4O_MINI_OUTPUT_COST_PER_TOKEN
     
-    cost_usd = input_cost + output_cost
-    
-    # Use a fresh session to ensure this commit is independent
-    db: Session = SessionLocal()
-    try:
-        log_entry = TokenLog(
-            user_id=user_id,
-            feature=feature,
-            model=model,
-            prompt_tokens=prompt_tokens,
-            completion_tokens=completion_tokens,
-            total_tokens=total_tokens,
-            cost_usd=cost_usd,
-            latency_ms=latency_ms,
-            timestamp=datetime.utcnow()
-        )
-        db.add(log_entry)
-        db.commit()
-    except Exception as e:
-        print(f"Failed to log token usage: {e}")
-        db.rollback()
-    finally:
-        db.close()
+    row = {
+        "user_id": user_id,
+        "feature": feature,
+        "model": model,
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": completion_tokens,
+        "total_tokens": total_tokens,
+        "cost_usd": input_cost + output_cost,
+        "latency_ms": latency_ms,
+        "timestamp": datetime.utcnow()
+    }
+    llm_call_duration.observe((latency_ms or 0.0) / 1000, feature, model)
+    llm_tokens.observe(total_tokens or 0, feature, model)
+    if not token_log_writer.submit(row):
+        token_log_writer.write([row])
+
+
+class TokenLogWriter:
+    """Background thread that bulk-inserts TokenLog rows from an in-memory queue."""
+
+    def __init__(self, session_factory: Callable[[], Session] = SessionLocal, flush_interval_ms: int = 500,
+                 batch_size: int = 200, maxsize: int = 10000):
+        self.session_factory = session_factory
+        self.flush_interval = flush_interval_ms / 1000
+        self.batch_size = batch_size
+        self._queue: queue.Queue = queue.Queue(maxsize=maxsize)
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self.written = 0
+        self.batches = 0
+        self.failed = 0
+        self.backpressure = 0  # Rows written synchronously because the queue was full
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None
+
+    def start(self) -> None:
+        if self.running:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="token-log-writer", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 10.0) -> None:
+        """Stop the thread once everything queued so far is written."""
+        if not self.running:
+            return
+        self._stop.set()
+        self._thread.join(timeout)
+        self._thread = None
+
+    def submit(self, row: dict) -> bool:
+        """Queue a row for the next batch. False when it must be written by the caller instead."""
+        if not self.running:
+            return False
+        try:
+            self._queue.put_nowait(row)
+            return True
+        except queue.Full:
+            self.backpressure += 1
+            if self.backpressure % 1000 == 1:
+                logger.warning(f"Token log queue full ({self._queue.maxsize} rows); writing synchronously")
+            return False
+
+    def write(self, rows: List[dict]) -> None:
+        """Insert rows and fold them into the daily rollup in one commit, using a fresh session."""
+        from .usage_rollup import record_usage
+
+        db: Session = self.session_factory()
+        try:
+            db.execute(insert(TokenLog), rows)
+            record_usage(db, rows)
+            db.commit()
+            self.written += len(rows)
+            self.batches += 1
+        except Exception as e:
+            print(f"Failed to log token usage: {e}")
+            self.failed += len(rows)
+            db.rollback()
+        finally:
+            db.close()
+
+    def _run(self) -> None:
+        while True:
+            stopping = self._stop.is_set()
+            batch = self._drain(stopping)
+            if batch:
+                self.write(batch)
+            elif stopping:
+                return
+
+    def _drain(self, stopping: bool) -> List[dict]:
+        """Collect rows until the batch is full or the flush interval has passed."""
+        batch = []
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                if stopping or remaining <= 0:
+                    batch.append(self._queue.get_nowait())
+                else:
+                    batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def stats(self) -> dict:
+        return {
+            "running": self.running,
+            "queued": self._queue.qsize(),
+            "written": self.written,
+            "batches": self.batches,
+            "failed": self.failed,
+            "backpressure": self.backpressure
+        }
+
+
+token_log_writer = TokenLogWriter(
+    flush_interval_ms=settings.TOKEN_LOG_FLUSH_INTERVAL_MS,
+    batch_size=settings.TOKEN_LOG_BATCH_SIZE,
+    maxsize=settings.TOKEN_LOG_QUEUE_SIZE
+)
@@ -0,0 +1,174 @@
+"""
+Token Log Partitions
+====================
+Keeps token_logs small enough for the sqladmin view and drops old usage
+rows without row-by-row DELETEs.
+
+- PostgreSQL: token_logs is range-partitioned by month on timestamp (see
+  the migration that converts it). Partitions are created
+  TOKEN_LOG_PARTITIONS_AHEAD months in advance; a DEFAULT partition catches
+  anything outside them.
+- Anything else (SQLite): rotating tables. When a new month starts, the live
+  token_logs table is renamed to token_logs_pYYYYMM and an empty one is
+  created in its place, so new rows and the admin view only touch the
+  current month.
+
+Each partition / rotated table is recorded in token_log_partitions with its
+time range. Retention drops whole partitions whose rows all fall before
+TOKEN_LOG_RETENTION_DAYS, which is a catalog operation instead of a scan.
+Nothing is lost from the dashboards: every row was folded into
+usage_daily_rollup and usage_daily_histogram in the transaction that
+inserted it (usage_rollup.record_usage), so only per-request detail goes.
+
+Runs with the retention sweep, or by hand:
+
+    python -m app.log_partitions [--days N] [--dry-run]
+"""
+
+import argparse
+import logging
+from datetime import datetime, timedelta
+from typing import List, Optional
+
+from sqlalchemy import func, text
+from sqlalchemy.orm import Session
+
+from .config import settings
+from .database import SessionLocal
+from .models import TokenLog, TokenLogPartition
+
+logger = logging.getLogger(__name__)
+
+LIVE_TABLE = "token_logs"
+
+
+def month_start(dt: datetime) -> datetime:
+    return datetime(dt.year, dt.month, 1)
+
+
+def next_month(dt: datetime) -> datetime:
+    return datetime(dt.year + dt.month // 12, dt.month % 12 + 1, 1)
+
+
+def partition_name(start: datetime) -> str:
+    return f"{LIVE_TABLE}_p{start:%Y%m}"
+
+
+def is_natively_partitioned(db: Session) -> bool:
+    if db.get_bind().dialect.name != "postgresql":
+        return False
+    relkind = db.execute(text("SELECT relkind FROM pg_class WHERE relname = :name"), {"name": LIVE_TABLE}).scalar()
+    return relkind == "p"
+
+
+def ensure_partitions(db: Session, now: Optional[datetime] = None, months_ahead: Optional[int] = None) -> List[str]:
+    """PostgreSQL: create this month's and the next months' partitions. Returns the names created."""
+    now = now or datetime.utcnow()
+    if months_ahead is None:
+        months_ahead = settings.TOKEN_LOG_PARTITIONS_AHEAD
+
+    created = []
+    start = month_start(now)
+    for _ in range(months_ahead + 1):
+        name, end = partition_name(start), next_month(start)
+        if db.get(TokenLogPartition, name) is None:
+            try:
+                with db.begin_nested():
+                    db.execute(text(
+                        f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF {LIVE_TABLE} "
+                        f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+                    ))
+                    db.add(TokenLogPartition(name=name, range_start=start, range_end=end))
+                created.append(name)
+            except Exception as e:
+                # Typically rows for that month already sit in the DEFAULT partition
+                logger.error(f"Could not create token log partition {name}: {e}")
+        start = end
+    db.commit()
+    return created
+
+
+def rotate_table(db: Session, now: Optional[datetime] = None) -> Optional[str]:
+    """Fallback: move the live table aside once its month is over. Returns the archived name, if any."""
+    now = now or datetime.utcnow()
+    live = db.get(TokenLogPartition, LIVE_TABLE)
+    if live is None:
+        first = db.query(func.min(TokenLog.timestamp)).scalar()
+        db.add(TokenLogPartition(name=LIVE_TABLE, range_start=month_start(first or now)))
+        db.commit()
+        return None
+    if month_start(now) <= live.range_start:
+        return None
+
+    archive = partition_name(live.range_start)
+    # Index names are global to the schema, so the archive gives its indexes up to the new table
+    for index in TokenLog.__table__.indexes:
+        db.execute(text(f"DROP INDEX IF EXISTS {index.name}"))
+    db.execute(text(f"ALTER TABLE {LIVE_TABLE} RENAME TO {archive}"))
+    if db.get_bind().dialect.name == "postgresql":
+        db.execute(text(f"ALTER INDEX IF EXISTS {LIVE_TABLE}_pkey RENAME TO {archive}_pkey"))
+    TokenLog.__table__.create(db.connection())
+
+    db.add(TokenLogPartition(name=archive, range_start=live.range_start, range_end=now))
+    live.range_start = month_start(now)
+    db.commit()
+    logger.info(f"Rotated {LIVE_TABLE} into {archive}")
+    return archive
+
+
+def expired_partitions(db: Session, cutoff: datetime) -> List[TokenLogPartition]:
+    return db.query(TokenLogPartition).filter(
+        TokenLogPartition.range_end.isnot(None),
+        TokenLogPartition.range_end <= cutoff
+    ).order_by(TokenLogPartition.range_start).all()
+
+
+def drop_expired_partitions(db: Session, cutoff: datetime) -> List[str]:
+    """Drop every partition holding only rows from before cutoff. Returns the names dropped."""
+    dropped = []
+    for partition in expired_partitions(db, cutoff):
+        db.execute(text(f"DROP TABLE IF EXISTS {partition.name}"))
+        db.delete(partition)
+        dropped.append(partition.name)
+    db.commit()
+    if dropped:
+        logger.info(f"Dropped token log partitions before {cutoff.isoformat()}Z: {', '.join(dropped)}")
+    return dropped
+
+
+def maintain_partitions(db: Session, retention_days: Optional[int] = None, now: Optional[datetime] = None) -> dict:
+    """Create or rotate partitions, then drop the expired ones."""
+    now = now or datetime.utcnow()
+    if retention_days is None:
+        retention_days = settings.TOKEN_LOG_RETENTION_DAYS
+
+    if is_natively_partitioned(db):
+        created = ensure_partitions(db, now)
+    else:
+        rotated = rotate_table(db, now)
+        created = [rotated] if rotated else []
+
+    dropped = drop_expired_partitions(db, now - timedelta(days=retention_days)) if retention_days > 0 else []
+    return {"created": created, "dropped": dropped}
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Create or rotate token log partitions and drop expired ones.")
+    parser.add_argument("--days", type=int, default=settings.TOKEN_LOG_RETENTION_DAYS, help="Keep usage rows from this many days")
+    parser.add_argument("--dry-run", action="store_true", help="Only list the partitions that would be dropped")
+    args = parser.parse_args(argv)
+
+    db = SessionLocal()
+    try:
+        if args.dry_run and args.days > 0:
+            cutoff = datetime.utcnow() - timedelta(days=args.days)
+            for partition in expired_partitions(db, cutoff):
+                print(f"{partition.name}: {partition.range_start.isoformat()}Z - {partition.range_end.isoformat()}Z")
+        elif not args.dry_run:
+            print(maintain_partitions(db, args.days))
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
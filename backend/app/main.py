@@ -1,5 +1,5 @@
-from fastapi import FastAPI, Request
-from fastapi.responses import JSONResponse
+from fastapi import FastAPI, Request, Depends
+from fastapi.responses import JSONResponse, PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.httpsredirect import HTTPSRedirectMiddleware
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
@@ -7,7 +7,15 @@ from . import models, database, routes
 from .logging_config import setup_logging
 from .rate_limit import limiter, rate_limit_exceeded_handler, get_cache_stats
 from .config import settings
+from .retention import start_retention_sweeper
+from .parse_queue import parse_queue
+from .worker import get_queue_stats
+from .llm_tracking import token_log_writer
+from .metrics import CONTENT_TYPE, MetricsMiddleware, render_metrics
+from sqlalchemy.orm import Session
 from slowapi.errors import RateLimitExceeded
+from contextlib import asynccontextmanager
+import asyncio
 import logging
 
 # Initialize structured logging
@@ -17,7 +25,26 @@ logger = logging.getLogger(__name__)
 # Initialize database
 database.init_db()
 
-app = FastAPI(title="AI Calendar Backend")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Expired tasks are swept in the background rather than on GET /tasks
+    sweeper = start_retention_sweeper()
+    # Usage rows are batched off the request path; stop() flushes what's queued
+    token_log_writer.start()
+    # Workers for POST /jobs/{id}/parse?async=true (the database backend uses `python -m app.worker`)
+    if settings.PARSE_QUEUE_BACKEND == "inprocess":
+        parse_queue.start()
+    yield
+    await parse_queue.stop()
+    if sweeper:
+        sweeper.cancel()
+        try:
+            await sweeper
+        except asyncio.CancelledError:
+            pass
+    await asyncio.to_thread(token_log_writer.stop)
+
+app = FastAPI(title="AI Calendar Backend", lifespan=lifespan)
 
 # Add middlewares
 if settings.ENFORCE_HTTPS:
@@ -36,8 +63,12 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
+# Outermost, so every request is timed (including ones rejected by the middlewares above)
+app.add_middleware(MetricsMiddleware)
+
 # Add rate limiter
 app.state.limiter = limiter
 app.add_exception_handler(RateLimitExceeded, rate_limit_exceeded_handler)
@@ -66,3 +97,13 @@ def read_root():
 def cache_stats():
     """Return cache statistics for monitoring."""
     return get_cache_stats()
+
+@app.get("/api/v1/queue-stats")
+def queue_stats(db: Session = Depends(database.get_db)):
+    """Return parse queue depth and worker throughput for monitoring."""
+    return {**get_queue_stats(db), "in_process": parse_queue.stats(), "token_log": token_log_writer.stats()}
+
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    """Request, LLM, cache and database pool metrics in the Prometheus text format."""
+    return PlainTextResponse(render_metrics(), media_type=CONTENT_TYPE)
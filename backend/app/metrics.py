@@ -0,0 +1,290 @@
+"""
+Metrics
+=======
+In-process counters, gauges and histograms, served at GET /metrics in the
+Prometheus text exposition format (version 0.0.4).
+
+Hot paths (every request, LLM call, parse and pool checkout) only touch a
+shard owned by the recording thread: a plain dict keyed by label values,
+created once per thread and metric. Recording never takes a lock, and
+threads never write each other's shards. A scrape sums the shards. Async
+code runs on the event loop thread, so it shares one shard.
+
+Values that other modules already count (cache hits and misses, pool
+checked-out connections) are read at scrape time by callbacks instead of
+being counted twice. Like the cache counters, everything is per process:
+scrape every worker, or sum them in the query.
+
+Recorded:
+- momentra_http_request_duration_seconds{method, route, status}: route is
+  the path template, "unmatched" for 404s, so label values stay bounded
+- momentra_llm_call_duration_seconds / momentra_llm_tokens{feature, model}
+- momentra_local_parser_total{result}: hit / miss of the regex fast path
+- momentra_cache_requests_total{cache, result}
+- momentra_db_pool_checkouts_total / momentra_db_pool_checked_out
+- momentra_rate_limited_total{route}
+"""
+
+import threading
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, List, Optional, Tuple
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+TOKEN_BUCKETS = (10, 50, 100, 250, 500, 1000, 2000, 4000, 8000)
+
+Labels = Tuple[str, ...]
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, help: str, labelnames: Tuple[str, ...] = (),
+                 collect: Optional[Callable[[], Dict[Labels, float]]] = None):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._collect = collect  # Scrape-time values instead of (or on top of) recorded ones
+        self._local = threading.local()
+        self._shards: List[dict] = []
+        self._shards_lock = threading.Lock()
+
+    def _shard(self) -> dict:
+        try:
+            return self._local.shard
+        except AttributeError:
+            shard = {}
+            with self._shards_lock:  # Once per thread
+                self._shards.append(shard)
+            self._local.shard = shard
+            return shard
+
+    def _snapshots(self) -> List[list]:
+        with self._shards_lock:
+            shards = list(self._shards)
+        # list() of a dict's items runs without releasing the GIL, so a writer adding a key can't break it
+        return [list(shard.items()) for shard in shards]
+
+    def samples(self) -> Dict[Labels, float]:
+        totals: Dict[Labels, float] = {}
+        for items in self._snapshots():
+            for labels, value in items:
+                totals[labels] = totals.get(labels, 0) + value
+        if self._collect:
+            for labels, value in self._collect().items():
+                totals[labels] = totals.get(labels, 0) + value
+        return totals
+
+    def value(self, *labelvalues: str) -> float:
+        return self.samples().get(labelvalues, 0)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        for labels, value in sorted(self.samples().items()):
+            lines.append(f"{self.name}{_label_text(self.labelnames, labels)} {_number(value)}")
+        return lines
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, *labelvalues: str, amount: float = 1) -> None:
+        shard = self._shard()
+        shard[labelvalues] = shard.get(labelvalues, 0) + amount
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def inc(self, *labelvalues: str, amount: float = 1) -> None:
+        shard = self._shard()
+        shard[labelvalues] = shard.get(labelvalues, 0) + amount
+
+    def dec(self, *labelvalues: str, amount: float = 1) -> None:
+        self.inc(*labelvalues, amount=-amount)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: Tuple[str, ...] = (), buckets=LATENCY_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, *labelvalues: str) -> None:
+        value = float(value)
+        shard = self._shard()
+        state = shard.get(labelvalues)
+        if state is None:
+            # One count per bucket plus +Inf, then the sum
+            state = shard[labelvalues] = [0] * (len(self.buckets) + 2)
+        state[bisect_left(self.buckets, value)] += 1
+        state[-1] += value
+
+    def samples(self) -> Dict[Labels, list]:
+        totals: Dict[Labels, list] = {}
+        for items in self._snapshots():
+            for labels, state in items:
+                total = totals.setdefault(labels, [0] * len(state))
+                for i, v in enumerate(list(state)):
+                    total[i] += v
+        return totals
+
+    def count(self, *labelvalues: str) -> int:
+        state = self.samples().get(labelvalues)
+        return sum(state[:-1]) if state else 0
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        names = self.labelnames + ("le",)
+        for labels, state in sorted(self.samples().items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), state[:-1]):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{_label_text(names, labels + (_number(bound),))} {cumulative}")
+            lines.append(f"{self.name}_sum{_label_text(self.labelnames, labels)} {_number(state[-1])}")
+            lines.append(f"{self.name}_count{_label_text(self.labelnames, labels)} {cumulative}")
+        return lines
+
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _label_text(names: Tuple[str, ...], values: Labels) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{n}="{_escape(v)}"' for n, v in zip(names, values)) + "}"
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+# =============================================================================
+# Scrape-time collectors
+# =============================================================================
+
+def _cache_requests() -> Dict[Labels, float]:
+    from .rate_limit import llm_cache, transcription_cache
+    from .template_cache import template_cache
+
+    samples = {}
+    for name, cache in (("llm", llm_cache), ("template", template_cache), ("transcription", transcription_cache)):
+        samples[(name, "hit")] = cache.hits
+        samples[(name, "miss")] = cache.misses
+    return samples
+
+
+_pools = []  # Instrumented SQLAlchemy pools
+
+
+def _pool_checked_out() -> Dict[Labels, float]:
+    # Only QueuePool and friends track this; StaticPool / NullPool report nothing
+    return {(): sum(pool.checkedout() for pool in _pools if hasattr(pool, "checkedout"))}
+
+
+# =============================================================================
+# Metrics
+# =============================================================================
+
+registry = Registry()
+
+http_request_duration = registry.register(Histogram(
+    "momentra_http_request_duration_seconds", "Time to serve an HTTP request, by route template",
+    ("method", "route", "status")
+))
+http_requests_in_progress = registry.register(Gauge(
+    "momentra_http_requests_in_progress", "HTTP requests being served"
+))
+llm_call_duration = registry.register(Histogram(
+    "momentra_llm_call_duration_seconds", "LLM call latency by feature_name", ("feature", "model")
+))
+llm_tokens = registry.register(Histogram(
+    "momentra_llm_tokens", "Total tokens per LLM call by feature_name", ("feature", "model"), buckets=TOKEN_BUCKETS
+))
+local_parser = registry.register(Counter(
+    "momentra_local_parser_total", "Parses offered to the local regex parser, by hit or miss", ("result",)
+))
+cache_requests = registry.register(Counter(
+    "momentra_cache_requests_total", "Cache lookups by cache and hit or miss", ("cache", "result"),
+    collect=_cache_requests
+))
+db_pool_checkouts = registry.register(Counter(
+    "momentra_db_pool_checkouts_total", "Connections checked out of the database pool"
+))
+db_pool_checked_out = registry.register(Gauge(
+    "momentra_db_pool_checked_out", "Connections currently checked out of the database pool",
+    collect=_pool_checked_out
+))
+rate_limited = registry.register(Counter(
+    "momentra_rate_limited_total", "Requests rejected by the rate limiter", ("route",)
+))
+
+
+def render_metrics() -> str:
+    return registry.render()
+
+
+def route_template(scope: dict) -> str:
+    route = scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+
+def instrument_engine(engine) -> None:
+    """Count pool checkouts for engine and report its checked-out connections."""
+    from sqlalchemy import event
+
+    _pools.append(engine.pool)
+    event.listen(engine, "checkout", lambda *args: db_pool_checkouts.inc())
+
+
+class MetricsMiddleware:
+    """ASGI middleware timing each HTTP request by method, route template and status."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        status = "500"
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = str(message["status"])
+            await send(message)
+
+        start = time.perf_counter()
+        http_requests_in_progress.inc()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            http_requests_in_progress.dec()
+            # The router fills in scope["route"]; streamed responses are timed to their last byte
+            http_request_duration.observe(
+                time.perf_counter() - start, scope["method"], route_template(scope), status
+            )
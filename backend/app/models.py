@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, Enum as SqlEnum, ForeignKey, JSON, Float, Boolean
+from sqlalchemy import Column, Integer, String, Text, Date, DateTime, Enum as SqlEnum, ForeignKey, JSON, Float, Boolean, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.ext.declarative import declarative_base
 from datetime import datetime
@@ -17,6 +17,11 @@ class User(Base):
     email = Column(String, unique=True, index=True, nullable=True)  # Google email
     google_sub = Column(String, unique=True, index=True, nullable=True)  # Google subject ID
     
+    # Delta sync (see task_sync.py): last version stamped on this user's tasks, and the
+    # highest version whose tombstones have been pruned (older cursors must resync)
+    task_version = Column(Integer, nullable=False, default=0, server_default="0")
+    task_sync_floor = Column(Integer, nullable=False, default=0, server_default="0")
+    
     jobs = relationship("Job", back_populates="user")
     tasks = relationship("Task", back_populates="user")
     preferences = relationship("UserPreferences", back_populates="user", uselist=False)
@@ -24,6 +29,12 @@ class User(Base):
 
 class Job(Base):
     __tablename__ = "jobs"
+    __table_args__ = (
+        # Serves the worker's claim query: WHERE status = 'QUEUED' ORDER BY queued_at
+        Index("ix_jobs_status_queued_at", "status", "queued_at"),
+        # Covers the admin dashboard's distinct job creators over the last 30 days
+        Index("ix_jobs_created_at_user_id", "created_at", "user_id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=True) # made nullable for migration ease/backward compat, but logically should be required later
@@ -32,6 +43,16 @@ class Job(Base):
     status = Column(SqlEnum(JobStatus), default=JobStatus.CREATED)
     created_at = Column(DateTime, default=datetime.utcnow)
     
+    # Last structured parse result and a hash of its inputs (text, local time, temperature,
+    # personal context, prompt version); an unchanged re-parse reuses it without the LLM
+    parse_result = Column(JSON, nullable=True)
+    parse_input_hash = Column(String(64), nullable=True)
+    
+    # Database parse queue (see worker.py): when the job was queued, and which worker claimed it when
+    queued_at = Column(DateTime, nullable=True)
+    claimed_by = Column(String, nullable=True)
+    claimed_at = Column(DateTime, nullable=True)
+    
     # Relationships
     user = relationship("User", back_populates="jobs")
     candidates = relationship("JobCandidate", back_populates="job", cascade="all, delete-orphan")
@@ -53,6 +74,14 @@ class JobCandidate(Base):
 
 class Task(Base):
     __tablename__ = "tasks"
+    __table_args__ = (
+        # Serves range-overlap conflict checks: WHERE user_id=? AND is_blocking AND start_time < ?
+        Index("ix_tasks_user_blocking_start", "user_id", "is_blocking", "start_time"),
+        # Serves the retention sweep across all users: WHERE start_time < cutoff
+        Index("ix_tasks_start_time", "start_time"),
+        # Serves delta sync: WHERE user_id=? AND version > ?
+        Index("ix_tasks_user_version", "user_id", "version"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=True)
@@ -64,9 +93,26 @@ class Task(Base):
     description = Column(Text, nullable=True)
     is_blocking = Column(Boolean, default=True)
     
+    # Stamped on every write from the owner's User.task_version counter
+    version = Column(Integer, nullable=False, default=0, server_default="0")
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
     user = relationship("User", back_populates="tasks")
     source_job = relationship("Job", back_populates="tasks")
 
+class TaskTombstone(Base):
+    """Records a deleted task so delta sync can tell clients to drop it."""
+    __tablename__ = "task_tombstones"
+    __table_args__ = (
+        Index("ix_task_tombstones_user_version", "user_id", "version"),
+    )
+    
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    task_id = Column(Integer, nullable=False)
+    version = Column(Integer, nullable=False)
+    deleted_at = Column(DateTime, default=datetime.utcnow, index=True)
+
 class UserPreferences(Base):
     __tablename__ = "user_preferences"
     
@@ -108,3 +154,61 @@ class TokenLog(Base):
     
     user = relationship("User", back_populates="token_logs")
 
+
+class TokenLogPartition(Base):
+    """A monthly token_logs partition (PostgreSQL) or rotated-out table (SQLite); see log_partitions.py."""
+    __tablename__ = "token_log_partitions"
+
+    name = Column(String, primary_key=True)
+    range_start = Column(DateTime, nullable=False)
+    range_end = Column(DateTime, nullable=True)  # NULL: the live token_logs table still receiving rows
+
+
+class UsageDailyRollup(Base):
+    """TokenLog totals per day, model, feature and user, kept current by usage_rollup.record_usage."""
+    __tablename__ = "usage_daily_rollup"
+
+    day = Column(Date, primary_key=True)
+    model = Column(String, primary_key=True)
+    feature = Column(String, primary_key=True)
+    user_id = Column(Integer, primary_key=True)  # 0 for anonymous usage
+    requests = Column(Integer, nullable=False, default=0)
+    prompt_tokens = Column(Integer, nullable=False, default=0)
+    completion_tokens = Column(Integer, nullable=False, default=0)
+    total_tokens = Column(Integer, nullable=False, default=0)
+    cost_usd = Column(Float, nullable=False, default=0.0)
+    latency_ms_sum = Column(Float, nullable=False, default=0.0)  # avg = latency_ms_sum / requests
+
+
+class UsageDailyHistogram(Base):
+    """Per-day latency / tokens-per-call histograms (latency_sketch buckets) per model and feature."""
+    __tablename__ = "usage_daily_histogram"
+
+    day = Column(Date, primary_key=True)
+    model = Column(String, primary_key=True)
+    feature = Column(String, primary_key=True)
+    metric = Column(String, primary_key=True)  # "latency_ms" or "tokens"
+    bucket = Column(Integer, primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
+
+
+class JobStatusCount(Base):
+    """Jobs per status for the admin funnel, kept current by job_stats."""
+    __tablename__ = "job_status_counts"
+
+    status = Column(String, primary_key=True)  # JobStatus name, as stored in jobs.status
+    jobs = Column(Integer, nullable=False, default=0)
+
+
+class ParseWorker(Base):
+    """A `python -m app.worker` process: liveness and throughput for queue metrics."""
+    __tablename__ = "parse_workers"
+
+    id = Column(String, primary_key=True)  # hostname:pid:suffix
+    hostname = Column(String, nullable=False)
+    pid = Column(Integer, nullable=False)
+    started_at = Column(DateTime, default=datetime.utcnow)
+    last_heartbeat = Column(DateTime, default=datetime.utcnow, index=True)
+    jobs_parsed = Column(Integer, nullable=False, default=0)
+    jobs_failed = Column(Integer, nullable=False, default=0)
+    busy_seconds = Column(Float, nullable=False, default=0.0)
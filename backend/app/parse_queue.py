@@ -0,0 +1,224 @@
+"""
+Background Parse Queue
+======================
+Runs job parses off the request path for `POST /jobs/{id}/parse?async=true`.
+
+The route marks the job PARSING and enqueues it, answering 202 at once. A
+fixed pool of PARSE_WORKERS asyncio workers in the API process drains the
+queue, so at most that many LLM calls are in flight per process. The job
+ends PARSED (or FAILED), observable by polling `GET /jobs/{id}` or by
+subscribing to `GET /jobs/{id}/events`, a Server-Sent Events stream that
+pushes each candidate and then the final status. The LLM completion is
+streamed (JobService.parse_job_streaming), so each candidate is pushed as
+soon as the model finishes writing its item rather than after the whole
+result; stats() reports time-to-first-candidate next to time-to-parsed. If
+the completion fails partway, a `discard` event names the candidates already
+pushed, which are deleted, before the error candidate follows.
+
+Queued work lives in memory: a job left PARSING by a restart is simply
+enqueued again the next time its parse is requested. Until then nothing will
+finish it, so the SSE stream refuses such a job (409) or, if it is
+abandoned mid-stream, closes with its current status. For a durable queue
+drained by separate processes, set PARSE_QUEUE_BACKEND=database (see
+app/worker.py); the SSE stream then watches the job row instead.
+"""
+
+import asyncio
+import json
+import logging
+import threading
+import time
+from collections import defaultdict, deque
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Optional, Set, Tuple
+
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from .config import settings
+from .database import SessionLocal
+from .schemas import JobCandidateRead, JobStatus
+
+logger = logging.getLogger(__name__)
+
+TERMINAL_STATUSES = (JobStatus.PARSED, JobStatus.ACCEPTED, JobStatus.FAILED)
+LATENCY_SAMPLES = 1000
+
+
+class JobEvents:
+    """Per-job fan-out of events to SSE subscribers. publish() is safe from any thread."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers: Dict[int, Set[asyncio.Queue]] = defaultdict(set)
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def subscribe(self, job_id: int) -> asyncio.Queue:
+        self._loop = asyncio.get_running_loop()
+        queue = asyncio.Queue()
+        with self._lock:
+            self._subscribers[job_id].add(queue)
+        return queue
+
+    def unsubscribe(self, job_id: int, queue: asyncio.Queue) -> None:
+        with self._lock:
+            self._subscribers[job_id].discard(queue)
+            if not self._subscribers[job_id]:
+                del self._subscribers[job_id]
+
+    def publish(self, job_id: int, event: str, data: dict) -> None:
+        with self._lock:
+            queues = list(self._subscribers.get(job_id, ()))
+        for queue in queues:
+            self._loop.call_soon_threadsafe(queue.put_nowait, (event, data))
+
+
+def format_sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def job_snapshot(job) -> Optional[Tuple[list, dict]]:
+    """(candidate payloads, final status event) for a job that is done parsing, else None."""
+    if job is None or job.status not in TERMINAL_STATUSES:
+        return None
+    return (
+        [JobCandidateRead.model_validate(c).model_dump(mode="json") for c in job.candidates],
+        {"status": job.status.value, "candidates_count": len(job.candidates)}
+    )
+
+
+class ParseQueue:
+    def __init__(self, concurrency: int, session_factory: Callable[[], Session] = SessionLocal):
+        self.concurrency = concurrency
+        self.session_factory = session_factory
+        self.events = JobEvents()
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers = []
+        self._pending: Set[int] = set()  # Queued or running in this process
+        self._enqueued_at: Dict[int, float] = {}
+        self.completed = 0
+        self.failed = 0
+        # Recent latencies from enqueue, in ms
+        self.first_candidate_ms = deque(maxlen=LATENCY_SAMPLES)
+        self.parsed_ms = deque(maxlen=LATENCY_SAMPLES)
+
+    @property
+    def running(self) -> bool:
+        return bool(self._workers)
+
+    def start(self) -> None:
+        """Start the workers on the running event loop."""
+        self._queue = asyncio.Queue()
+        self._workers = [asyncio.create_task(self._worker()) for _ in range(self.concurrency)]
+
+    async def stop(self) -> None:
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    def enqueue(self, job_id: int, user_id: int) -> bool:
+        """Queue a parse unless this process already has it queued. Returns whether it was queued."""
+        if not self.running:
+            raise RuntimeError("Parse queue is not running")
+        if job_id in self._pending:
+            return False
+        self._pending.add(job_id)
+        self._enqueued_at[job_id] = time.perf_counter()
+        self._queue.put_nowait((job_id, user_id))
+        return True
+
+    async def _worker(self) -> None:
+        while True:
+            job_id, user_id = await self._queue.get()
+            try:
+                await self._run(job_id, user_id)
+            finally:
+                self._pending.discard(job_id)
+                self._enqueued_at.pop(job_id, None)
+                self._queue.task_done()
+
+    async def _run(self, job_id: int, user_id: int) -> None:
+        from .services import JobService
+
+        enqueued_at = self._enqueued_at.get(job_id, time.perf_counter())
+        first = True
+
+        async def on_candidate(candidate: dict):
+            nonlocal first
+            if first:
+                first = False
+                self.first_candidate_ms.append((time.perf_counter() - enqueued_at) * 1000)
+            self.events.publish(job_id, "candidate", candidate)
+
+        async def on_discard(candidate_ids: list):
+            self.events.publish(job_id, "discard", {"candidate_ids": candidate_ids})
+
+        db = self.session_factory()
+        try:
+            service = JobService(db)
+            try:
+                count = await service.parse_job_streaming(job_id, user_id, on_candidate, on_discard)
+            except Exception as e:
+                logger.error(f"Background parse of job {job_id} failed: {e}", exc_info=True)
+                discarded = await run_in_threadpool(service.fail_parse, job_id, user_id)
+                if discarded:
+                    await on_discard(discarded)
+                self.failed += 1
+                self.events.publish(job_id, "status", {"status": JobStatus.FAILED.value, "error": str(e)})
+                return
+
+            self.completed += 1
+            self.parsed_ms.append((time.perf_counter() - enqueued_at) * 1000)
+            self.events.publish(job_id, "status", {"status": JobStatus.PARSED.value, "candidates_count": count})
+        finally:
+            db.close()
+
+    def in_flight(self, job) -> bool:
+        """Whether the job's parse is queued or running, so a final status event will follow."""
+        if job.status == JobStatus.QUEUED:
+            return True
+        if job.status != JobStatus.PARSING:
+            return False
+        if settings.PARSE_QUEUE_BACKEND == "database" or job.id in self._pending:
+            return True  # Parse workers requeue the claims of workers that died
+        # Maybe in another API process's queue; one that restarted never finishes it
+        started = job.claimed_at
+        return started is not None and datetime.utcnow() - started < timedelta(seconds=settings.PARSE_CLAIM_TIMEOUT_SECONDS)
+
+    def final_events(self, job_id: int, user_id: int) -> Optional[Tuple[list, dict]]:
+        """
+        Read the job in a fresh session, for parses finished (or abandoned) out of sight of this
+        process's events: its snapshot once done, a bare status event when nothing will finish
+        it anymore, else None.
+        """
+        from .services import JobService
+
+        with self.session_factory() as db:
+            job = JobService(db).get_job_details(job_id, user_id)
+            snapshot = job_snapshot(job)
+            if snapshot is None and job is not None and not self.in_flight(job):
+                return [], {"status": job.status.value}
+            return snapshot
+
+    def stats(self) -> dict:
+        return {
+            "workers": len(self._workers),
+            "queued": self._queue.qsize() if self._queue else 0,
+            "pending": len(self._pending),
+            "completed": self.completed,
+            "failed": self.failed,
+            "time_to_first_candidate_ms": _latency_summary(self.first_candidate_ms),
+            "time_to_parsed_ms": _latency_summary(self.parsed_ms)
+        }
+
+
+def _latency_summary(samples) -> dict:
+    ordered = sorted(samples)
+    if not ordered:
+        return {"count": 0, "p50": None, "p95": None, "max": None}
+    pick = lambda q: round(ordered[min(int(q * len(ordered)), len(ordered) - 1)], 1)
+    return {"count": len(ordered), "p50": pick(0.5), "p95": pick(0.95), "max": round(ordered[-1], 1)}
+
+
+parse_queue = ParseQueue(settings.PARSE_WORKERS)
@@ -5,6 +5,9 @@ Rate Limiting & Caching Module
 Provides:
 1. Rate limiting for API endpoints (slowapi)
 2. LLM response caching for OpenAI cost optimization
+3. Single-flight coalescing of identical in-flight LLM calls
+
+Caches are stored in the backend chosen by CACHE_BACKEND (see cache_backends.py).
 
 Rate Limits:
 - Auth endpoints: 10/minute per IP
@@ -18,12 +21,17 @@ from slowapi.errors import RateLimitExceeded
 from slowapi.middleware import SlowAPIMiddleware
 from fastapi import Request
 from fastapi.responses import JSONResponse
-from cachetools import TTLCache
 import hashlib
 import json
 from typing import Optional
 import logging
 
+from .cache_backends import make_cache_backend
+from .config import settings
+from .metrics import rate_limited, route_template
+from .single_flight import SingleFlight
+from .template_cache import get_template_stats
+
 logger = logging.getLogger(__name__)
 
 # =============================================================================
@@ -44,6 +52,7 @@ limiter = Limiter(key_func=get_user_id)
 # Rate limit exception handler
 def rate_limit_exceeded_handler(request: Request, exc: RateLimitExceeded):
     logger.warning(f"Rate limit exceeded for {get_user_id(request)}: {exc.detail}")
+    rate_limited.inc(route_template(request.scope))
     return JSONResponse(
         status_code=429,
         content={
@@ -57,10 +66,13 @@ def rate_limit_exceeded_handler(request: Request, exc: RateLimitExceeded):
 # =============================================================================
 
 # Cache configuration
-# - Max 1000 entries
+# - Max 1000 entries and LLM_CACHE_MAX_BYTES of compressed payload
 # - TTL of 1 hour (3600 seconds)
 # Similar inputs will return cached LLM responses
-llm_cache = TTLCache(maxsize=1000, ttl=3600)
+llm_cache = make_cache_backend("llm", maxsize=1000, ttl=3600, max_bytes=settings.LLM_CACHE_MAX_BYTES)
+
+# Identical parses already in flight are awaited rather than repeated (keyed by get_cache_key)
+llm_flight = SingleFlight()
 
 def get_cache_key(text: str, user_local_time: Optional[str] = None) -> str:
     """
@@ -95,15 +107,16 @@ def get_cached_response(text: str, user_local_time: Optional[str] = None) -> Opt
 def cache_response(text: str, user_local_time: Optional[str], response: dict) -> None:
     """Cache an LLM response for future use."""
     key = get_cache_key(text, user_local_time)
-    llm_cache[key] = response
+    llm_cache.set(key, response)
     logger.info(f"LLM Cache STORE for key {key[:8]}... (cache size: {len(llm_cache)})")
 
 def get_cache_stats() -> dict:
-    """Return cache statistics."""
+    """Return cache statistics. Top-level keys describe the LLM cache; hit counters are per worker."""
     return {
-        "current_size": len(llm_cache),
-        "max_size": llm_cache.maxsize,
-        "ttl_seconds": llm_cache.ttl
+        **llm_cache.stats(),
+        "single_flight": llm_flight.stats(),
+        "template": get_template_stats(),
+        "transcription": transcription_cache.stats()
     }
 
 # =============================================================================
@@ -112,7 +125,9 @@ def get_cache_stats() -> dict:
 
 # Smaller cache for transcriptions (audio files are larger)
 # Cache by audio file hash
-transcription_cache = TTLCache(maxsize=100, ttl=1800)  # 30 min TTL
+transcription_cache = make_cache_backend(
+    "transcription", maxsize=100, ttl=1800, max_bytes=settings.TRANSCRIPTION_CACHE_MAX_BYTES
+)  # 30 min TTL
 
 def get_audio_cache_key(audio_bytes: bytes) -> str:
     """Generate cache key from audio file content."""
@@ -129,5 +144,5 @@ def get_cached_transcription(audio_bytes: bytes) -> Optional[str]:
 def cache_transcription(audio_bytes: bytes, text: str) -> None:
     """Cache a transcription result."""
     key = get_audio_cache_key(audio_bytes)
-    transcription_cache[key] = text
+    transcription_cache.set(key, text)
     logger.info(f"Transcription Cache STORE for key {key[:8]}...")
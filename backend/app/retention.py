@@ -0,0 +1,135 @@
+"""
+Task Retention
+==============
+Deletes expired tasks for all users in bulk, off the request path.
+
+The calendar only shows the last TASK_RETENTION_DAYS days, so older tasks are
+removed by a sweeper instead of on every GET /tasks. Deletes leave delta-sync
+tombstones, which are themselves pruned after TOMBSTONE_RETENTION_DAYS.
+The same sweep rotates token_logs partitions and drops expired ones (see
+log_partitions). The sweep runs:
+- In the API process, a periodic asyncio task (every
+  RETENTION_SWEEP_INTERVAL_SECONDS; 0 disables it)
+- From cron or by hand: `python -m app.retention [--days N] [--dry-run]`
+
+Deletes run in batches of primary keys so each transaction holds its row
+locks only briefly.
+"""
+
+import argparse
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import delete, select
+from sqlalchemy.orm import Session
+
+from .config import settings
+from .database import SessionLocal
+from .log_partitions import maintain_partitions
+from .models import Task
+from .task_sync import record_bulk_deletes, prune_tombstones
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZE = 1000
+
+
+def retention_cutoff(retention_days: Optional[int] = None, now: Optional[datetime] = None) -> datetime:
+    """Tasks starting before this (naive UTC) instant are expired."""
+    if retention_days is None:
+        retention_days = settings.TASK_RETENTION_DAYS
+    return (now or datetime.utcnow()) - timedelta(days=retention_days)
+
+
+def count_expired_tasks(db: Session, cutoff: datetime) -> int:
+    return db.query(Task).filter(Task.start_time < cutoff).count()
+
+
+def sweep_expired_tasks(db: Session, cutoff: Optional[datetime] = None, batch_size: int = DEFAULT_BATCH_SIZE) -> int:
+    """Delete every task (any user) starting before cutoff, committing per batch. Returns the number deleted."""
+    if cutoff is None:
+        cutoff = retention_cutoff()
+
+    total = 0
+    while True:
+        rows = db.execute(
+            select(Task.id, Task.user_id).where(Task.start_time < cutoff).order_by(Task.start_time).limit(batch_size)
+        ).all()
+        if not rows:
+            break
+        record_bulk_deletes(db, rows)
+        db.execute(delete(Task).where(Task.id.in_([task_id for task_id, _ in rows])))
+        db.commit()
+        total += len(rows)
+        if len(rows) < batch_size:
+            break
+    return total
+
+
+def run_sweep(retention_days: Optional[int] = None) -> int:
+    """One sweep in its own session."""
+    db = SessionLocal()
+    try:
+        deleted = sweep_expired_tasks(db, retention_cutoff(retention_days))
+        pruned = prune_tombstones(db, retention_cutoff(settings.TOMBSTONE_RETENTION_DAYS))
+        db.commit()
+        if deleted or pruned:
+            logger.info(f"Retention sweep deleted {deleted} expired tasks and {pruned} tombstones")
+        return deleted
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Retention sweep failed: {e}", exc_info=True)
+        return 0
+    finally:
+        db.close()
+
+
+def run_partition_maintenance() -> None:
+    """Token log partition upkeep in its own session; a failure here doesn't affect the task sweep."""
+    db = SessionLocal()
+    try:
+        maintain_partitions(db)
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Token log partition maintenance failed: {e}", exc_info=True)
+    finally:
+        db.close()
+
+
+async def retention_loop(interval_seconds: int) -> None:
+    """Sweep every interval_seconds until cancelled. The blocking DB work runs in a worker thread."""
+    while True:
+        await asyncio.sleep(interval_seconds)
+        await asyncio.to_thread(run_sweep)
+        await asyncio.to_thread(run_partition_maintenance)
+
+
+def start_retention_sweeper() -> Optional[asyncio.Task]:
+    """Schedule the periodic sweep on the running event loop (None if disabled)."""
+    interval = settings.RETENTION_SWEEP_INTERVAL_SECONDS
+    if interval <= 0:
+        return None
+    return asyncio.create_task(retention_loop(interval))
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Delete expired tasks for all users.")
+    parser.add_argument("--days", type=int, default=settings.TASK_RETENTION_DAYS, help="Keep tasks that started within this many days")
+    parser.add_argument("--dry-run", action="store_true", help="Only count the tasks that would be deleted")
+    args = parser.parse_args(argv)
+
+    cutoff = retention_cutoff(args.days)
+    db = SessionLocal()
+    try:
+        if args.dry_run:
+            print(f"{count_expired_tasks(db, cutoff)} tasks start before {cutoff.isoformat()}Z")
+        else:
+            print(f"Deleted {sweep_expired_tasks(db, cutoff)} tasks starting before {cutoff.isoformat()}Z")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
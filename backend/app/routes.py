@@ -1,4 +1,7 @@
-from fastapi import APIRouter, Depends, HTTPException, Header, UploadFile, File, Request, status
+from fastapi import APIRouter, Depends, HTTPException, Header, UploadFile, File, Request, Query, status
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, StreamingResponse
+from starlette.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from datetime import datetime
@@ -9,6 +12,9 @@ from .rate_limit import limiter
 from .jwt_utils import create_access_token, create_refresh_token, verify_token
 from .auth_dependencies import get_current_user
 from .models import User
+from .parse_queue import parse_queue, format_sse, job_snapshot
+from .config import settings
+import asyncio
 import shutil
 import os
 import tempfile
@@ -122,7 +128,7 @@ async def transcribe_audio(request: Request, file: UploadFile = File(...), db: S
     
     try:
         service = services.JobService(db)
-        text = service.llm.transcribe_audio(temp_path)
+        text = await service.llm.transcribe_audio_async(temp_path)
         return {"text": text}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -138,17 +144,94 @@ def create_job(job: schemas.JobCreate, db: Session = Depends(get_db), current_us
 
 @router.post("/jobs/{job_id}/parse", response_model=dict)
 @limiter.limit("20/minute")
-def parse_job(request: Request, job_id: int, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+async def parse_job(
+    request: Request,
+    job_id: int,
+    background: bool = Query(False, alias="async", description="Queue the parse and answer 202 at once"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    # Async so the LLM round trip does not hold a threadpool slot; DB steps still run in the pool
     service = services.JobService(db)
     try:
-        count = service.parse_job(job_id, current_user.id)
+        if background:
+            # Progress: poll GET /jobs/{id} or stream GET /jobs/{id}/events
+            queued = settings.PARSE_QUEUE_BACKEND == "database"
+            if not queued and not parse_queue.running:
+                # Checked before the job is marked PARSING, which nothing would then finish
+                raise HTTPException(status_code=503, detail="Background parsing is not available")
+            job = await run_in_threadpool(service.start_background_parse, job_id, current_user.id, queued)
+            if not queued:
+                parse_queue.enqueue(job_id, current_user.id)
+            return JSONResponse(status_code=status.HTTP_202_ACCEPTED, content=jsonable_encoder(schemas.JobRead.model_validate(job)))
+        count = await service.parse_job_async(job_id, current_user.id)
         return {"candidates_count": count}
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
 
+SSE_POLL_SECONDS = 3
+SSE_KEEPALIVE_SECONDS = 15
+
+@router.get("/jobs/{job_id}/events")
+async def job_events(request: Request, job_id: int, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+    """
+    Server-Sent Events: `candidate` per parsed candidate, `discard` with the ids of candidates
+    to drop if the completion fails partway, then a final `status` event.
+    """
+    service = services.JobService(db)
+    # Subscribe before reading the status so a parse finishing in between isn't missed
+    events = parse_queue.events.subscribe(job_id)
+    job = await run_in_threadpool(service.get_job_details, job_id, current_user.id)
+    if not job:
+        parse_queue.events.unsubscribe(job_id, events)
+        raise HTTPException(status_code=404, detail="Job not found")
+    snapshot = job_snapshot(job)
+    if snapshot is None and not parse_queue.in_flight(job):
+        parse_queue.events.unsubscribe(job_id, events)
+        raise HTTPException(status_code=409, detail=f"Job is {job.status.value}, not being parsed; request a parse first")
+
+    async def replay(snapshot):
+        for candidate in snapshot[0]:
+            yield format_sse("candidate", candidate)
+        yield format_sse("status", snapshot[1])
+
+    async def stream():
+        try:
+            if snapshot:
+                async for chunk in replay(snapshot):
+                    yield chunk
+                return
+            yield format_sse("status", {"status": job.status.value})
+            idle = 0
+            while not await request.is_disconnected():
+                try:
+                    event, data = await asyncio.wait_for(events.get(), timeout=SSE_POLL_SECONDS)
+                except asyncio.TimeoutError:
+                    # Out-of-process workers can't publish here, so also watch the job row
+                    finished = await run_in_threadpool(parse_queue.final_events, job_id, current_user.id)
+                    if finished:
+                        async for chunk in replay(finished):
+                            yield chunk
+                        return
+                    idle += SSE_POLL_SECONDS
+                    if idle >= SSE_KEEPALIVE_SECONDS:
+                        idle = 0
+                        yield ": keep-alive\n\n"
+                    continue
+                yield format_sse(event, data)
+                if event == "status":
+                    return
+        finally:
+            parse_queue.events.unsubscribe(job_id, events)
+
+    return StreamingResponse(stream(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
 @router.get("/jobs/{job_id}", response_model=schemas.JobWithCandidates)
-def get_job(job_id: int, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+def get_job(job_id: int, include_suggestions: bool = False, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
     service = services.JobService(db)
+    if include_suggestions:
+        # Conflict suggestions are deferred at parse time; resolve them all now
+        service.resolve_job_suggestions(job_id, current_user.id)
     job = service.get_job_details(job_id, current_user.id)
     if not job:
         raise HTTPException(status_code=404, detail="Job not found")
@@ -194,6 +277,16 @@ def update_candidate(candidate_id: int, candidate_update: schemas.JobCandidateUp
                 raise HTTPException(status_code=409, detail=detail_str)
         raise HTTPException(status_code=404, detail=str(e))
 
+@router.get("/candidates/{candidate_id}/suggestion", response_model=schemas.CandidateSuggestion)
+def get_candidate_suggestion(candidate_id: int, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+    """Compute (once) the "Suggested time" option for a conflict candidate."""
+    service = services.JobService(db)
+    try:
+        option = service.get_candidate_suggestion(candidate_id, current_user.id)
+        return {"candidate_id": candidate_id, "option": option}
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
 @router.delete("/candidates/{candidate_id}", status_code=204)
 def delete_candidate(candidate_id: int, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
     service = services.JobService(db)
@@ -203,10 +296,52 @@ def delete_candidate(candidate_id: int, db: Session = Depends(get_db), current_u
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
 
-@router.get("/tasks", response_model=List[schemas.TaskRead])
-def get_tasks(start: Optional[datetime] = None, end: Optional[datetime] = None, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+@router.get("/tasks", response_model=List[schemas.TaskProjection])
+def get_tasks(
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    limit: Optional[int] = Query(None, ge=1, le=1000, description="Page size; omit for every matching task"),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor value from the previous page"),
+    fields: Optional[str] = Query(None, description="Comma-separated subset of task fields; id is always included"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Tasks ordered by start time. When a page is full, the X-Next-Cursor header points to the next one."""
     service = services.JobService(db)
-    return service.get_tasks(start, end, current_user.id)
+    field_list = [f.strip() for f in fields.split(",") if f.strip()] if fields else None
+    try:
+        rows, next_cursor = service.get_tasks_page(start, end, current_user.id, limit=limit, cursor=cursor, fields=field_list)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    # Rows are already plain dicts of the requested columns; skip response_model validation
+    headers = {"X-Next-Cursor": next_cursor} if next_cursor else None
+    return JSONResponse(content=jsonable_encoder(rows), headers=headers)
+
+@router.get("/tasks/changes", response_model=schemas.TaskChanges)
+def get_task_changes(
+    since: Optional[str] = Query(None, description="Cursor from the previous sync; omit for a full snapshot"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Delta sync: tasks created/updated and ids deleted since `since`."""
+    service = services.JobService(db)
+    try:
+        return service.get_task_changes(current_user.id, since)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/slots", response_model=List[schemas.SlotSuggestion])
+def get_slots(
+    near: Optional[datetime] = None,
+    duration: Optional[int] = Query(None, ge=5, le=24 * 60, description="Event length in minutes; defaults to the user's preference"),
+    k: int = Query(3, ge=1, le=20),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Return the k best free slots near `near` (default: now), best first."""
+    service = services.JobService(db)
+    return service.suggest_slots(current_user.id, near or datetime.utcnow(), duration, k)
 
 @router.patch("/tasks/{task_id}", response_model=schemas.TaskRead)
 def update_task(task_id: int, task_update: schemas.TaskUpdate, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
@@ -298,85 +433,49 @@ def update_preferences(
 
 @router.get("/admin/stats")
 def get_admin_stats(
+    percentile_days: int = Query(7, ge=1, le=365, description="Window for latency and tokens-per-call percentiles"),
     db: Session = Depends(get_db)
 ):
     """
     Returns aggregated analytics for the admin dashboard.
+    Usage figures come from usage_daily_rollup, never from the raw token_logs.
     """
     from sqlalchemy import func, distinct
     from datetime import timedelta
-    from .models import TokenLog, Job, User, Task
+    from .models import Job
+    from .job_stats import job_status_counts
+    from .usage_rollup import usage_summary, usage_percentiles
     
-    # 1. Total Cost & Requests
-    total_stats = db.query(
-        func.sum(TokenLog.cost_usd).label("total_cost"),
-        func.count(TokenLog.id).label("total_requests"),
-        func.avg(TokenLog.latency_ms).label("avg_latency")
-    ).first()
+    # 1. Cost, requests, latency, model usage and daily stats (last 14 days),
+    #    and users with AI usage in the last 30 days
+    usage = usage_summary(db, daily_days=14, active_days=30)
     
-    total_cost = total_stats.total_cost or 0.0
-    total_requests = total_stats.total_requests or 0
-    avg_latency = total_stats.avg_latency or 0.0
-    
-    # 2. Active Users (Users who created a job in last 30 days)
+    # 2. Active Users (Users who created a job in last 30 days), from ix_jobs_created_at_user_id
     thirty_days_ago = datetime.utcnow() - timedelta(days=30)
     active_users = db.query(func.count(distinct(Job.user_id))).filter(
         Job.created_at >= thirty_days_ago
     ).scalar() or 0
     
     # 3. Job Conversion Funnel
-    # Count jobs by status
-    job_counts = db.query(
-        Job.status, func.count(Job.id)
-    ).group_by(Job.status).all()
-    
-    job_stats = {status.name: count for status, count in job_counts}
+    # Jobs by status, from the job_status_counts rollup
+    job_stats = job_status_counts(db)
     total_jobs = sum(job_stats.values())
     accepted_jobs = job_stats.get("ACCEPTED", 0)
     conversion_rate = (accepted_jobs / total_jobs * 100) if total_jobs > 0 else 0.0
     
-    # 4. Model Usage (Cost by Model)
-    model_stats = db.query(
-        TokenLog.model,
-        func.sum(TokenLog.cost_usd).label("cost"),
-        func.count(TokenLog.id).label("calls")
-    ).group_by(TokenLog.model).all()
-    
-    model_usage = [
-        {"model": m[0], "cost": round(m[1] or 0, 4), "calls": m[2]} 
-        for m in model_stats
-    ]
-    
-    # 5. Daily Stats (Last 14 days)
-    daily_stats_query = db.query(
-        func.date(TokenLog.timestamp).label("date"),
-        func.sum(TokenLog.cost_usd).label("total_cost"),
-        func.count(TokenLog.id).label("total_requests")
-    ).filter(
-        TokenLog.timestamp >= datetime.utcnow() - timedelta(days=14)
-    ).group_by(
-        func.date(TokenLog.timestamp)
-    ).order_by(
-        func.date(TokenLog.timestamp).desc()
-    ).all()
-    
     return {
         "overview": {
-            "total_cost_usd": round(total_cost, 4),
-            "total_requests": total_requests,
-            "avg_latency_ms": round(avg_latency, 0),
+            "total_cost_usd": round(usage["total_cost_usd"], 4),
+            "total_requests": usage["total_requests"],
+            "avg_latency_ms": round(usage["avg_latency_ms"], 0),
             "active_users_30d": active_users,
+            "ai_active_users_30d": usage["active_users"],
             "conversion_rate": round(conversion_rate, 1),
             "total_jobs": total_jobs
         },
         "job_status_distribution": job_stats,
-        "model_usage": model_usage,
-        "daily_stats": [
-            {
-                "date": str(stat.date),
-                "total_cost": round(stat.total_cost or 0, 4),
-                "total_requests": stat.total_requests or 0
-            }
-            for stat in daily_stats_query
-        ]
+        "model_usage": usage["model_usage"],
+        "daily_stats": usage["daily_stats"],
+        # p50/p90/p99 from the daily histograms, overall and per model and feature
+        "latency_percentiles": usage_percentiles(db, days=percentile_days)
     }
@@ -13,6 +13,8 @@ def sanitize_string(v: Any) -> Any:
 
 class JobStatus(str, Enum):
     CREATED = "created"
+    QUEUED = "queued"    # Waiting for an out-of-process parse worker (see worker.py)
+    PARSING = "parsing"  # Being parsed in the background
     PARSED = "parsed"
     ACCEPTED = "accepted"
     FAILED = "failed"
@@ -57,6 +59,10 @@ class JobCandidateUpdate(BaseModel):
             return {k: sanitize_string(val) if isinstance(val, str) else val for k, val in v.items()}
         return v
 
+class CandidateSuggestion(BaseModel):
+    candidate_id: int
+    option: Optional[Dict[str, Any]] = None  # Same shape as a conflict option; None if no free slot
+
 class JobRead(BaseModel):
     id: int
     status: JobStatus
@@ -80,10 +86,34 @@ class TaskRead(BaseModel):
     end_time: Optional[datetime] = None
     description: Optional[str] = None
     is_blocking: bool = True
+    version: int = 0
+    updated_at: Optional[datetime] = None
     
     class Config:
         from_attributes = True
 
+class TaskProjection(BaseModel):
+    """A GET /tasks row: id plus the fields asked for with `fields=` (all of TaskRead's by default)."""
+    id: int
+    title: Optional[str] = None
+    start_time: Optional[datetime] = None
+    end_time: Optional[datetime] = None
+    description: Optional[str] = None
+    is_blocking: Optional[bool] = None
+    version: Optional[int] = None
+    updated_at: Optional[datetime] = None
+
+class TaskChanges(BaseModel):
+    changes: List[TaskRead]  # Created or updated since the cursor
+    deleted: List[int]       # Task ids deleted since the cursor
+    cursor: str              # Pass as `since` on the next sync
+    reset: bool = False      # Full snapshot: replace local state instead of merging
+
+class SlotSuggestion(BaseModel):
+    start_time: datetime
+    end_time: datetime
+    score: float  # Lower is better (minutes from the requested time plus penalties)
+
 class TaskUpdate(BaseModel):
     title: Optional[str] = None
     start_time: Optional[datetime] = None
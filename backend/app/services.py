@@ -1,10 +1,17 @@
+from sqlalchemy import and_, or_, event, select
 from sqlalchemy.orm import Session
-from .models import Job, JobCandidate, Task, JobStatus, User
+from starlette.concurrency import run_in_threadpool
+from .models import Job, JobCandidate, Task, TaskTombstone, JobStatus, User, UserPreferences
 from .schemas import JobCreate, JobCandidateRead, JobCandidateUpdate, TaskUpdate
 from .config import settings
 import json
+import base64
+import copy
+import hashlib
+import itertools
+import logging
 from datetime import datetime, timezone, timedelta
-from typing import List, Optional
+from typing import Awaitable, Callable, List, Optional, Tuple
 
 # =============================================================================
 # TIMEZONE STRATEGY (Momentra Backend)
@@ -22,16 +29,62 @@ from typing import List, Optional
 # =============================================================================
 
 
-from .llm_adapter import LLMAdapter
+from .llm_adapter import LLMAdapter, PROMPT_VERSION
+from .interval_index import IntervalIndex, effective_range, sweep_overlaps, DEFAULT_DURATION
+from .slot_search import SlotSearch
 
 from passlib.context import CryptContext
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+logger = logging.getLogger(__name__)
+
+# Columns GET /tasks may project with `fields=` (same as schemas.TaskRead); id is always returned
+TASK_FIELDS = ("id", "title", "start_time", "end_time", "description", "is_blocking", "version", "updated_at")
+
+_SESSION_CACHE_KEY = "job_service_cache"
+
+
+def _session_cache(db: Session) -> dict:
+    """Preferences and calendar windows cached on the session until its transaction ends, shared by every JobService using it."""
+    return db.info.setdefault(_SESSION_CACHE_KEY, {
+        "prefs": {},     # user_id -> preferences
+        "calendar": {}   # user_id -> (window_start, window_end, IntervalIndex of Tasks)
+    })
+
+
+@event.listens_for(Session, "after_flush")
+def _invalidate_on_flush(session, flush_context):
+    """Drop cached state for any user whose tasks or preferences were just written."""
+    cache = session.info.get(_SESSION_CACHE_KEY)
+    if not cache:
+        return
+    for obj in itertools.chain(session.new, session.dirty, session.deleted):
+        if isinstance(obj, Task):
+            cache["calendar"].pop(obj.user_id, None)
+        elif isinstance(obj, UserPreferences):
+            cache["prefs"].pop(obj.user_id, None)
+
+
+@event.listens_for(Session, "after_commit")
+@event.listens_for(Session, "after_rollback")
+def _invalidate_all(session):
+    """Forget everything when the transaction ends: later reads may see other sessions' writes."""
+    cache = session.info.get(_SESSION_CACHE_KEY)
+    if cache:
+        cache["prefs"].clear()
+        cache["calendar"].clear()
+
+
 class JobService:
     def __init__(self, db: Session):
         self.db = db
         self.llm = LLMAdapter()
+        # Request-scoped unit of work: the session lives for one request, so preferences and
+        # the calendar window are loaded once and served from memory until a write touches them
+        cache = _session_cache(db)
+        self._prefs_cache = cache["prefs"]
+        self._calendar = cache["calendar"]
 
     def get_or_create_user(self, username: str) -> User:
         # Legacy method for dev/testing or non-pw flow
@@ -142,10 +195,12 @@ class JobService:
         return any(kw in t for kw in background_keywords)
 
     def _get_preferences(self, user_id: int):
-        from .models import UserPreferences
+        """User preferences (model, or a dict of defaults), queried at most once per request."""
+        if user_id in self._prefs_cache:
+            return self._prefs_cache[user_id]
         prefs = self.db.query(UserPreferences).filter(UserPreferences.user_id == user_id).first()
         if not prefs:
-            return {
+            prefs = {
                 "buffer_minutes": 15,
                 "work_start_hour": 8,
                 "work_end_hour": 22,
@@ -153,9 +208,167 @@ class JobService:
                 "ai_temperature": 0.0,
                 "personal_context": None
             }
+        self._prefs_cache[user_id] = prefs
         return prefs
 
     def parse_job(self, job_id: int, user_id: int) -> int:
+        llm_args, result = self._begin_parse(job_id, user_id)
+        if result is None:
+            # Parse text using the new adapter structure with user's timezone context AND preferences
+            result = self.llm.parse_text(**llm_args)
+        return self._store_parse_result(job_id, user_id, result, llm_args)
+
+    async def parse_job_async(self, job_id: int, user_id: int) -> int:
+        """
+        parse_job for async routes: the LLM call is awaited on the event loop, and only
+        the DB work before and after it runs in the threadpool.
+        """
+        llm_args, result = await run_in_threadpool(self._begin_parse, job_id, user_id)
+        if result is None:
+            result = await self.llm.parse_text_async(**llm_args)
+        return await run_in_threadpool(self._store_parse_result, job_id, user_id, result, llm_args)
+
+    async def parse_job_streaming(
+        self,
+        job_id: int,
+        user_id: int,
+        on_candidate: Callable[[dict], Awaitable[None]],
+        on_discard: Optional[Callable[[List[int]], Awaitable[None]]] = None
+    ) -> int:
+        """
+        parse_job_async that builds each candidate as soon as the model finishes writing its
+        task, command or ambiguity: the candidate is conflict-checked, committed, and handed to
+        on_candidate (as a JobCandidateRead dict) while the rest of the completion streams in.
+        If the stream fails partway, the candidates already handed out are deleted and their
+        ids passed to on_discard before the error candidate follows.
+        """
+        stream = await run_in_threadpool(self._start_streamed_parse, job_id, user_id)
+
+        async def add(kind: str, item: dict):
+            await on_candidate(await run_in_threadpool(self._add_streamed_item, stream, kind, item))
+
+        result = stream["stored"]
+        if result is None:
+            result = await self.llm.parse_text_stream(on_item=add, **stream["llm_args"])
+        if self._failed_parse(result) and stream["candidate_ids"]:
+            # The error fallback replaces the streamed document instead of continuing it
+            discarded = await run_in_threadpool(self._discard_streamed_items, stream)
+            if on_discard:
+                await on_discard(discarded)
+        # Whatever was not streamed: stored, cached or local results, or the error fallback
+        for kind, key in (("task", "tasks"), ("command", "commands"), ("ambiguity", "ambiguities")):
+            for item in result.get(key, [])[stream["counts"][kind]:]:
+                await add(kind, item)
+        return await run_in_threadpool(self._finish_streamed_parse, stream, result)
+
+    def _start_streamed_parse(self, job_id: int, user_id: int) -> dict:
+        """
+        Threadpool step before the stream: clears the job's candidates and checks for a stored
+        result. Every step ends its transaction, so no connection is held between items.
+        """
+        job, llm_args = self._prepare_parse(job_id, user_id)
+        stored = self._stored_parse_result(job, llm_args)
+        prefs = self._get_preferences(user_id)
+        self.db.query(JobCandidate).filter(JobCandidate.job_id == job_id).delete()
+        self.db.commit()
+        return {
+            "job_id": job_id,
+            "llm_args": llm_args,
+            "stored": stored,
+            "prefs": prefs,
+            "counts": {"task": 0, "command": 0, "ambiguity": 0},
+            "candidate_ids": [],
+            "ranges": {},            # Task position -> effective range, for timed tasks
+            "accepted_blocking": {}  # As in _store_parse_result
+        }
+
+    def _add_streamed_item(self, stream: dict, kind: str, item: dict) -> dict:
+        """Build, commit and serialize the candidate for one streamed item."""
+        job = self.db.get(Job, stream["job_id"])
+        if kind == "task":
+            pos = stream["counts"]["task"]
+            task_range = self._task_range(item, stream["prefs"])
+            rng = effective_range(*task_range)
+            # The batch path's single sweep, one task at a time: the calendar, then earlier tasks
+            overlapping = []
+            if rng:
+                overlapping = [p for p, (s, e) in stream["ranges"].items() if s < rng[1] and rng[0] < e]
+                stream["ranges"][pos] = rng
+            candidate = self._task_candidate(
+                job, pos, item, task_range,
+                db_conflict=self._find_conflict(job.user_id, *task_range),
+                overlapping_positions=overlapping,
+                accepted_blocking=stream["accepted_blocking"]
+            )
+        elif kind == "command":
+            candidate = self._command_candidate(job, item)
+        else:
+            candidate = self._ambiguity_candidate(job, item)
+        stream["counts"][kind] += 1
+
+        self.db.add(candidate)
+        self.db.flush()
+        stream["candidate_ids"].append(candidate.id)
+        # Serialized before the commit, which would expire it and reopen a transaction on access
+        payload = JobCandidateRead.model_validate(candidate).model_dump(mode="json")
+        self.db.commit()
+        return payload
+
+    def _discard_streamed_items(self, stream: dict) -> List[int]:
+        """Delete the candidates streamed so far and start the stream's bookkeeping over."""
+        discarded = stream["candidate_ids"]
+        self.db.query(JobCandidate).filter(JobCandidate.id.in_(discarded)).delete(synchronize_session=False)
+        self.db.commit()
+        stream.update(
+            counts=dict.fromkeys(stream["counts"], 0), candidate_ids=[], ranges={}, accepted_blocking={}
+        )
+        return discarded
+
+    def _finish_streamed_parse(self, stream: dict, result: dict) -> int:
+        job = self.db.get(Job, stream["job_id"])
+        self._remember_parse_result(job, result, stream["llm_args"])
+        job.status = JobStatus.PARSED
+        self.db.commit()
+        return sum(stream["counts"].values())
+
+    def start_background_parse(self, job_id: int, user_id: int, queued: bool = False) -> Job:
+        """
+        Mark the job for a background parse: PARSING when the in-process parse queue takes it
+        right away, QUEUED when it waits in the jobs table for a parse worker (worker.py).
+        """
+        job = self.db.query(Job).filter(Job.id == job_id, Job.user_id == user_id).first()
+        if not job:
+            raise ValueError("Job not found")
+        if queued:
+            job.status = JobStatus.QUEUED
+            job.queued_at = datetime.utcnow()
+            job.claimed_by = None
+            job.claimed_at = None
+        else:
+            job.status = JobStatus.PARSING
+            job.claimed_by = None
+            job.claimed_at = datetime.utcnow()  # Taken by this process's parse queue
+        self.db.commit()
+        self.db.refresh(job)
+        return job
+
+    def fail_parse(self, job_id: int, user_id: int) -> List[int]:
+        """
+        Mark the job FAILED and delete its candidates, including any a streamed parse committed
+        before it failed. Returns the deleted candidates' ids.
+        """
+        self.db.rollback()
+        job = self.db.query(Job).filter(Job.id == job_id, Job.user_id == user_id).first()
+        if not job:
+            return []
+        discarded = [c.id for c in self.db.query(JobCandidate.id).filter(JobCandidate.job_id == job_id)]
+        self.db.query(JobCandidate).filter(JobCandidate.job_id == job_id).delete(synchronize_session=False)
+        job.status = JobStatus.FAILED
+        self.db.commit()
+        return discarded
+
+    def _prepare_parse(self, job_id: int, user_id: int):
+        """Load the job and build the LLM arguments from the user's preferences."""
         job = self.db.query(Job).filter(Job.id == job_id, Job.user_id == user_id).first()
         if not job:
             raise ValueError("Job not found")
@@ -166,174 +379,234 @@ class JobService:
         ai_temp = getattr(prefs, 'ai_temperature', 0.0) if hasattr(prefs, 'ai_temperature') else prefs.get('ai_temperature', 0.0)
         p_context = getattr(prefs, 'personal_context', None) if hasattr(prefs, 'personal_context') else prefs.get('personal_context', None)
 
-        # Parse text using the new adapter structure with user's timezone context AND preferences
-        result = self.llm.parse_text(
-            job.raw_text, 
-            user_local_time=job.user_local_time,
-            ai_temperature=ai_temp,
-            personal_context=p_context,
-            user_id=job.user_id
-        )
-        
-        # DEBUG: Log the raw result to understand why ambiguities are persisting
-        try:
-            with open("llm_debug.log", "a") as f:
-                f.write(f"\n\n--- PARSE JOB {job_id} ---\n")
-                f.write(json.dumps(result, indent=2))
-                f.write("\n------------------------\n")
-        except: pass
+        return job, {
+            "text": job.raw_text,
+            "user_local_time": job.user_local_time,
+            "ai_temperature": ai_temp,
+            "personal_context": p_context,
+            "user_id": job.user_id
+        }
+
+    def _begin_parse(self, job_id: int, user_id: int) -> Tuple[dict, Optional[dict]]:
+        """
+        The LLM arguments and the stored result, if reusable. Ends the transaction, so no
+        connection is held while the LLM call runs.
+        """
+        job, llm_args = self._prepare_parse(job_id, user_id)
+        result = self._stored_parse_result(job, llm_args)
+        self.db.commit()
+        return llm_args, result
+
+    @staticmethod
+    def _parse_input_hash(llm_args: dict) -> str:
+        """Hash of everything that determines a parse result, including the prompt version."""
+        inputs = {
+            "raw_text": llm_args["text"],
+            "user_local_time": llm_args["user_local_time"],
+            "ai_temperature": llm_args["ai_temperature"],
+            "personal_context": llm_args["personal_context"],
+            "prompt_version": PROMPT_VERSION
+        }
+        return hashlib.sha256(json.dumps(inputs, sort_keys=True).encode()).hexdigest()
+
+    def _stored_parse_result(self, job: Job, llm_args: dict) -> Optional[dict]:
+        """The job's saved parse result if its inputs are unchanged, else None."""
+        if job.parse_result is None or job.parse_input_hash != self._parse_input_hash(llm_args):
+            return None
+        logger.debug(f"Reusing stored parse result for job {job.id}")
+        return copy.deepcopy(job.parse_result)
+
+    def _store_parse_result(self, job_id: int, user_id: int, result: dict, llm_args: Optional[dict] = None) -> int:
+        """Turn the LLM result into candidates (with conflict detection) and mark the job PARSED."""
+        # Re-loaded: the job may have changed (or gone) while the LLM ran
+        job = self.db.query(Job).filter(Job.id == job_id, Job.user_id == user_id).first()
+        if not job:
+            raise ValueError("Job not found")
+        prefs = self._get_preferences(job.user_id)
+        self._remember_parse_result(job, result, llm_args)
         
         # Clear existing candidates 
         self.db.query(JobCandidate).filter(JobCandidate.job_id == job_id).delete()
 
         candidates = []
-        provisionally_accepted = [] # List of {start, end, is_blocking, cand_obj}
-        
-        # Get existing user tasks for conflict detection
-        existing_tasks = self.db.query(Task).filter(Task.user_id == job.user_id).all()
+        accepted_blocking = {} # Task position -> candidate, for blocking tasks accepted so far
+
+        # Resolve every task's time range up front so the whole job is checked in one query + one sweep
+        tasks = result.get("tasks", [])
+        ranges = {pos: self._task_range(task, prefs) for pos, task in enumerate(tasks)}
+        db_hits, batch_hits = self._batch_conflicts(job.user_id, ranges)
         
         # Process Tasks
-        for task in result.get("tasks", []):
-            new_start = self._parse_datetime(task.get("start_time"))
-            new_end = self._parse_datetime(task.get("end_time"))
-
-            # Apply default duration if end_time is missing AND start_time is present
-            if new_start and not new_end:
-                # Use default duration from preferences
-                default_duration_min = getattr(prefs, 'default_duration_minutes', 60) if hasattr(prefs, 'default_duration_minutes') else prefs.get('default_duration_minutes', 60)
-                from datetime import timedelta
-                new_end = new_start + timedelta(minutes=default_duration_min)
-                # Update task dict for later candidates
-                task['end_time'] = new_end.isoformat() + "Z"
-            
-            task_title = task.get("title", "New Task")
-            is_background_cand = self._is_background_event(task_title)
-            
-            should_raise_conflict = False
-            
-            # --- BACKEND LOGIC SYSTEM: DETECT CONFLICTS ---
-            # If AI identified it as a TASK (has start_time), check against DB
-            if new_start:
-                # 1. Check for conflicts with existing tasks (Database)
-                conflict_found = self._find_conflict(job.user_id, new_start, new_end)
-                
-                # 2. Check for conflicts with previously processed candidates in this same job
-                if not conflict_found:
-                    for prev in provisionally_accepted:
-                        if prev['is_blocking'] and self._times_overlap(new_start, new_end, prev['start'], prev['end']):
-                            conflict_found = prev['cand_obj']
-                            break
-
-                # Check exclusion criteria (background events etc)
-                is_conflict_bg = False
-                if conflict_found:
-                    if hasattr(conflict_found, 'is_blocking'):
-                        is_conflict_bg = not conflict_found.is_blocking
-                    else:
-                        # It's a JobCandidate, check its description for background keywords
-                        conflict_title = getattr(conflict_found, 'description', '')
-                        is_conflict_bg = self._is_background_event(conflict_title)
-                
-                if conflict_found and not (is_background_cand or is_conflict_bg):
-                     should_raise_conflict = True
-
-            # If the Backend Logic System detects a conflict, override the candidate to AMBIGUITY
-            if should_raise_conflict:
-                candidate = JobCandidate(
-                    job_id=job.id,
-                    description=f"Conflict: {task_title}",
-                    command_type="AMBIGUITY",
-                    parameters=self._format_conflict_parameters(
-                        task_title,
-                        task.get("start_time"),
-                        new_end.isoformat() + "Z" if new_end else None,
-                        conflict_found,
-                        user_id=job.user_id,
-                        provisionally_accepted=provisionally_accepted
-                    ),
-                    confidence=0.0
-                )
-            else:
-                # No conflict OR background event - but check if time is missing
-                if not task.get("start_time"):
-                    candidate = JobCandidate(
-                        job_id=job.id,
-                        description=f"Ambiguity: Missing time for '{task_title}'",
-                        command_type="AMBIGUITY",
-                        parameters={
-                            "type": "missing_time",
-                            "message": f"What time is '{task_title}'?",
-                            "options": [] 
-                        },
-                        confidence=0.0
-                    )
-                else:
-                    # Valid task candidate
-                    candidate = JobCandidate(
-                        job_id=job.id,
-                        description=task_title,
-                        command_type="CREATE_TASK",
-                        parameters={
-                            "title": task_title,
-                            "start_time": task.get("start_time"),
-                            "end_time": new_end.isoformat() + "Z" if new_end else None, # Use calculated end time
-                            "description": task.get("description")
-                        },
-                        confidence=float(task.get("confidence", 0.0))
-                    )
-                    # Track this as a provisionally accepted range for internal conflict detection
-                    provisionally_accepted.append({
-                        'start': new_start,
-                        'end': new_end,
-                        'is_blocking': not is_background_cand,
-                        'cand_obj': candidate
-                    })
-            
+        for pos, task in enumerate(tasks):
+            candidate = self._task_candidate(
+                job, pos, task, ranges[pos],
+                db_conflict=db_hits[pos][0] if db_hits.get(pos) else None,
+                overlapping_positions=batch_hits.get(pos, ()),
+                accepted_blocking=accepted_blocking
+            )
             self.db.add(candidate)
-            self.db.flush() # Ensure candidate has an ID for conflict parameters if needed later
             candidates.append(candidate)
             
         # Process Commands
         for cmd in result.get("commands", []):
-            params = {}
-            if "payload" in cmd:
-                try:
-                    params = json.loads(cmd["payload"])
-                except:
-                    params = {}
-            
-            candidate = JobCandidate(
-                job_id=job.id,
-                description=f"Command: {cmd.get('type')}",
-                command_type=cmd.get("type", "COMMAND"),
-                parameters=params,
-                confidence=1.0 
-            )
+            candidate = self._command_candidate(job, cmd)
             self.db.add(candidate)
             candidates.append(candidate)
             
         # Process Ambiguities (from LLM)
         for amb in result.get("ambiguities", []):
-            candidate = JobCandidate(
+            candidate = self._ambiguity_candidate(job, amb)
+            self.db.add(candidate)
+            candidates.append(candidate)
+        
+        job.status = JobStatus.PARSED
+        self.db.commit()
+        return len(candidates)
+
+    def _remember_parse_result(self, job: Job, result: dict, llm_args: Optional[dict]) -> None:
+        # Keep the raw result so an unchanged re-parse rebuilds candidates without the LLM.
+        # Error fallbacks and the no-API-key mock aren't worth keeping.
+        if llm_args is not None and not self._failed_parse(result) and result.get("reasoning") != "Mock execution":
+            job.parse_result = copy.deepcopy(result)  # Candidate building mutates result
+            job.parse_input_hash = self._parse_input_hash(llm_args)
+
+    @staticmethod
+    def _failed_parse(result: dict) -> bool:
+        """Whether result is the LLM adapter's error fallback."""
+        return any(a.get("type") == "error" for a in result.get("ambiguities", []))
+
+    def _task_range(self, task: dict, prefs) -> Tuple[Optional[datetime], Optional[datetime]]:
+        """The task's (start, end), applying the default duration when only a start is given."""
+        new_start = self._parse_datetime(task.get("start_time"))
+        new_end = self._parse_datetime(task.get("end_time"))
+
+        # Apply default duration if end_time is missing AND start_time is present
+        if new_start and not new_end:
+            # Use default duration from preferences
+            default_duration_min = getattr(prefs, 'default_duration_minutes', 60) if hasattr(prefs, 'default_duration_minutes') else prefs.get('default_duration_minutes', 60)
+            new_end = new_start + timedelta(minutes=default_duration_min)
+            # Update task dict for later candidates
+            task['end_time'] = new_end.isoformat() + "Z"
+        return new_start, new_end
+
+    def _task_candidate(self, job: Job, pos: int, task: dict, task_range, db_conflict, overlapping_positions, accepted_blocking: dict) -> JobCandidate:
+        """
+        Candidate for one parsed task. db_conflict is the first blocking calendar task it overlaps;
+        overlapping_positions are the other tasks of the job it overlaps. Records the candidate in
+        accepted_blocking when later tasks should be checked against it.
+        """
+        new_start, new_end = task_range
+        task_title = task.get("title", "New Task")
+        is_background_cand = self._is_background_event(task_title)
+        
+        should_raise_conflict = False
+        
+        # --- BACKEND LOGIC SYSTEM: DETECT CONFLICTS ---
+        # If AI identified it as a TASK (has start_time), check against DB
+        if new_start:
+            # 1. Check for conflicts with existing tasks (Database)
+            conflict_found = db_conflict
+            
+            # 2. Check for conflicts with previously processed candidates in this same job
+            if not conflict_found:
+                earlier = [p for p in overlapping_positions if p in accepted_blocking]
+                if earlier:
+                    conflict_found = accepted_blocking[min(earlier)]
+
+            # Check exclusion criteria (background events etc)
+            is_conflict_bg = False
+            if conflict_found:
+                if hasattr(conflict_found, 'is_blocking'):
+                    is_conflict_bg = not conflict_found.is_blocking
+                else:
+                    # It's a JobCandidate, check its description for background keywords
+                    conflict_title = getattr(conflict_found, 'description', '')
+                    is_conflict_bg = self._is_background_event(conflict_title)
+            
+            if conflict_found and not (is_background_cand or is_conflict_bg):
+                 should_raise_conflict = True
+
+        # If the Backend Logic System detects a conflict, override the candidate to AMBIGUITY
+        if should_raise_conflict:
+            if isinstance(conflict_found, JobCandidate) and conflict_found.id is None:
+                self.db.flush() # The conflict options reference the earlier candidate by ID
+            return JobCandidate(
                 job_id=job.id,
-                description=amb.get("title") or f"Ambiguity: {amb.get('message')}",
+                description=f"Conflict: {task_title}",
+                command_type="AMBIGUITY",
+                parameters=self._format_conflict_parameters(
+                    task_title,
+                    task.get("start_time"),
+                    new_end.isoformat() + "Z" if new_end else None,
+                    conflict_found,
+                    user_id=job.user_id
+                ),
+                confidence=0.0
+            )
+
+        # No conflict OR background event - but check if time is missing
+        if not task.get("start_time"):
+            return JobCandidate(
+                job_id=job.id,
+                description=f"Ambiguity: Missing time for '{task_title}'",
                 command_type="AMBIGUITY",
                 parameters={
-                    "type": amb.get("type"), 
-                    "message": amb.get("message"),
-                    "options": [
-                        {"label": opt.get("label"), "value": opt.get("value")} 
-                        for opt in amb.get("options", [])
-                    ]
+                    "type": "missing_time",
+                    "message": f"What time is '{task_title}'?",
+                    "options": [] 
                 },
                 confidence=0.0
             )
-            self.db.add(candidate)
-            candidates.append(candidate)
+
+        # Valid task candidate
+        candidate = JobCandidate(
+            job_id=job.id,
+            description=task_title,
+            command_type="CREATE_TASK",
+            parameters={
+                "title": task_title,
+                "start_time": task.get("start_time"),
+                "end_time": new_end.isoformat() + "Z" if new_end else None, # Use calculated end time
+                "description": task.get("description")
+            },
+            confidence=float(task.get("confidence", 0.0))
+        )
+        # Track this as a provisionally accepted range for internal conflict detection
+        if not is_background_cand:
+            accepted_blocking[pos] = candidate
+        return candidate
+
+    def _command_candidate(self, job: Job, cmd: dict) -> JobCandidate:
+        params = {}
+        if "payload" in cmd:
+            try:
+                params = json.loads(cmd["payload"])
+            except:
+                params = {}
         
-        job.status = JobStatus.PARSED
-        self.db.commit()
-        return len(candidates)
+        return JobCandidate(
+            job_id=job.id,
+            description=f"Command: {cmd.get('type')}",
+            command_type=cmd.get("type", "COMMAND"),
+            parameters=params,
+            confidence=1.0 
+        )
+
+    def _ambiguity_candidate(self, job: Job, amb: dict) -> JobCandidate:
+        return JobCandidate(
+            job_id=job.id,
+            description=amb.get("title") or f"Ambiguity: {amb.get('message')}",
+            command_type="AMBIGUITY",
+            parameters={
+                "type": amb.get("type"), 
+                "message": amb.get("message"),
+                "options": [
+                    {"label": opt.get("label"), "value": opt.get("value")} 
+                    for opt in amb.get("options", [])
+                ]
+            },
+            confidence=0.0
+        )
 
     def _times_overlap(self, start1, end1, start2, end2):
         """Check if two time ranges overlap."""
@@ -357,37 +630,113 @@ class JobService:
         # Overlap exists if one interval starts before the other ends (and vice versa)
         return (start1 < end2 and start2 < end1)
 
+    def _overlapping_tasks_query(self, user_id: int, start_time: datetime, end_time: datetime, blocking_only: bool = True):
+        """
+        Tasks overlapping [start_time, end_time), evaluated in SQL.
+        Equivalent to `start < new_end AND coalesce(end, start + 30min) > new_start`,
+        written without date arithmetic so it runs unchanged on SQLite and PostgreSQL.
+        """
+        new_start, new_end = effective_range(start_time, end_time)
+        has_end = and_(Task.end_time.isnot(None), Task.end_time > Task.start_time)
+        open_ended = or_(Task.end_time.is_(None), Task.end_time <= Task.start_time)
+        query = self.db.query(Task).filter(Task.user_id == user_id)
+        if blocking_only:
+            query = query.filter(Task.is_blocking == True)
+        return query.filter(
+            Task.start_time < new_end,
+            or_(
+                and_(has_end, Task.end_time > new_start),
+                and_(open_ended, Task.start_time > new_start - DEFAULT_DURATION)
+            )
+        ).order_by(Task.start_time.asc(), Task.id.asc())
+
+    def _calendar_snapshot(self, user_id: int, window_start: datetime, window_end: datetime) -> IntervalIndex:
+        """
+        The user's tasks overlapping the window, as an IntervalIndex keyed by Task.
+        Cached until the transaction ends; asking for a window outside the cached one
+        reloads their union. Writes to the user's tasks invalidate it (see _invalidate_on_flush).
+        Batch paths only: a single check is cheaper as the indexed LIMIT 1 query.
+        """
+        window_start, window_end = effective_range(window_start, window_end)
+        cached = self._calendar.get(user_id)
+        if cached:
+            if cached[0] <= window_start and window_end <= cached[1]:
+                return cached[2]
+            window_start, window_end = min(window_start, cached[0]), max(window_end, cached[1])
+
+        tasks = self._overlapping_tasks_query(user_id, window_start, window_end, blocking_only=False).all()
+        calendar = IntervalIndex((t.start_time, t.end_time, t, t.is_blocking) for t in tasks)
+        self._calendar[user_id] = (window_start, window_end, calendar)
+        return calendar
+
+    def _batch_conflicts(self, user_id: int, ranges: dict, include_calendar: bool = True):
+        """
+        Check a batch of {key: (start, end)} ranges against the calendar and each other.
+        Costs one windowed query plus one sweep-line pass; see sweep_overlaps for the result shape.
+        Calendar hits are blocking tasks only.
+        """
+        timed = {key: effective_range(start, end) for key, (start, end) in ranges.items() if start}
+        if not timed:
+            return {}, {}
+
+        busy = []
+        if include_calendar:
+            window_start = min(start for start, _ in timed.values())
+            window_end = max(end for _, end in timed.values())
+            calendar = self._calendar_snapshot(user_id, window_start, window_end)
+            busy = list(calendar.overlapping(window_start, window_end, blocking_only=True))
+
+        return sweep_overlaps(
+            fixed=busy,
+            probes=[(start, end, key) for key, (start, end) in timed.items()]
+        )
+
     def _find_conflict(self, user_id: int, start_time: datetime, end_time: datetime) -> Optional[Task]:
         """Find an overlapping BLOCKING task for the user."""
         if not start_time:
             return None
-        
-        # Get existing user tasks that are BLOCKING
-        existing_tasks = self.db.query(Task).filter(
-            Task.user_id == user_id, 
-            Task.is_blocking == True
-        ).all()
-        
-        for existing in existing_tasks:
-            if existing.start_time:
-                if self._times_overlap(start_time, end_time, existing.start_time, existing.end_time):
-                    return existing
-        return None
-
-    def _round_to_boundary(self, dt: datetime, interval_min: int = 15) -> datetime:
-        """Round to nearest interval boundary for cleaner suggestions."""
-        total_min = dt.hour * 60 + dt.minute
-        rem = total_min % interval_min
-        if rem == 0:
-            return dt.replace(second=0, microsecond=0)
-        
-        # Always round forward unless very close to previous
-        if rem < 5: 
-             rounded = total_min - rem
-        else:
-             rounded = total_min + (interval_min - rem)
-             
-        return dt.replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(minutes=rounded)
+        return self._overlapping_tasks_query(user_id, start_time, end_time).first()
+
+    def _busy_ranges(self, user_id: int, window_start: datetime, window_end: datetime, provisionally_accepted: list = None) -> list:
+        """Blocking (start, end) ranges overlapping the window: DB tasks plus in-flight candidates."""
+        calendar = self._calendar_snapshot(user_id, window_start, window_end)
+        busy = [(start, end) for start, end, _ in calendar.overlapping(window_start, window_end, blocking_only=True)]
+
+        if provisionally_accepted:
+             for prev in provisionally_accepted:
+                if prev.get('is_blocking') and prev.get('start') and prev.get('end'):
+                    busy.append((prev['start'], prev['end']))
+        return busy
+
+    def _slot_window(self, anchor: datetime, horizon_days: int):
+        """Calendar window a SlotSearch around anchor needs (see SlotSearch.search_end)."""
+        day_start = anchor.replace(hour=0, minute=0, second=0, microsecond=0)
+        return day_start, day_start + timedelta(days=horizon_days + 2)
+
+    def _slot_search(
+        self,
+        user_id: int,
+        anchor: datetime,
+        duration_minutes: int,
+        buffer_minutes: int = 15,
+        provisionally_accepted: list = None,
+        work_start_hour: int = 8,
+        work_end_hour: int = 22,
+        horizon_days: int = None
+    ) -> SlotSearch:
+        """Build a SlotSearch around anchor from one indexed range query over the horizon."""
+        if horizon_days is None:
+            horizon_days = settings.SLOT_SEARCH_HORIZON_DAYS
+        anchor = self._normalize_aware_dt(anchor)
+        return SlotSearch(
+            busy=self._busy_ranges(user_id, *self._slot_window(anchor, horizon_days), provisionally_accepted),
+            anchor=anchor,
+            duration_minutes=duration_minutes,
+            buffer_minutes=buffer_minutes,
+            work_start_hour=work_start_hour,
+            work_end_hour=work_end_hour,
+            horizon_days=horizon_days
+        )
 
     def _find_nearest_available_slot(
         self, 
@@ -397,101 +746,56 @@ class JobService:
         buffer_minutes: int = 15,
         provisionally_accepted: list = None,
         work_start_hour: int = 8,
-        work_end_hour: int = 22
+        work_end_hour: int = 22,
+        horizon_days: int = None
     ) -> Optional[dict]:
-        from datetime import timedelta
-        
+        """Best free slot near conflict_start, searching up to horizon_days ahead (see SlotSearch)."""
         if not conflict_start:
             return None
-            
-        day_start = conflict_start.replace(hour=0, minute=0, second=0, microsecond=0)
-        day_end = day_start + timedelta(days=1)
-        
-        # Busy slots (Blocking Tasks)
-        existing_tasks = self.db.query(Task).filter(
-            Task.user_id == user_id,
-            Task.is_blocking == True,
-            Task.start_time >= day_start,
-            Task.start_time < day_end
-        ).all()
-        
-        busy_slots = []
-        for task in existing_tasks:
-            if task.start_time:
-                end = task.end_time or (task.start_time + timedelta(minutes=30))
-                busy_slots.append((task.start_time, end))
-        
-        if provisionally_accepted:
-             for prev in provisionally_accepted:
-                if prev.get('is_blocking') and prev.get('start') and prev.get('end'):
-                    busy_slots.append((prev['start'], prev['end']))
-        
-        busy_slots.sort(key=lambda x: x[0])
-        
-        # Merge overlaps in busy_slots
-        if not busy_slots:
-            merged = []
-        else:
-            merged = [busy_slots[0]]
-            for current in busy_slots[1:]:
-                prev_start, prev_end = merged[-1]
-                if current[0] < prev_end:
-                    merged[-1] = (prev_start, max(prev_end, current[1]))
-                else:
-                    merged.append(current)
-        
-        # Candidate search points
-        search_points = set()
-        search_points.add(self._round_to_boundary(conflict_start))
-        search_points.add(self._round_to_boundary(conflict_start + timedelta(minutes=15)))
-        
-        for _, end in merged:
-            search_points.add(self._round_to_boundary(end + timedelta(minutes=buffer_minutes)))
-        
-        work_start = conflict_start.replace(hour=work_start_hour, minute=0, second=0, microsecond=0)
-        work_end = conflict_start.replace(hour=work_end_hour, minute=0, second=0, microsecond=0)
-        if work_end_hour < work_start_hour: work_end += timedelta(days=1)
-        search_points.add(work_start)
-
-        valid_suggestions = []
-        duration = timedelta(minutes=event_duration_minutes)
-        buffer = timedelta(minutes=buffer_minutes)
-
-        for start_c in search_points:
-            if start_c < day_start or start_c + duration > day_end:
-                continue
-                
-            end_c = start_c + duration
-            has_conflict = False
-            for b_start, b_end in merged:
-                if self._times_overlap(start_c, end_c, b_start - buffer, b_end + buffer):
-                    has_conflict = True
-                    break
-            
-            if not has_conflict:
-                valid_suggestions.append(start_c)
 
-        if not valid_suggestions:
+        best = self._slot_search(
+            user_id, conflict_start, event_duration_minutes,
+            buffer_minutes=buffer_minutes,
+            provisionally_accepted=provisionally_accepted,
+            work_start_hour=work_start_hour,
+            work_end_hour=work_end_hour,
+            horizon_days=horizon_days
+        ).best(k=1)
+        if not best:
             return None
-            
-        def score_slot(s):
-            diff = (s - conflict_start).total_seconds() / 60
-            dist = abs(diff)
-            penalty = 0
-            if diff < 0: penalty += 500
-            if s < work_start or s + duration > work_end: penalty += 200
-            return dist + penalty
-            
-        valid_suggestions.sort(key=score_slot)
-        best_start = valid_suggestions[0]
-        
+
+        _, best_start = best[0]
+        duration = timedelta(minutes=event_duration_minutes)
         return {
             "start_time": best_start.isoformat() + "Z",
             "end_time": (best_start + duration).isoformat() + "Z"
         }
 
-    def _format_conflict_parameters(self, title, start_time, end_time, conflict_obj, user_id: int = None, provisionally_accepted: list = None):
-        """Standardize the conflict ambiguity parameters. Works for Tasks or Candidates."""
+    def suggest_slots(self, user_id: int, near: datetime, duration_minutes: Optional[int] = None, k: int = 3) -> List[dict]:
+        """Top-k free slots near a time, ranked by score_slot, using the user's scheduling preferences."""
+        prefs = self._get_preferences(user_id)
+        pref = (lambda name, default: prefs.get(name, default)) if isinstance(prefs, dict) else (lambda name, default: getattr(prefs, name, default))
+        if not duration_minutes:
+            duration_minutes = pref('default_duration_minutes', 60)
+
+        search = self._slot_search(
+            user_id, near, duration_minutes,
+            buffer_minutes=pref('buffer_minutes', 15),
+            work_start_hour=pref('work_start_hour', 8),
+            work_end_hour=pref('work_end_hour', 22)
+        )
+        duration = timedelta(minutes=duration_minutes)
+        return [
+            {"start_time": start, "end_time": start + duration, "score": round(score, 1)}
+            for score, start in search.best(k=k)
+        ]
+
+    def _format_conflict_parameters(self, title, start_time, end_time, conflict_obj, user_id: int = None):
+        """
+        Standardize the conflict ambiguity parameters. Works for Tasks or Candidates.
+        The "Suggested time" option is deferred: `suggestion_pending` marks it for
+        get_candidate_suggestion to compute when the client asks for it.
+        """
         from datetime import timedelta
         
         # Detect if it's a Task (model) or something else
@@ -522,69 +826,21 @@ class JobService:
             remove_id_key = "remove_candidate_id"
             remove_id_val = getattr(conflict_obj, 'id', None) or (conflict_obj.get('id') if isinstance(conflict_obj, dict) else None)
 
-        # Fetch preferences if user_id is available
-        prefs = None
-        buffer_min = 15
-        default_dur = 60
-        w_start = 8
-        w_end = 22
-        
-        if user_id:
-            prefs = self._get_preferences(user_id)
-            # Use getattr/get based on object type (SQLAlchemy Model vs dict)
-            if isinstance(prefs, dict):
-                 buffer_min = prefs.get('buffer_minutes', 15)
-                 default_dur = prefs.get('default_duration_minutes', 60)
-                 w_start = prefs.get('work_start_hour', 8)
-                 w_end = prefs.get('work_end_hour', 22)
-            else:
-                 buffer_min = getattr(prefs, 'buffer_minutes', 15)
-                 default_dur = getattr(prefs, 'default_duration_minutes', 60)
-                 w_start = getattr(prefs, 'work_start_hour', 8)
-                 w_end = getattr(prefs, 'work_end_hour', 22)
-
-        # Calculate event duration for smart suggestion
         new_start_dt = self._parse_datetime(start_time)
         new_end_dt = self._parse_datetime(end_time)
-        
-        if new_start_dt and new_end_dt:
-            event_duration = int((new_end_dt - new_start_dt).total_seconds() / 60)
-        else:
-            event_duration = default_dur  # Use preference
             
-        # Ensure end_time is set if missing, using calculated duration
+        # Ensure end_time is set if missing, using the preferred duration
         if new_start_dt and not new_end_dt:
-            new_end_dt = new_start_dt + timedelta(minutes=event_duration)
+            default_dur = 60
+            if user_id:
+                prefs = self._get_preferences(user_id)
+                # Use getattr/get based on object type (SQLAlchemy Model vs dict)
+                default_dur = prefs.get('default_duration_minutes', 60) if isinstance(prefs, dict) else getattr(prefs, 'default_duration_minutes', 60)
+            new_end_dt = new_start_dt + timedelta(minutes=default_dur)
             end_time = new_end_dt.isoformat() + "Z"
 
         # Build options list
         options = []
-        
-        # Try to find a smart suggestion
-        if user_id and new_start_dt:
-            suggested_slot = self._find_nearest_available_slot(
-                user_id=user_id,
-                conflict_start=new_start_dt,
-                event_duration_minutes=event_duration,
-                buffer_minutes=buffer_min,
-                provisionally_accepted=provisionally_accepted,
-                work_start_hour=w_start,
-                work_end_hour=w_end
-            )
-            
-            if suggested_slot:
-                options.append({
-                    "label": "Suggested time", 
-                    "value": json.dumps({
-                        "title": title,
-                        "start_time": suggested_slot["start_time"],
-                        "end_time": suggested_slot["end_time"],
-                        "suggested": True
-                    }),
-                    "suggested": True,
-                    "display_time": suggested_slot["start_time"],
-                    "end_time": suggested_slot["end_time"]
-                })
 
         # Standard options (Now using guaranteed end_time)
         options.extend([
@@ -617,9 +873,124 @@ class JobService:
             "start_time": start_time,
             "end_time": end_time,
             "message": f"'{title}' conflicts with '{existing_title}' ({existing_start_iso} - {existing_end_iso or '?'}). What would you like to do?",
-            "options": options
+            "options": options,
+            "suggestion_pending": bool(user_id and new_start_dt)
         }
 
+    def get_candidate_suggestion(self, candidate_id: int, user_id: int) -> Optional[dict]:
+        """
+        Return the "Suggested time" option for a conflict candidate, computing it on first request.
+        The result is stored on the candidate so later reads are free. Returns None if no slot is free.
+        """
+        candidate = self.db.query(JobCandidate).join(Job).filter(
+            JobCandidate.id == candidate_id,
+            Job.user_id == user_id
+        ).first()
+        if not candidate:
+            raise ValueError("Candidate not found")
+
+        params = candidate.parameters or {}
+        if params.get("type") != "conflict":
+            raise ValueError("Candidate has no conflict suggestion")
+
+        existing = next((opt for opt in params.get("options", []) if opt.get("suggested")), None)
+        if existing or not params.get("suggestion_pending"):
+            return existing
+
+        job_tasks = self.db.query(JobCandidate).filter(
+            JobCandidate.job_id == candidate.job_id,
+            JobCandidate.command_type == "CREATE_TASK"
+        ).all()
+        option = self._fill_suggestion(candidate, job_tasks, user_id)
+        self.db.commit()
+        return option
+
+    def resolve_job_suggestions(self, job_id: int, user_id: int) -> None:
+        """Compute every pending conflict suggestion of a job (for GET /jobs/{id}?include_suggestions=true)."""
+        job_candidates = self.db.query(JobCandidate).join(Job).filter(
+            JobCandidate.job_id == job_id,
+            Job.user_id == user_id
+        ).all()
+        pending = [
+            c for c in job_candidates
+            if c.command_type == "AMBIGUITY" and isinstance(c.parameters, dict) and c.parameters.get("suggestion_pending")
+        ]
+        if not pending:
+            return
+
+        # Load the calendar once for every suggestion's search window
+        horizon_days = settings.SLOT_SEARCH_HORIZON_DAYS
+        anchors = [self._parse_datetime(c.parameters.get("start_time")) for c in pending]
+        anchors = [a for a in anchors if a]
+        if anchors:
+            self._calendar_snapshot(
+                user_id,
+                self._slot_window(min(anchors), horizon_days)[0],
+                self._slot_window(max(anchors), horizon_days)[1]
+            )
+
+        job_tasks = [c for c in job_candidates if c.command_type == "CREATE_TASK"]
+        for cand in pending:
+            self._fill_suggestion(cand, job_tasks, user_id)
+        self.db.commit()
+
+    def _fill_suggestion(self, candidate: JobCandidate, job_tasks: List[JobCandidate], user_id: int) -> Optional[dict]:
+        """Search a free slot for a pending conflict candidate and store it as its first option (no commit)."""
+        params = dict(candidate.parameters)
+        new_start_dt = self._parse_datetime(params.get("start_time"))
+        new_end_dt = self._parse_datetime(params.get("end_time"))
+
+        prefs = self._get_preferences(user_id)
+        pref = (lambda name, default: prefs.get(name, default)) if isinstance(prefs, dict) else (lambda name, default: getattr(prefs, name, default))
+        if new_start_dt and new_end_dt:
+            event_duration = int((new_end_dt - new_start_dt).total_seconds() / 60)
+        else:
+            event_duration = pref('default_duration_minutes', 60)
+
+        # The job's other pending tasks are busy too, even though they are not in the calendar yet
+        provisionally_accepted = []
+        for other in job_tasks:
+            if other.id == candidate.id:
+                continue
+            o_params = other.parameters if isinstance(other.parameters, dict) else {}
+            o_range = effective_range(self._parse_datetime(o_params.get("start_time")), self._parse_datetime(o_params.get("end_time")))
+            if o_range:
+                provisionally_accepted.append({
+                    'start': o_range[0],
+                    'end': o_range[1],
+                    'is_blocking': not self._is_background_event(o_params.get("title", other.description))
+                })
+
+        option = None
+        suggested_slot = self._find_nearest_available_slot(
+            user_id=user_id,
+            conflict_start=new_start_dt,
+            event_duration_minutes=event_duration,
+            buffer_minutes=pref('buffer_minutes', 15),
+            provisionally_accepted=provisionally_accepted,
+            work_start_hour=pref('work_start_hour', 8),
+            work_end_hour=pref('work_end_hour', 22)
+        )
+        if suggested_slot:
+            option = {
+                "label": "Suggested time", 
+                "value": json.dumps({
+                    "title": params.get("title"),
+                    "start_time": suggested_slot["start_time"],
+                    "end_time": suggested_slot["end_time"],
+                    "suggested": True
+                }),
+                "suggested": True,
+                "display_time": suggested_slot["start_time"],
+                "end_time": suggested_slot["end_time"]
+            }
+            params["options"] = [option] + list(params.get("options", []))
+
+        # Reassign (not mutate) so the JSON column is flagged dirty
+        params["suggestion_pending"] = False
+        candidate.parameters = params
+        return option
+
     def get_job_details(self, job_id: int, user_id: int) -> Optional[Job]:
         return self.db.query(Job).filter(Job.id == job_id, Job.user_id == user_id).first()
 
@@ -628,18 +999,20 @@ class JobService:
         if not job:
             raise ValueError("Job not found")
 
-        # Fetch selected candidates
-        candidates = self.db.query(JobCandidate).filter(
-            JobCandidate.id.in_(selected_ids),
+        # Fetch all of the job's candidates once: selected ones are accepted below, and
+        # other pending CREATE_TASKs are re-checked against whatever gets created
+        job_candidates = self.db.query(JobCandidate).filter(
             JobCandidate.job_id == job_id
-        ).all()
+        ).order_by(JobCandidate.id.asc()).all()
+        selected = set(selected_ids)
+        candidates = [c for c in job_candidates if c.id in selected]
 
         created_tasks = []
         issues_encountered = False
 
-        # Maintain a list of tasks created in THIS batch to check against
-        batch_tasks = []
-
+        # Resolve every selected candidate's time range first
+        to_accept = [] # (cand, params, start_time, end_time)
+        default_dur = None
         for cand in candidates:
             if cand.command_type != "CREATE_TASK":
                 continue
@@ -659,26 +1032,55 @@ class JobService:
             
             # Ensure end_time exists; fallback to preference if missing
             if not end_time:
-                prefs = self._get_preferences(user_id)
-                default_dur = getattr(prefs, 'default_duration_minutes', 60) if not isinstance(prefs, dict) else prefs.get('default_duration_minutes', 60)
+                if default_dur is None:
+                    prefs = self._get_preferences(user_id)
+                    default_dur = getattr(prefs, 'default_duration_minutes', 60) if not isinstance(prefs, dict) else prefs.get('default_duration_minutes', 60)
                 end_time = start_time + timedelta(minutes=default_dur)
-                
+
+            to_accept.append((cand, params, start_time, end_time))
+
+        # Pending (unselected) CREATE_TASK candidates, for post-acceptance conflict detection
+        pending = [] # (cand, params, start_time, end_time)
+        for rem_cand in job_candidates:
+            if rem_cand.id in selected or rem_cand.command_type != "CREATE_TASK":
+                continue
+            rem_params = rem_cand.parameters
+            # Handle potential SQLAlchemy dict vs str
+            if isinstance(rem_params, str):
+                try: rem_params = json.loads(rem_params)
+                except: continue
+            elif not isinstance(rem_params, dict):
+                continue
+            rem_start = self._parse_datetime(rem_params.get("start_time"))
+            if rem_start:
+                pending.append((rem_cand, rem_params, rem_start, self._parse_datetime(rem_params.get("end_time"))))
+
+        # One windowed calendar query + one sweep covers the whole batch
+        ranges = {("sel", i): (start, end) for i, (_, _, start, end) in enumerate(to_accept)}
+        ranges.update({("rem", j): (start, end) for j, (_, _, start, end) in enumerate(pending)})
+        db_hits, batch_hits = self._batch_conflicts(user_id, ranges, include_calendar=not ignore_conflicts)
+
+        created_blocking = {} # ("sel", i) -> Task created in THIS batch
+        for i, (cand, params, start_time, end_time) in enumerate(to_accept):
+            key = ("sel", i)
             task_title = params.get("title", cand.description)
 
             # --- CONFLICT CHECK ---
             conflict_found = None
             if not ignore_conflicts:
                 # 1. Check DB
-                conflict_found = self._find_conflict(user_id, start_time, end_time)
+                if db_hits.get(key):
+                    conflict_found = db_hits[key][0]
                 
                 # 2. Check previously created tasks in this batch
                 if not conflict_found:
-                    for batch_task in batch_tasks:
-                         if batch_task['is_blocking'] and self._times_overlap(start_time, end_time, batch_task['start'], batch_task['end']):
-                            conflict_found = batch_task['obj'] # Just need truthy object
-                            break
+                    earlier = [k for k in batch_hits.get(key, ()) if k in created_blocking]
+                    if earlier:
+                        conflict_found = created_blocking[min(earlier)]
 
             if conflict_found:
+                if isinstance(conflict_found, Task) and conflict_found.id is None:
+                    self.db.flush() # The conflict options reference the new task by ID
                 # Update Candidate to Ambiguity
                 cand.command_type = "AMBIGUITY"
                 cand.description = f"Conflict: {task_title}"
@@ -706,14 +1108,9 @@ class JobService:
                 is_blocking=is_blocking
             )
             self.db.add(task)
-            self.db.flush() # Get ID
             created_tasks.append(task)
-            batch_tasks.append({
-                'start': start_time,
-                'end': end_time,
-                'is_blocking': is_blocking,
-                'obj': task
-            })
+            if is_blocking:
+                created_blocking[key] = task
             
             # Clean up used candidate
             self.db.delete(cand)
@@ -725,60 +1122,36 @@ class JobService:
         if created_tasks:
             # --- SYSTEM B LOGIC: POST-ACCEPTANCE CONFLICT DETECTION ---
             # Now that a task is firmly in the DB, check if any PENDING candidates conflict with it.
-            # If so, convert them to AMBIGUITY immediately.
-            
-            # Check REMAINING candidates for conflicts
-            self.db.flush() # Ensure deletes are processed so we don't fetch deleted candidates
-            
-            remaining_candidates = self.db.query(JobCandidate).filter(
-                JobCandidate.job_id == job_id,
-                JobCandidate.command_type == "CREATE_TASK" 
-            ).all()
-            
-            print(f"DEBUG: Checking {len(remaining_candidates)} remaining candidates for conflicts against {len(created_tasks)} new tasks")
-
-            for rem_cand in remaining_candidates:
-                # Parse params
-                rem_params = rem_cand.parameters
-                # Handle potential SQLAlchemy dict vs str
-                if isinstance(rem_params, str):
-                    try: rem_params = json.loads(rem_params)
-                    except: continue
-                elif not isinstance(rem_params, dict):
-                    continue
-
-                rem_start = self._parse_datetime(rem_params.get("start_time"))
-                rem_end = self._parse_datetime(rem_params.get("end_time"))
+            # If so, convert them to AMBIGUITY immediately. Overlaps come from the same sweep as above.
+            print(f"DEBUG: Checking {len(pending)} remaining candidates for conflicts against {len(created_tasks)} new tasks")
 
-                if not rem_start: 
-                    continue
-                
+            for j, (rem_cand, rem_params, rem_start, rem_end) in enumerate(pending):
                 # Check against tasks created in this batch
-                conflict_obj = None
-                for new_task in created_tasks:
-                     # Ensure we are comparing simple dates
-                     if new_task.is_blocking and self._times_overlap(rem_start, rem_end, new_task.start_time, new_task.end_time):
-                        conflict_obj = new_task
-                        break
-                
-                if conflict_obj:
-                    print(f"DEBUG: Found conflict! Candidate {rem_cand.id} overlaps with New Task {conflict_obj.id}")
-                    # Transform to AMBIGUITY
-                    rem_cand.command_type = "AMBIGUITY"
-                    rem_cand.description = f"Conflict: {rem_params.get('title', 'Event')}"
-                    rem_cand.parameters = self._format_conflict_parameters(
-                        rem_params.get("title", "Event"),
-                        rem_params.get("start_time"),
-                        rem_params.get("end_time"),
-                        conflict_obj,
-                        user_id=user_id
-                    )
-                    self.db.add(rem_cand)
-                    issues_encountered = True
+                hits = [k for k in batch_hits.get(("rem", j), ()) if k in created_blocking]
+                if not hits:
+                    continue
+                conflict_obj = created_blocking[min(hits)]
+                if conflict_obj.id is None:
+                    self.db.flush() # Get ID
+
+                print(f"DEBUG: Found conflict! Candidate {rem_cand.id} overlaps with New Task {conflict_obj.id}")
+                # Transform to AMBIGUITY
+                rem_cand.command_type = "AMBIGUITY"
+                rem_cand.description = f"Conflict: {rem_params.get('title', 'Event')}"
+                rem_cand.parameters = self._format_conflict_parameters(
+                    rem_params.get("title", "Event"),
+                    rem_params.get("start_time"),
+                    rem_params.get("end_time"),
+                    conflict_obj,
+                    user_id=user_id
+                )
+                self.db.add(rem_cand)
+                issues_encountered = True
 
         
         # Determine Job Status
         # If we have any remaining candidates for this job (including the ones we just turned to ambiguity), stay PARSED
+        self.db.flush() # Ensure deletes are processed before counting
         count_remaining = self.db.query(JobCandidate).filter(JobCandidate.job_id == job_id).count()
         if count_remaining > 0:
             job.status = JobStatus.PARSED
@@ -907,36 +1280,112 @@ class JobService:
         self.db.delete(candidate)
         self.db.commit()
 
-    def cleanup_old_tasks(self, user_id: int):
-        """Delete tasks older than 3 days to match frontend view window."""
-        try:
-            cutoff = datetime.utcnow() - timedelta(days=3)
-            deleted = self.db.query(Task).filter(
-                Task.user_id == user_id,
-                Task.start_time < cutoff
-            ).delete(synchronize_session=False)
-            if deleted > 0:
-                self.db.commit()
-                print(f"DEBUG: Cleaned up {deleted} old tasks for user {user_id}")
-        except Exception as e:
-            self.db.rollback()
-            print(f"ERROR cleanup_old_tasks: {e}")
-
-    def get_tasks(self, start: Optional[datetime], end: Optional[datetime], user_id: int) -> List[Task]:
-        """Fetch tasks for a user within an optional time range."""
-        # Periodic cleanup triggered on fetch
-        self.cleanup_old_tasks(user_id)
-        
-        query = self.db.query(Task).filter(Task.user_id == user_id)
-        
+    def _task_range_filters(self, start: Optional[datetime], end: Optional[datetime], user_id: int) -> list:
+        filters = [Task.user_id == user_id]
         if start:
             # Task must end after the start of range
-            query = query.filter(Task.end_time >= start)
+            filters.append(Task.end_time >= start)
         if end:
             # Task must start before the end of range
-            query = query.filter(Task.start_time <= end)
-            
-        return query.order_by(Task.start_time.asc()).all()
+            filters.append(Task.start_time <= end)
+        return filters
+
+    def _encode_task_cursor(self, start_time: Optional[datetime], task_id: int) -> str:
+        payload = json.dumps([start_time.isoformat() if start_time else None, task_id])
+        return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+    def _decode_task_cursor(self, cursor: str) -> Tuple[Optional[datetime], int]:
+        try:
+            padded = cursor + "=" * (-len(cursor) % 4)
+            start_iso, task_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+            return (datetime.fromisoformat(start_iso) if start_iso else None), int(task_id)
+        except Exception:
+            raise ValueError("Invalid cursor")
+
+    def get_tasks_page(
+        self,
+        start: Optional[datetime],
+        end: Optional[datetime],
+        user_id: int,
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None,
+        fields: Optional[List[str]] = None
+    ) -> Tuple[List[dict], Optional[str]]:
+        """
+        Keyset-paginated tasks as plain dicts, ordered by (start_time, id).
+
+        Reads Core rows of only the requested `fields` (default: all of TASK_FIELDS) instead
+        of hydrating ORM objects. Returns (rows, next_cursor); next_cursor is None on the
+        last page. Raises ValueError for unknown fields or a malformed cursor.
+        Read-only; expiry is handled by app.retention.
+        """
+        fields = list(fields or TASK_FIELDS)
+        unknown = [f for f in fields if f not in TASK_FIELDS]
+        if unknown:
+            raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+        if "id" not in fields:
+            fields.insert(0, "id")
+        # The cursor is built from start_time and id, so both are always selected
+        columns = list(dict.fromkeys(fields + ["start_time"]))
+
+        stmt = select(*[getattr(Task, name) for name in columns]).where(
+            *self._task_range_filters(start, end, user_id)
+        )
+        if cursor:
+            after_start, after_id = self._decode_task_cursor(cursor)
+            if after_start is None:
+                # Undated tasks sort first; continue among them, then into the dated ones
+                stmt = stmt.where(or_(Task.start_time.isnot(None), Task.id > after_id))
+            else:
+                stmt = stmt.where(or_(
+                    Task.start_time > after_start,
+                    and_(Task.start_time == after_start, Task.id > after_id)
+                ))
+        stmt = stmt.order_by(Task.start_time.asc().nulls_first(), Task.id.asc())
+        if limit:
+            stmt = stmt.limit(limit + 1)
+
+        rows = self.db.execute(stmt).all()
+        next_cursor = None
+        if limit and len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = self._encode_task_cursor(rows[-1].start_time, rows[-1].id)
+        return [{name: getattr(row, name) for name in fields} for row in rows], next_cursor
+
+    def get_task_changes(self, user_id: int, since: Optional[str] = None) -> dict:
+        """
+        Tasks changed and ids deleted since a sync cursor (see task_sync.py).
+        No cursor, or one older than the pruned tombstones, returns a full snapshot with reset=True.
+        """
+        current, floor = self.db.execute(
+            select(User.task_version, User.task_sync_floor).where(User.id == user_id)
+        ).one()
+
+        since_version = None
+        if since:
+            try:
+                since_version = int(since)
+            except ValueError:
+                raise ValueError("Invalid cursor")
+
+        if since_version is None or since_version < floor or since_version > current:
+            tasks = self.db.query(Task).filter(Task.user_id == user_id).order_by(Task.start_time.asc(), Task.id.asc()).all()
+            return {"changes": tasks, "deleted": [], "cursor": str(current), "reset": True}
+
+        if since_version == current:
+            return {"changes": [], "deleted": [], "cursor": str(current), "reset": False}
+
+        tasks = self.db.query(Task).filter(
+            Task.user_id == user_id,
+            Task.version > since_version
+        ).order_by(Task.version.asc(), Task.id.asc()).all()
+        deleted = self.db.execute(
+            select(TaskTombstone.task_id).where(
+                TaskTombstone.user_id == user_id,
+                TaskTombstone.version > since_version
+            ).order_by(TaskTombstone.version.asc())
+        ).scalars().all()
+        return {"changes": tasks, "deleted": deleted, "cursor": str(current), "reset": False}
 
     def _normalize_aware_dt(self, dt: Optional[datetime]) -> Optional[datetime]:
         """Convert aware datetime to naive UTC, or return as is if already naive."""
@@ -964,34 +1413,33 @@ class JobService:
         new_end = upd_end if update_data.end_time is not None else task.end_time
         
         # Check for conflicts with OTHER tasks (unless ignored)
-        if not update_data.ignore_conflicts:
-            existing_tasks = self.db.query(Task).filter(Task.user_id == task.user_id, Task.id != task.id).all()
-            for existing in existing_tasks:
-                if existing.start_time and new_start:
-                    if self._times_overlap(new_start, new_end, existing.start_time, existing.end_time):
-                        # Found a conflict!
-                        # Found a conflict!
-                        # Calculate available slot suggestion
-                        suggestion = None
-                        if new_start and new_end:
-                            duration = int((new_end - new_start).total_seconds() / 60)
-                            # Get preferences for buffers if possible (defaulting here for now as in _format_conflict_parameters)
-                            # You can fetch proper prefs if needed, but defaults are safe
-                            suggestion = self._find_nearest_available_slot(
-                                user_id=task.user_id,
-                                conflict_start=new_start,
-                                event_duration_minutes=duration,
-                                buffer_minutes=15 # Default buffer
-                            )
+        if not update_data.ignore_conflicts and new_start:
+            existing = self._overlapping_tasks_query(task.user_id, new_start, new_end, blocking_only=False).filter(
+                Task.id != task.id
+            ).first()
+            if existing:
+                # Found a conflict!
+                # Calculate available slot suggestion
+                suggestion = None
+                if new_start and new_end:
+                    duration = int((new_end - new_start).total_seconds() / 60)
+                    # Get preferences for buffers if possible (defaulting here for now as in _format_conflict_parameters)
+                    # You can fetch proper prefs if needed, but defaults are safe
+                    suggestion = self._find_nearest_available_slot(
+                        user_id=task.user_id,
+                        conflict_start=new_start,
+                        event_duration_minutes=duration,
+                        buffer_minutes=15 # Default buffer
+                    )
 
-                        conflict_info = {
-                            "id": existing.id,
-                            "title": existing.title,
-                            "start_time": existing.start_time.isoformat() if existing.start_time else None,
-                            "end_time": existing.end_time.isoformat() if existing.end_time else None,
-                            "suggestion": suggestion
-                        }
-                        raise ValueError(f"CONFLICT:{json.dumps(conflict_info)}")
+                conflict_info = {
+                    "id": existing.id,
+                    "title": existing.title,
+                    "start_time": existing.start_time.isoformat() if existing.start_time else None,
+                    "end_time": existing.end_time.isoformat() if existing.end_time else None,
+                    "suggestion": suggestion
+                }
+                raise ValueError(f"CONFLICT:{json.dumps(conflict_info)}")
 
         if update_data.start_time is not None:
             task.start_time = upd_start
@@ -0,0 +1,88 @@
+"""
+Single-Flight
+=============
+Coalesces concurrent identical calls. The first caller for a key runs the
+work; callers arriving with the same key while it is in flight wait for
+its result instead of repeating it.
+
+Works across threads (sync routes) and coroutines (async routes), since
+every waiter shares one concurrent.futures.Future. Used in front of the
+LLM so retries, double-taps and identical texts arriving together pay for
+a single OpenAI call (see LLMAdapter.parse_text).
+"""
+
+import asyncio
+import threading
+from concurrent.futures import Future
+from typing import Any, Awaitable, Callable, Dict, Tuple
+
+
+class SingleFlight:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._in_flight: Dict[str, Future] = {}
+        self.leaders = 0     # Calls that did the work
+        self.coalesced = 0   # Calls that waited on another caller's result
+
+    def _join(self, key: str) -> Tuple[Future, bool]:
+        """Return (future, is_leader) for key."""
+        with self._lock:
+            future = self._in_flight.get(key)
+            if future is not None:
+                self.coalesced += 1
+                return future, False
+            future = Future()
+            self._in_flight[key] = future
+            self.leaders += 1
+            return future, True
+
+    def _settle(self, key: str, future: Future, result: Any = None, error: BaseException = None) -> None:
+        with self._lock:
+            self._in_flight.pop(key, None)
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+    def do(self, key: str, fn: Callable[[], Any]) -> Any:
+        """Run fn() once per key among concurrent callers (blocking)."""
+        future, leader = self._join(key)
+        if not leader:
+            return future.result()
+        try:
+            result = fn()
+        except BaseException as e:
+            self._settle(key, future, error=e)
+            raise
+        self._settle(key, future, result=result)
+        return result
+
+    async def do_async(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Await fn() once per key among concurrent callers."""
+        future, leader = self._join(key)
+        if leader:
+            # The work runs as its own task, so a cancelled leader (client went away)
+            # does not fail the callers waiting on it
+            task = asyncio.ensure_future(fn())
+
+            def on_done(t: asyncio.Task) -> None:
+                if t.cancelled():
+                    self._settle(key, future, error=asyncio.CancelledError())
+                elif t.exception() is not None:
+                    self._settle(key, future, error=t.exception())
+                else:
+                    self._settle(key, future, result=t.result())
+
+            task.add_done_callback(on_done)
+        return await asyncio.shield(asyncio.wrap_future(future))
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._in_flight)
+
+    def stats(self) -> dict:
+        return {
+            "leaders": self.leaders,
+            "coalesced": self.coalesced,
+            "in_flight": self.in_flight()
+        }
@@ -0,0 +1,214 @@
+"""
+Slot Search
+===========
+Finds free time slots for an event of a given duration near an anchor time.
+
+The search walks merged busy intervals across a multi-day horizon:
+1. Busy ranges (padded by the buffer) are merged into disjoint intervals.
+2. Free gaps are intersected with the allowed windows: any time on the
+   anchor's own day (outside work hours costs a penalty), and only
+   work_start_hour..work_end_hour on the following days.
+3. Each resulting piece yields its slot starts (15 min aligned) lazily, walking
+   away from the anchor, so candidates come out ordered by a lower bound on
+   their score. The search stops as soon as no remaining candidate can beat
+   the k best found so far.
+
+All datetimes are naive UTC, like the rest of the backend.
+"""
+
+import heapq
+import itertools
+from datetime import datetime, timedelta
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+SLOT_ALIGNMENT_MINUTES = 15
+EARLIER_PENALTY = 500       # Slot starts before the requested time
+OFF_HOURS_PENALTY = 200     # Slot falls outside the user's work hours
+
+
+def merge_intervals(intervals: Iterable[Tuple[datetime, datetime]]) -> List[Tuple[datetime, datetime]]:
+    """Sort and merge overlapping (start, end) ranges."""
+    merged: List[Tuple[datetime, datetime]] = []
+    for start, end in sorted(intervals):
+        if merged and start < merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def iter_free_gaps(busy: List[Tuple[datetime, datetime]], start: datetime, end: datetime) -> Iterator[Tuple[datetime, datetime]]:
+    """Yield the free gaps in [start, end) between merged busy intervals, in time order."""
+    cursor = start
+    for b_start, b_end in busy:
+        if b_end <= cursor:
+            continue
+        if b_start >= end:
+            break
+        if b_start > cursor:
+            yield cursor, b_start
+        cursor = max(cursor, b_end)
+    if cursor < end:
+        yield cursor, end
+
+
+def _work_window(day: datetime, work_start_hour: int, work_end_hour: int) -> Tuple[datetime, datetime]:
+    w_start = day + timedelta(hours=work_start_hour)
+    w_end = day + timedelta(hours=work_end_hour)
+    if work_end_hour < work_start_hour:
+        w_end += timedelta(days=1)
+    return w_start, w_end
+
+
+def in_work_hours(start: datetime, duration: timedelta, work_start_hour: int, work_end_hour: int) -> bool:
+    day = start.replace(hour=0, minute=0, second=0, microsecond=0)
+    for d in (day, day - timedelta(days=1)):  # Overnight windows start the day before
+        w_start, w_end = _work_window(d, work_start_hour, work_end_hour)
+        if w_start <= start and start + duration <= w_end:
+            return True
+    return False
+
+
+def score_slot(start: datetime, duration: timedelta, anchor: datetime, work_start_hour: int = 8, work_end_hour: int = 22) -> float:
+    """Minutes away from the anchor, plus penalties for earlier or off-hours slots. Lower is better."""
+    diff = (start - anchor).total_seconds() / 60
+    penalty = 0
+    if diff < 0:
+        penalty += EARLIER_PENALTY
+    if not in_work_hours(start, duration, work_start_hour, work_end_hour):
+        penalty += OFF_HOURS_PENALTY
+    return abs(diff) + penalty
+
+
+def _align_up(dt: datetime) -> datetime:
+    dt_min = dt.replace(second=0, microsecond=0)
+    if dt_min < dt:
+        dt_min += timedelta(minutes=1)
+    rem = (dt_min.hour * 60 + dt_min.minute) % SLOT_ALIGNMENT_MINUTES
+    return dt_min + timedelta(minutes=(SLOT_ALIGNMENT_MINUTES - rem) % SLOT_ALIGNMENT_MINUTES)
+
+
+def _align_down(dt: datetime) -> datetime:
+    dt_min = dt.replace(second=0, microsecond=0)
+    rem = (dt_min.hour * 60 + dt_min.minute) % SLOT_ALIGNMENT_MINUTES
+    return dt_min - timedelta(minutes=rem)
+
+
+def _allowed_windows(anchor: datetime, horizon_days: int, work_start_hour: int, work_end_hour: int) -> Iterator[Tuple[datetime, datetime]]:
+    """The anchor's whole day, then each later day's work window, in time order."""
+    day = anchor.replace(hour=0, minute=0, second=0, microsecond=0)
+    yield day, day + timedelta(days=1)
+    for i in range(1, horizon_days + 1):
+        w_start, w_end = _work_window(day + timedelta(days=i), work_start_hour, work_end_hour)
+        # An overnight window may reach back into a day already covered in full
+        w_start = max(w_start, day + timedelta(days=1))
+        if w_start < w_end:
+            yield w_start, w_end
+
+
+def _intersect(a: Iterator[Tuple[datetime, datetime]], b: Iterator[Tuple[datetime, datetime]]) -> Iterator[Tuple[datetime, datetime]]:
+    """Intersect two time-ordered streams of disjoint intervals."""
+    x, y = next(a, None), next(b, None)
+    while x and y:
+        lo, hi = max(x[0], y[0]), min(x[1], y[1])
+        if lo < hi:
+            yield lo, hi
+        if x[1] <= y[1]:
+            x = next(a, None)
+        else:
+            y = next(b, None)
+
+
+class SlotSearch:
+    """
+    Lazy best-first slot search over a precomputed busy list.
+
+    `busy` are raw (start, end) ranges; they are padded by `buffer_minutes`
+    and merged once. Searching covers the anchor's day plus `horizon_days`.
+    """
+
+    def __init__(
+        self,
+        busy: Iterable[Tuple[datetime, datetime]],
+        anchor: datetime,
+        duration_minutes: int,
+        buffer_minutes: int = 15,
+        work_start_hour: int = 8,
+        work_end_hour: int = 22,
+        horizon_days: int = 14
+    ):
+        self.anchor = anchor
+        self.duration = timedelta(minutes=duration_minutes)
+        self.work_start_hour = work_start_hour
+        self.work_end_hour = work_end_hour
+        self.horizon_days = horizon_days
+        self.day_start = anchor.replace(hour=0, minute=0, second=0, microsecond=0)
+        # One extra day so an overnight work window on the last day is covered
+        self.search_end = self.day_start + timedelta(days=horizon_days + 2)
+        buffer = timedelta(minutes=buffer_minutes)
+        self.busy = merge_intervals((s - buffer, e + buffer) for s, e in busy)
+
+    def _pieces(self) -> Iterator[Tuple[datetime, datetime]]:
+        """Free, allowed pieces in time order; the anchor's day is split at work-hour boundaries."""
+        gaps = iter_free_gaps(self.busy, self.day_start, self.search_end)
+        windows = _allowed_windows(self.anchor, self.horizon_days, self.work_start_hour, self.work_end_hour)
+        w_start, w_end = _work_window(self.day_start, self.work_start_hour, self.work_end_hour)
+        day_end = self.day_start + timedelta(days=1)
+        cuts = sorted({t for t in (w_start, w_end) if self.day_start < t < day_end})
+        for lo, hi in _intersect(gaps, windows):
+            for cut in cuts:
+                if lo < cut < hi:
+                    yield lo, cut
+                    lo = cut
+            yield lo, hi
+
+    def _forward(self, pieces: List[Tuple[datetime, datetime]]) -> Iterator[Tuple[float, float, datetime]]:
+        """Every slot at/after the anchor, piece by piece in time order; bounds increase with time."""
+        step = timedelta(minutes=SLOT_ALIGNMENT_MINUTES)
+        for lo, hi in pieces:
+            start = _align_up(max(lo, self.anchor))
+            while start + self.duration <= hi:
+                bound = (start - self.anchor).total_seconds() / 60
+                yield bound, self._score(start), start
+                start += step
+
+    def _backward(self, pieces: List[Tuple[datetime, datetime]]) -> Iterator[Tuple[float, float, datetime]]:
+        """Every slot before the anchor in the same-day pieces, latest first; bounds increase going back in time."""
+        step = timedelta(minutes=SLOT_ALIGNMENT_MINUTES)
+        for lo, hi in reversed(pieces):
+            if lo >= self.anchor:
+                continue
+            start = _align_down(min(hi - self.duration, self.anchor - timedelta(microseconds=1)))
+            while start >= lo:
+                bound = EARLIER_PENALTY + (self.anchor - start).total_seconds() / 60
+                yield bound, self._score(start), start
+                start -= step
+
+    def _score(self, start: datetime) -> float:
+        return score_slot(start, self.duration, self.anchor, self.work_start_hour, self.work_end_hour)
+
+    def best(self, k: int = 1) -> List[Tuple[float, datetime]]:
+        """Return up to k (score, start) pairs, best first, stopping once the top k are certain."""
+        pieces = self._pieces()
+        day_end = self.day_start + timedelta(days=1)
+        # Only the anchor's own day is searched backwards; materialize just that part
+        same_day = []
+        head = None
+        for piece in pieces:
+            if piece[0] >= day_end:
+                head = piece
+                break
+            same_day.append(piece)
+        later = itertools.chain(same_day, [head] if head else [], pieces)
+
+        top: List[Tuple[float, int, datetime]] = []  # max-heap via negated score
+        seq = itertools.count()
+        for bound, score, start in heapq.merge(self._forward(later), self._backward(same_day), key=lambda c: c[0]):
+            if len(top) >= k and bound >= -top[0][0]:
+                break
+            entry = (-score, -next(seq), start)
+            if len(top) < k:
+                heapq.heappush(top, entry)
+            elif score < -top[0][0]:
+                heapq.heapreplace(top, entry)
+        return sorted(((-neg, start) for neg, _, start in top), key=lambda r: (r[0], r[1]))
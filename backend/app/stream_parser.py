@@ -0,0 +1,76 @@
+"""
+Streaming Parse Result Scanner
+==============================
+Incrementally scans the AIParseResult JSON as the model streams it, so each
+task, command or ambiguity can be turned into a candidate as soon as its
+object closes instead of after the whole completion.
+
+    scanner = ParseResultScanner()
+    for delta in stream:
+        for kind, item in scanner.feed(delta):
+            ...  # kind: "task" | "command" | "ambiguity"
+
+Only elements of the top-level "tasks", "commands" and "ambiguities" arrays
+are emitted, each exactly once and in order. The scanner tracks string and
+escape state, so braces inside titles don't confuse it. The final, validated
+result still comes from the complete completion.
+"""
+
+import json
+from typing import List, Tuple
+
+# Top-level array key -> emitted item kind
+ITEM_KINDS = {"tasks": "task", "commands": "command", "ambiguities": "ambiguity"}
+
+
+class ParseResultScanner:
+    def __init__(self):
+        self._text = ""
+        self._pos = 0             # Next character to scan
+        self._depth = 0           # Nesting of {} and []
+        self._in_string = False
+        self._escaped = False
+        self._string_start = 0
+        self._last_string = None  # Most recent string at depth 1: a key once ':' follows
+        self._key = None          # Top-level key whose value is being scanned
+        self._item_start = None   # Start of the array element being scanned
+
+    def feed(self, delta: str) -> List[Tuple[str, dict]]:
+        """Scan more of the completion. Returns the items completed by this delta."""
+        self._text += delta
+        items = []
+        text = self._text
+        for i in range(self._pos, len(text)):
+            ch = text[i]
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif ch == "\\":
+                    self._escaped = True
+                elif ch == '"':
+                    self._in_string = False
+                    if self._depth == 1:
+                        self._last_string = text[self._string_start + 1:i]
+                continue
+
+            if ch == '"':
+                self._in_string = True
+                self._string_start = i
+            elif ch == ":" and self._depth == 1:
+                self._key = self._last_string
+            elif ch in "{[":
+                self._depth += 1
+                if self._depth == 3 and ch == "{" and self._key in ITEM_KINDS:
+                    self._item_start = i
+            elif ch in "}]":
+                if self._depth == 3 and ch == "}" and self._item_start is not None:
+                    items.append((ITEM_KINDS[self._key], json.loads(text[self._item_start:i + 1])))
+                    self._item_start = None
+                self._depth -= 1
+        self._pos = len(text)
+        return items
+
+    @property
+    def text(self) -> str:
+        """Everything fed so far."""
+        return self._text
@@ -0,0 +1,101 @@
+"""
+Task Delta Sync
+===============
+Versioning behind GET /api/v1/tasks/changes.
+
+Every write to a task bumps its owner's `users.task_version` counter and
+stamps the task with the new value. Deletes leave a TaskTombstone carrying
+the version. A client holding cursor `v` then only needs rows with
+version > v, so a sync costs O(changes) instead of O(calendar).
+
+Stamping happens in a before_flush hook on every Session, so service code
+writes tasks as usual. Core bulk deletes bypass the hook and must call
+record_bulk_deletes() first (see retention.py).
+
+The counter row is updated, and therefore locked, inside the writing
+transaction, so each user's versions become visible in commit order.
+"""
+
+from collections import defaultdict
+from datetime import datetime
+from typing import Iterable, Tuple
+
+from sqlalchemy import event, select, update, insert, delete, func
+from sqlalchemy.orm import Session
+
+from .models import Task, TaskTombstone, User
+
+_users = User.__table__
+
+
+def bump_task_version(connection, user_id: int) -> int:
+    """Increment and return the user's task version counter."""
+    connection.execute(
+        update(_users).where(_users.c.id == user_id).values(task_version=_users.c.task_version + 1)
+    )
+    return connection.execute(select(_users.c.task_version).where(_users.c.id == user_id)).scalar_one()
+
+
+@event.listens_for(Session, "before_flush")
+def _stamp_task_versions(session, flush_context, instances):
+    changed = defaultdict(list)  # user_id -> [(task, is_delete)]
+    for task in session.new:
+        if isinstance(task, Task):
+            changed[task.user_id].append((task, False))
+    for task in session.dirty:
+        if isinstance(task, Task) and session.is_modified(task, include_collections=False):
+            changed[task.user_id].append((task, False))
+    for task in session.deleted:
+        if isinstance(task, Task):
+            changed[task.user_id].append((task, True))
+    changed.pop(None, None)
+    if not changed:
+        return
+
+    # Core statements on the session's connection, so they don't re-enter the flush
+    connection = session.connection()
+    for user_id, tasks in changed.items():
+        version = bump_task_version(connection, user_id)
+        for task, is_delete in tasks:
+            if is_delete:
+                session.add(TaskTombstone(user_id=user_id, task_id=task.id, version=version))
+            else:
+                task.version = version
+
+
+def record_bulk_deletes(db: Session, rows: Iterable[Tuple[int, int]]) -> None:
+    """Write tombstones for (task_id, user_id) rows about to be deleted with a Core DELETE."""
+    by_user = defaultdict(list)
+    for task_id, user_id in rows:
+        if user_id is not None:
+            by_user[user_id].append(task_id)
+
+    connection = db.connection()
+    for user_id, task_ids in by_user.items():
+        version = bump_task_version(connection, user_id)
+        connection.execute(insert(TaskTombstone.__table__), [
+            {"user_id": user_id, "task_id": task_id, "version": version, "deleted_at": datetime.utcnow()}
+            for task_id in task_ids
+        ])
+
+
+def prune_tombstones(db: Session, cutoff: datetime) -> int:
+    """
+    Delete tombstones older than cutoff. Each affected user's task_sync_floor is raised to the
+    highest pruned version, so clients with an older cursor get a full resync. Does not commit.
+    """
+    pruned = db.execute(
+        select(TaskTombstone.user_id, func.max(TaskTombstone.version))
+        .where(TaskTombstone.deleted_at < cutoff)
+        .group_by(TaskTombstone.user_id)
+    ).all()
+
+    total = 0
+    for user_id, floor in pruned:
+        db.execute(
+            update(_users).where(_users.c.id == user_id, _users.c.task_sync_floor < floor).values(task_sync_floor=floor)
+        )
+        total += db.execute(
+            delete(TaskTombstone).where(TaskTombstone.user_id == user_id, TaskTombstone.version <= floor)
+        ).rowcount
+    return total
@@ -0,0 +1,258 @@
+"""
+Template Cache
+==============
+LLM cache keyed on the *shape* of a request rather than its exact text and date.
+
+"gym tomorrow at 5pm" asked on Monday and "Gym tomorrow at 6pm" asked on
+Thursday by a user in another timezone need the same LLM reasoning; only the
+concrete numbers differ. This cache:
+
+1. Canonicalizes the text: unambiguous clock times ("5pm", "5:30 am",
+   "17:00") become {T0}, {T1}, ... and weekday names become {W0}, ...
+   Each time is flagged as already passed or still ahead of the user's
+   local time ("Missing dates -> tomorrow if time passed"), each weekday as
+   today or not. Relative words (today, tomorrow, next) stay literal: they
+   already mean the same thing relative to any date. Texts mentioning
+   weeks or months also key on the current weekday.
+2. Stores the LLM output as a template: every start/end time becomes
+   (date anchor, days after it, time placeholder, minute offset), where the
+   anchor is a weekday placeholder's date or the user's local date.
+   Clock times and weekday names in strings become placeholders too.
+3. Re-instantiates a template for a new date, placeholder values and
+   user_local_time offset.
+
+Requests with explicit calendar dates ("Feb 20", "3/14", "2026-05-01") are
+not templated; neither are outputs mentioning dates or clock times the
+template cannot account for. Those fall back to the exact-match llm_cache.
+"""
+
+import hashlib
+import json
+import logging
+import re
+from datetime import date, datetime, time, timedelta, timezone
+from typing import List, NamedTuple, Optional, Tuple
+
+from dateutil import parser as date_parser
+
+from .cache_backends import make_cache_backend
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+# Templates are date-independent, so they may live longer than exact entries
+template_cache = make_cache_backend("template", maxsize=1000, ttl=24 * 3600, max_bytes=settings.TEMPLATE_CACHE_MAX_BYTES)
+template_counters = {"stores": 0, "rejected": 0}
+
+# "5pm", "5:30 am", or 24h "13:00".."23:59" / "00:15". 12h times without am/pm are
+# ambiguous (the prompt asks the user), so they stay literal and are part of the key.
+TIME_RE = re.compile(
+    r'\b(\d{1,2})(?::([0-5]\d))?\s?(am|pm)\b|\b(1[3-9]|2[0-3]|00):([0-5]\d)\b',
+    re.IGNORECASE
+)
+# Any clock time at all, used to reject outputs with times the template can't place
+ANY_TIME_RE = re.compile(r'\b\d{1,2}(?::\d{2})?\s?(?:am|pm)\b|\b\d{1,2}:\d{2}\b', re.IGNORECASE)
+MONTHS = r'(january|february|march|april|may|june|july|august|september|october|november|december|jan|feb|mar|apr|jun|jul|aug|sep|sept|oct|nov|dec)'
+EXPLICIT_DATE_RE = re.compile(
+    rf'\b{MONTHS}\b|\b\d{{1,2}}/\d{{1,2}}\b|\b\d{{4}}-\d{{2}}-\d{{2}}|\b\d{{1,2}}(st|nd|rd|th)\b',
+    re.IGNORECASE
+)
+WEEKDAYS = ('monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday')
+WEEKDAY_RE = re.compile(rf"\b({'|'.join(WEEKDAYS)})\b", re.IGNORECASE)
+WEEK_RELATIVE_RE = re.compile(r'\b(week|weekend|month)s?\b', re.IGNORECASE)
+PLACEHOLDER_RE = re.compile(r'\{([TW])(\d+)\}')
+DATETIME_KEYS = ("start_time", "end_time")
+
+
+class _Reject(Exception):
+    """The output can't be expressed as a template."""
+
+
+class Slots(NamedTuple):
+    base: datetime                  # User's aware local "now"
+    times: List[Tuple[int, str]]    # {Ti}: minutes after midnight, surface text
+    days: List[date]                # {Wi}: the date the weekday name resolves to
+
+
+def _minutes(match: re.Match) -> int:
+    if match.group(3):
+        hour = int(match.group(1)) % 12
+        if match.group(3).lower() == "pm":
+            hour += 12
+        return hour * 60 + int(match.group(2) or 0)
+    return int(match.group(4)) * 60 + int(match.group(5))
+
+
+def _next_weekday(base: date, name: str) -> date:
+    """The next date (today included) falling on the named weekday."""
+    return base + timedelta(days=(WEEKDAYS.index(name.lower()) - base.weekday()) % 7)
+
+
+def canonicalize(text: str, user_local_time: Optional[str]) -> Optional[Tuple[str, Slots]]:
+    """Return (cache_key, slots), or None if the request can't be templated."""
+    if not user_local_time:
+        return None
+    try:
+        base = date_parser.isoparse(user_local_time)
+    except (ValueError, OverflowError):
+        return None
+    if base.tzinfo is None:
+        base = base.replace(tzinfo=timezone.utc)
+
+    normalized = " ".join(text.strip().split())
+    if EXPLICIT_DATE_RE.search(normalized):
+        return None
+
+    slots = Slots(base, [], [])
+
+    def time_placeholder(match: re.Match) -> str:
+        slots.times.append((_minutes(match), match.group(0)))
+        return f"{{T{len(slots.times) - 1}}}"
+
+    def day_placeholder(match: re.Match) -> str:
+        slots.days.append(_next_weekday(base.date(), match.group(0)))
+        return f"{{W{len(slots.days) - 1}}}"
+
+    canonical = WEEKDAY_RE.sub(day_placeholder, TIME_RE.sub(time_placeholder, normalized)).lower()
+    if not slots.times and not slots.days:
+        return None  # Nothing to generalize; the exact cache covers it
+
+    now_minutes = base.hour * 60 + base.minute
+    flags = "".join("p" if minutes <= now_minutes else "f" for minutes, _ in slots.times)
+    flags += "".join("t" if day == base.date() else "o" for day in slots.days)
+    weekday = str(base.weekday()) if WEEK_RELATIVE_RE.search(canonical) else ""
+    key = hashlib.md5(f"{canonical}|{flags}|{weekday}".encode()).hexdigest()
+    return key, slots
+
+
+def _template_datetime(value: str, slots: Slots) -> dict:
+    dt = date_parser.isoparse(value)
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)  # Backend convention: naive means UTC
+    local = dt.astimezone(slots.base.tzinfo)
+    if local.second or local.microsecond:
+        raise _Reject()
+
+    # Anchor to the weekday the user named when the date falls on it, else to "today"
+    anchor = None
+    anchor_date = slots.base.date()
+    for i, day in enumerate(slots.days):
+        if day == local.date():
+            anchor, anchor_date = i, day
+            break
+    day_offset = (local.date() - anchor_date).days
+
+    # Prefer an exact time placeholder, else the closest one it follows (an end derived from a start)
+    tod = local.hour * 60 + local.minute
+    best = None
+    for i, (minutes, _) in enumerate(slots.times):
+        delta = tod - minutes
+        if delta == 0:
+            return {"__dt__": [anchor, day_offset, i, 0]}
+        if 0 < delta <= 12 * 60 and (best is None or delta < best[1]):
+            best = (i, delta)
+    if best:
+        return {"__dt__": [anchor, day_offset, best[0], best[1]]}
+    return {"__dt__": [anchor, day_offset, None, tod]}
+
+
+def _template_string(value: str, slots: Slots) -> str:
+    def time_placeholder(match: re.Match) -> str:
+        minutes = _minutes(match)
+        for i, (slot_minutes, _) in enumerate(slots.times):
+            if slot_minutes == minutes:
+                return f"{{T{i}}}"
+        raise _Reject()
+
+    def day_placeholder(match: re.Match) -> str:
+        weekday = WEEKDAYS.index(match.group(0).lower())
+        for i, day in enumerate(slots.days):
+            if day.weekday() == weekday:
+                return f"{{W{i}}}"
+        raise _Reject()
+
+    templated = WEEKDAY_RE.sub(day_placeholder, TIME_RE.sub(time_placeholder, value))
+    if ANY_TIME_RE.search(templated) or EXPLICIT_DATE_RE.search(templated):
+        raise _Reject()
+    return templated
+
+
+def _build(node, slots: Slots):
+    if isinstance(node, dict):
+        out = {}
+        for key, value in node.items():
+            if key == "reasoning":
+                continue
+            if key in DATETIME_KEYS and isinstance(value, str) and value:
+                out[key] = _template_datetime(value, slots)
+            elif key == "value" and isinstance(value, str) and value.lstrip().startswith("{"):
+                # Ambiguity options carry task parameters as a JSON string
+                out[key] = {"__json__": _build(json.loads(value), slots)}
+            else:
+                out[key] = _build(value, slots)
+        return out
+    if isinstance(node, list):
+        return [_build(item, slots) for item in node]
+    if isinstance(node, str):
+        if PLACEHOLDER_RE.search(node):
+            # Model text that looks like a placeholder would be filled (or fail) on every hit
+            raise _Reject()
+        return _template_string(node, slots)
+    return node
+
+
+def _instantiate(node, slots: Slots):
+    if isinstance(node, dict):
+        if "__dt__" in node:
+            anchor, day_offset, ref, value = node["__dt__"]
+            anchor_date = slots.base.date() if anchor is None else slots.days[anchor]
+            minutes = value if ref is None else slots.times[ref][0] + value
+            local = datetime.combine(anchor_date, time.min, tzinfo=slots.base.tzinfo) + timedelta(days=day_offset, minutes=minutes)
+            return local.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+        if "__json__" in node:
+            return json.dumps(_instantiate(node["__json__"], slots))
+        return {key: _instantiate(value, slots) for key, value in node.items()}
+    if isinstance(node, list):
+        return [_instantiate(item, slots) for item in node]
+    if isinstance(node, str):
+        def fill(match: re.Match) -> str:
+            index = int(match.group(2))
+            if match.group(1) == "T":
+                return slots.times[index][1]
+            return WEEKDAYS[slots.days[index].weekday()].capitalize()
+        return PLACEHOLDER_RE.sub(fill, node)
+    return node
+
+
+def get_templated_response(text: str, user_local_time: Optional[str]) -> Optional[dict]:
+    """A cached template instantiated for this text and local time, or None."""
+    canonical = canonicalize(text, user_local_time)
+    if not canonical:
+        return None
+    key, slots = canonical
+    template = template_cache.get(key)
+    if template is None:
+        return None
+    logger.info(f"LLM Template Cache HIT for key {key[:8]}...")
+    result = _instantiate(template, slots)
+    result["reasoning"] = "Momentra Template Cache"
+    return result
+
+
+def cache_template(text: str, user_local_time: Optional[str], response: dict) -> bool:
+    """Store an LLM response as a template if it generalizes. Returns whether it was stored."""
+    canonical = canonicalize(text, user_local_time)
+    if not canonical:
+        return False
+    key, slots = canonical
+    try:
+        template_cache.set(key, _build(response, slots))
+    except (_Reject, ValueError, OverflowError, TypeError):
+        template_counters["rejected"] += 1
+        return False
+    template_counters["stores"] += 1
+    return True
+
+
+def get_template_stats() -> dict:
+    return {**template_cache.stats(), **template_counters}
@@ -0,0 +1,148 @@
+"""
+Daily Usage Rollup
+==================
+Per (day, model, feature, user) totals of LLM usage, so the admin dashboard
+never aggregates the ever-growing token_logs table.
+
+record_usage() folds a batch of TokenLog rows into usage_daily_rollup in the
+same transaction that inserts them (TokenLogWriter.write), so the rollup
+can't drift from the log. Latency and tokens-per-call histograms (see
+latency_sketch) go to usage_daily_histogram, one counter per bucket, so
+percentiles over any window of days need no scan of token_logs either.
+Rows are upserted with INSERT ... ON CONFLICT DO UPDATE on PostgreSQL and
+SQLite; other databases read-modify-write. Both tables are backfilled from
+existing history by their migrations.
+
+Anonymous usage (no user) is rolled up under user_id 0.
+"""
+
+from datetime import date, datetime, timedelta
+from typing import Iterable, Optional
+
+from sqlalchemy import distinct, func
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from .latency_sketch import LogHistogram
+from .models import UsageDailyHistogram, UsageDailyRollup
+
+ANONYMOUS_USER_ID = 0
+SUMMED_COLUMNS = ("requests", "prompt_tokens", "completion_tokens", "total_tokens", "cost_usd", "latency_ms_sum")
+ROLLUP_KEY = ("day", "model", "feature", "user_id")
+HISTOGRAM_KEY = ("day", "model", "feature", "metric", "bucket")
+HISTOGRAM_METRICS = {"latency_ms": "latency_ms", "tokens": "total_tokens"}  # metric -> TokenLog field
+UPSERT_DIALECTS = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+
+
+def record_usage(db: Session, rows: Iterable[dict]) -> None:
+    """Add TokenLog rows (as dicts) to the rollup and histograms. The caller commits."""
+    totals = {}
+    sketches = {}  # (day, model, feature, metric) -> LogHistogram for this batch
+    for row in rows:
+        day = (row.get("timestamp") or datetime.utcnow()).date()
+        model = row.get("model") or "unknown"
+        key = (day, model, row["feature"], row.get("user_id") or ANONYMOUS_USER_ID)
+        t = totals.setdefault(key, dict.fromkeys(SUMMED_COLUMNS, 0))
+        t["requests"] += 1
+        t["prompt_tokens"] += row.get("prompt_tokens") or 0
+        t["completion_tokens"] += row.get("completion_tokens") or 0
+        t["total_tokens"] += row.get("total_tokens") or 0
+        t["cost_usd"] += row.get("cost_usd") or 0.0
+        t["latency_ms_sum"] += row.get("latency_ms") or 0.0
+        for metric, field in HISTOGRAM_METRICS.items():
+            sketches.setdefault((day, model, row["feature"], metric), LogHistogram()).add(row.get(field) or 0)
+    if not totals:
+        return
+
+    _add_counts(db, UsageDailyRollup, ROLLUP_KEY, SUMMED_COLUMNS, [
+        dict(zip(ROLLUP_KEY, key), **t) for key, t in totals.items()
+    ])
+    _add_counts(db, UsageDailyHistogram, HISTOGRAM_KEY, ("count",), [
+        dict(zip(HISTOGRAM_KEY, key + (bucket,)), count=count)
+        for key, sketch in sketches.items() for bucket, count in sketch.buckets.items()
+    ])
+
+
+def _add_counts(db: Session, table, key_columns: tuple, summed: tuple, values: list) -> None:
+    """Insert rows, or add their summed columns to the existing rows with the same key."""
+    upsert = UPSERT_DIALECTS.get(db.get_bind().dialect.name)
+    if upsert:
+        stmt = upsert(table)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=list(key_columns),
+            set_={c: getattr(table, c) + getattr(stmt.excluded, c) for c in summed}
+        )
+        db.execute(stmt, values)
+        return
+
+    for v in values:
+        existing = db.get(table, tuple(v[c] for c in key_columns))
+        if existing is None:
+            db.add(table(**v))
+        else:
+            for c in summed:
+                setattr(existing, c, getattr(existing, c) + v[c])
+    db.flush()
+
+
+def usage_percentiles(db: Session, days: int, quantiles=(0.5, 0.9, 0.99), today: Optional[date] = None) -> dict:
+    """Latency and tokens-per-call percentiles over the last `days` days, overall and per model and feature."""
+    today = today or datetime.utcnow().date()
+    H = UsageDailyHistogram
+    counts = db.query(H.model, H.feature, H.metric, H.bucket, func.sum(H.count)).filter(
+        H.day >= today - timedelta(days=days - 1)
+    ).group_by(H.model, H.feature, H.metric, H.bucket).all()
+
+    overall = {metric: LogHistogram() for metric in HISTOGRAM_METRICS}
+    groups = {}
+    for model, feature, metric, bucket, count in counts:
+        groups.setdefault((model, feature), {m: LogHistogram() for m in HISTOGRAM_METRICS})[metric].add_bucket(bucket, count)
+        overall[metric].add_bucket(bucket, count)
+
+    def describe(sketches):
+        return {
+            "calls": sketches["latency_ms"].count,
+            "latency_ms": sketches["latency_ms"].summary(quantiles),
+            "tokens_per_call": sketches["tokens"].summary(quantiles)
+        }
+
+    return {
+        "window_days": days,
+        "overall": describe(overall),
+        "by_model_feature": [
+            {"model": model, "feature": feature, **describe(sketches)}
+            for (model, feature), sketches in sorted(groups.items())
+        ]
+    }
+
+
+def usage_summary(db: Session, daily_days: int = 14, active_days: int = 30, today: Optional[date] = None) -> dict:
+    """Totals, cost by model, active users and recent daily totals, all from the rollup."""
+    today = today or datetime.utcnow().date()
+    R = UsageDailyRollup
+
+    totals = db.query(func.sum(R.cost_usd), func.sum(R.requests), func.sum(R.latency_ms_sum)).first()
+    total_cost, total_requests, latency_sum = totals[0] or 0.0, totals[1] or 0, totals[2] or 0.0
+
+    active_users = db.query(func.count(distinct(R.user_id))).filter(
+        R.day >= today - timedelta(days=active_days),
+        R.user_id != ANONYMOUS_USER_ID
+    ).scalar() or 0
+
+    by_model = db.query(R.model, func.sum(R.cost_usd), func.sum(R.requests)).group_by(R.model).all()
+
+    daily = db.query(R.day, func.sum(R.cost_usd), func.sum(R.requests)).filter(
+        R.day >= today - timedelta(days=daily_days)
+    ).group_by(R.day).order_by(R.day.desc()).all()
+
+    return {
+        "total_cost_usd": total_cost,
+        "total_requests": total_requests,
+        "avg_latency_ms": latency_sum / total_requests if total_requests else 0.0,
+        "active_users": active_users,
+        "model_usage": [{"model": m, "cost": round(cost or 0, 4), "calls": calls or 0} for m, cost, calls in by_model],
+        "daily_stats": [
+            {"date": str(day), "total_cost": round(cost or 0, 4), "total_requests": requests or 0}
+            for day, cost, requests in daily
+        ]
+    }
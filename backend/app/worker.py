@@ -0,0 +1,251 @@
+"""
+Parse Worker
+============
+Out-of-process job parsing, so LLM bursts don't compete with calendar reads
+in the API workers.
+
+With PARSE_QUEUE_BACKEND=database, `POST /jobs/{id}/parse?async=true` only
+marks the job QUEUED. Any number of worker processes, on any hosts sharing
+the database, drain the jobs table:
+
+    python -m app.worker [--threads N] [--poll-interval S] [--once]
+
+Each loop claims the oldest QUEUED job (PostgreSQL/MySQL: SELECT ... FOR
+UPDATE SKIP LOCKED, so workers never wait on each other; SQLite: a
+compare-and-set UPDATE, SQLite serializing writers anyway), marks it
+PARSING and runs JobService.parse_job. A job claimed longer than
+PARSE_CLAIM_TIMEOUT_SECONDS ago (its worker died) is queued again; every
+loop checks for those once per PARSE_WORKER_HEARTBEAT_SECONDS, busy or idle.
+
+Every loop keeps a `parse_workers` row with a heartbeat and counters;
+get_queue_stats() turns them into queue depth and per-worker throughput
+for GET /api/v1/queue-stats.
+"""
+
+import argparse
+import logging
+import os
+import signal
+import socket
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Callable, Optional, Tuple
+
+from sqlalchemy import func, select, update
+from sqlalchemy.orm import Session
+
+from .config import settings
+from .database import SessionLocal
+from .job_stats import record_status_moves
+from .llm_tracking import token_log_writer
+from .models import Job, ParseWorker
+from .schemas import JobStatus
+
+logger = logging.getLogger(__name__)
+
+SKIP_LOCKED_DIALECTS = ("postgresql", "mysql")
+
+
+def claim_next_job(db: Session, worker_id: str) -> Optional[Tuple[int, int]]:
+    """Claim the oldest queued job for worker_id. Returns (job_id, user_id), or None if the queue is empty."""
+    now = datetime.utcnow()
+    oldest = select(Job).where(Job.status == JobStatus.QUEUED).order_by(Job.queued_at, Job.id).limit(1)
+
+    if db.get_bind().dialect.name in SKIP_LOCKED_DIALECTS:
+        job = db.execute(oldest.with_for_update(skip_locked=True)).scalar_one_or_none()
+        if job is None:
+            db.rollback()
+            return None
+        job.status = JobStatus.PARSING
+        job.claimed_by = worker_id
+        job.claimed_at = now
+        claimed = (job.id, job.user_id)
+        db.commit()
+        return claimed
+
+    # No row locks: pick a candidate, then claim it only if nobody else did in between
+    for _ in range(5):
+        row = db.execute(select(Job.id, Job.user_id).where(Job.status == JobStatus.QUEUED)
+                         .order_by(Job.queued_at, Job.id).limit(1)).first()
+        if row is None:
+            db.rollback()
+            return None
+        won = db.execute(
+            update(Job).where(Job.id == row.id, Job.status == JobStatus.QUEUED)
+            .values(status=JobStatus.PARSING, claimed_by=worker_id, claimed_at=now)
+        ).rowcount == 1
+        if won:
+            record_status_moves(db, {JobStatus.QUEUED: -1, JobStatus.PARSING: 1})
+        db.commit()
+        if won:
+            return row.id, row.user_id
+    return None
+
+
+def requeue_stale_jobs(db: Session, timeout_seconds: Optional[int] = None) -> int:
+    """Put jobs whose worker stopped answering back in the queue. Returns how many."""
+    if timeout_seconds is None:
+        timeout_seconds = settings.PARSE_CLAIM_TIMEOUT_SECONDS
+    cutoff = datetime.utcnow() - timedelta(seconds=timeout_seconds)
+    count = db.execute(
+        update(Job).where(Job.status == JobStatus.PARSING, Job.claimed_by.isnot(None), Job.claimed_at < cutoff)
+        .values(status=JobStatus.QUEUED, claimed_by=None, claimed_at=None)
+    ).rowcount
+    if count:
+        record_status_moves(db, {JobStatus.PARSING: -count, JobStatus.QUEUED: count})
+    db.commit()
+    if count:
+        logger.warning(f"Requeued {count} jobs claimed more than {timeout_seconds}s ago")
+    return count
+
+
+class Worker:
+    """One claim-and-parse loop with its own session and parse_workers row."""
+
+    def __init__(self, session_factory: Callable[[], Session] = SessionLocal, worker_id: Optional[str] = None,
+                 poll_interval: float = 1.0):
+        self.session_factory = session_factory
+        self.id = worker_id or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+        self.poll_interval = poll_interval
+        self._last_heartbeat = 0.0
+        self._last_requeue = 0.0
+
+    def register(self) -> None:
+        with self.session_factory() as db:
+            db.merge(ParseWorker(id=self.id, hostname=socket.gethostname(), pid=os.getpid(),
+                                 started_at=datetime.utcnow(), last_heartbeat=datetime.utcnow()))
+            db.commit()
+
+    def unregister(self) -> None:
+        with self.session_factory() as db:
+            db.query(ParseWorker).filter(ParseWorker.id == self.id).delete()
+            db.commit()
+
+    def _record(self, db: Session, parsed: int = 0, failed: int = 0, busy_seconds: float = 0.0) -> None:
+        db.execute(
+            update(ParseWorker).where(ParseWorker.id == self.id).values(
+                last_heartbeat=datetime.utcnow(),
+                jobs_parsed=ParseWorker.jobs_parsed + parsed,
+                jobs_failed=ParseWorker.jobs_failed + failed,
+                busy_seconds=ParseWorker.busy_seconds + busy_seconds
+            )
+        )
+        db.commit()
+        self._last_heartbeat = time.monotonic()
+
+    def run_once(self) -> bool:
+        """Claim and parse one job. Returns False when the queue was empty."""
+        from .services import JobService
+
+        with self.session_factory() as db:
+            if time.monotonic() - self._last_requeue >= settings.PARSE_WORKER_HEARTBEAT_SECONDS:
+                requeue_stale_jobs(db)
+                self._last_requeue = time.monotonic()
+
+            claimed = claim_next_job(db, self.id)
+            if claimed is None:
+                if time.monotonic() - self._last_heartbeat >= settings.PARSE_WORKER_HEARTBEAT_SECONDS:
+                    self._record(db)
+                return False
+
+            job_id, user_id = claimed
+            started = time.monotonic()
+            service = JobService(db)
+            try:
+                count = service.parse_job(job_id, user_id)
+                logger.info(f"Worker {self.id} parsed job {job_id} into {count} candidates")
+                self._record(db, parsed=1, busy_seconds=time.monotonic() - started)
+            except Exception as e:
+                logger.error(f"Worker {self.id} failed to parse job {job_id}: {e}", exc_info=True)
+                service.fail_parse(job_id, user_id)
+                self._record(db, failed=1, busy_seconds=time.monotonic() - started)
+            return True
+
+    def run(self, stop: threading.Event) -> None:
+        self.register()
+        try:
+            while not stop.is_set():
+                if not self.run_once():
+                    stop.wait(self.poll_interval)
+        finally:
+            self.unregister()
+
+
+def get_queue_stats(db: Session) -> dict:
+    """Queue depth and per-worker throughput for monitoring."""
+    now = datetime.utcnow()
+    counts = dict(
+        db.query(Job.status, func.count(Job.id))
+        .filter(Job.status.in_([JobStatus.QUEUED, JobStatus.PARSING]))
+        .group_by(Job.status).all()
+    )
+    oldest = db.query(func.min(Job.queued_at)).filter(Job.status == JobStatus.QUEUED).scalar()
+
+    workers = []
+    for w in db.query(ParseWorker).order_by(ParseWorker.started_at).all():
+        uptime = max((w.last_heartbeat - w.started_at).total_seconds(), 1.0)
+        done = w.jobs_parsed + w.jobs_failed
+        workers.append({
+            "id": w.id,
+            "alive": (now - w.last_heartbeat).total_seconds() < 3 * settings.PARSE_WORKER_HEARTBEAT_SECONDS,
+            "last_heartbeat": w.last_heartbeat.isoformat() + "Z",
+            "jobs_parsed": w.jobs_parsed,
+            "jobs_failed": w.jobs_failed,
+            "jobs_per_minute": round(done * 60 / uptime, 2),
+            "mean_parse_seconds": round(w.busy_seconds / done, 3) if done else 0.0,
+            "utilization": round(min(w.busy_seconds / uptime, 1.0), 3)
+        })
+
+    return {
+        "backend": settings.PARSE_QUEUE_BACKEND,
+        "depth": counts.get(JobStatus.QUEUED, 0),
+        "in_progress": counts.get(JobStatus.PARSING, 0),
+        "oldest_queued_seconds": round((now - oldest).total_seconds(), 1) if oldest else 0.0,
+        "workers": workers
+    }
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Parse queued jobs from the database.")
+    parser.add_argument("--threads", type=int, default=1, help="Claim-and-parse loops in this process")
+    parser.add_argument("--poll-interval", type=float, default=1.0, help="Seconds to wait when the queue is empty")
+    parser.add_argument("--once", action="store_true", help="Drain the queue once and exit")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    token_log_writer.start()
+    try:
+        _run_workers(args)
+    finally:
+        token_log_writer.stop()
+
+
+def _run_workers(args) -> None:
+    if args.once:
+        worker = Worker(poll_interval=args.poll_interval)
+        worker.register()
+        try:
+            while worker.run_once():
+                pass
+        finally:
+            worker.unregister()
+        return
+
+    stop = threading.Event()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(sig, lambda *_: stop.set())
+
+    loops = [threading.Thread(target=Worker(poll_interval=args.poll_interval).run, args=(stop,), daemon=True)
+             for _ in range(args.threads)]
+    for t in loops:
+        t.start()
+    logger.info(f"Parse worker started with {args.threads} loop(s)")
+    while any(t.is_alive() for t in loops):
+        for t in loops:
+            t.join(timeout=1.0)
+
+
+if __name__ == "__main__":
+    main()
@@ -31,6 +31,7 @@ function App() {
   // Calendar State (Home Screen)
   const [selectedDate, setSelectedDate] = useState(new Date())
   const [calendarTasks, setCalendarTasks] = useState([])
+  const syncCursorRef = useRef(null) // Delta sync cursor for calendarTasks
 
   // Unified Edit Modal State
   const [editModal, setEditModal] = useState({
@@ -243,6 +244,7 @@ function App() {
     clearTokens();
     setUser('');
     setCalendarTasks([]);
+    syncCursorRef.current = null;
   }
 
   const handleSelectTemplate = (text) => {
@@ -252,25 +254,23 @@ function App() {
 
   const fetchCalendarTasks = async () => {
     try {
-      // Fetch from 7 days ago to 60 days in future to ensure we don't have "ghost" events
-      // that exist in the DB but are just outside our window.
-      const start = new Date();
-      start.setDate(start.getDate() - 7);
-      start.setHours(0, 0, 0, 0);
+      // Delta sync: only tasks changed or deleted since the last cursor come back.
+      // The first call (or an expired cursor) returns everything with reset=true.
+      const { changes, deleted, cursor, reset } = await jobService.getTaskChanges(syncCursorRef.current);
+      console.log("Synced calendar tasks:", changes.length, "changed,", deleted.length, "deleted", reset ? "(full)" : "");
 
-      const end = new Date();
-      end.setDate(end.getDate() + 60);
-      end.setHours(23, 59, 59, 999);
-
-      const tasks = await jobService.getTasks(start.toISOString(), end.toISOString());
-      console.log("Fetched calendar tasks:", tasks.length);
-
-      const normalized = tasks.map(t => ({
+      const normalized = changes.map(t => ({
         ...t,
         start_time: normalizeToUTC(t.start_time),
         end_time: normalizeToUTC(t.end_time)
       }));
-      setCalendarTasks(normalized);
+      setCalendarTasks(prev => {
+        const byId = new Map(reset ? [] : prev.map(t => [t.id, t]));
+        deleted.forEach(id => byId.delete(id));
+        normalized.forEach(t => byId.set(t.id, t));
+        return [...byId.values()].sort((a, b) => new Date(a.start_time) - new Date(b.start_time));
+      });
+      syncCursorRef.current = cursor;
     } catch (e) {
       console.error("Failed to fetch tasks", e);
     }
@@ -365,6 +365,19 @@ function App() {
     setStatus('preview');
   }
 
+  const loadSuggestion = async (candidateId) => {
+    try {
+      const { option } = await jobService.getCandidateSuggestion(candidateId);
+      setCandidates(prev => prev.map(c => {
+        if (c.id !== candidateId) return c;
+        const options = option ? [option, ...(c.parameters.options || [])] : c.parameters.options;
+        return { ...c, parameters: { ...c.parameters, options, suggestion_pending: false } };
+      }));
+    } catch (e) {
+      console.error("Failed to load suggestion", e);
+    }
+  }
+
   const finalizeAcceptance = async (candidateIds, force = false) => {
     try {
       const ids = Array.isArray(candidateIds) ? candidateIds : [candidateIds];
@@ -1037,6 +1050,12 @@ function App() {
                                 : candidate.parameters.message}
                             </h4>
                             <div className="ambiguity-opts">
+                              {/* Suggestions are computed on demand by the backend */}
+                              {candidate.parameters.suggestion_pending && (
+                                <button className="ambiguity-btn btn-icon-suggested" onClick={() => loadSuggestion(candidate.id)}>
+                                  <span>Find a free time</span>
+                                </button>
+                              )}
                               {candidate.parameters.options?.map((opt, i) => {
                                 let label = opt.label;
                                 let btnClass = "ambiguity-btn";
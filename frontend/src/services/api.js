@@ -190,6 +190,11 @@ export const jobService = {
         return response.data;
     },
 
+    getCandidateSuggestion: async (candidateId) => {
+        const response = await api.get(`/candidates/${candidateId}/suggestion`);
+        return response.data;
+    },
+
     deleteJobCandidate: async (candidateId) => {
         await api.delete(`/candidates/${candidateId}`);
         return true;
@@ -221,6 +226,13 @@ export const jobService = {
         return response.data;
     },
 
+    getTaskChanges: async (since) => {
+        const response = await api.get('/tasks/changes', {
+            params: since ? { since } : {}
+        });
+        return response.data;
+    },
+
     updateTask: async (id, updateData) => {
         const response = await api.patch(`/tasks/${id}`, updateData);
         return response.data;
@@ -230,6 +242,17 @@ export const jobService = {
         await api.delete(`/tasks/${id}`);
     },
 
+    getSlots: async (near, durationMinutes, k = 3) => {
+        const response = await api.get('/slots', {
+            params: {
+                near,
+                duration: durationMinutes,
+                k
+            }
+        });
+        return response.data;
+    },
+
     getPreferences: async () => {
         const response = await api.get('/preferences');
         return response.data;
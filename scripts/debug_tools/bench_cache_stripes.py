@@ -0,0 +1,32 @@
+"""
+Throughput of the in-process cache with one lock vs striped locks, using the
+mixed workload from tests/backend/test_cache_stress.py.
+
+Run from the repository root:
+    DATABASE_URL=sqlite:// OPENAI_API_KEY=x python scripts/debug_tools/bench_cache_stripes.py
+"""
+
+import os
+import sys
+
+# Ensure we can import from backend and the stress test
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.join(project_root, 'backend'))
+sys.path.append(os.path.join(project_root, 'tests', 'backend'))
+
+from app.cache_backends import InProcessCache
+from test_cache_stress import THREADS, hammer
+
+OPS = 20000
+
+
+def main():
+    for stripes in (1, 16):
+        cache = InProcessCache("bench", maxsize=1000, ttl=3600, stripes=stripes)
+        gets, errors, seconds = hammer(cache, ops=OPS)
+        total = THREADS * OPS
+        print(f"stripes={stripes:>2}: {total / seconds:,.0f} ops/s, hit ratio {cache.stats()['hit_ratio']}, errors {len(errors)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -9,6 +9,7 @@ os.environ.setdefault("GOOGLE_CLIENT_ID", "test-client-id-conftest")
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
 
 from app.main import app
 from app.database import get_db, Base
@@ -17,8 +18,10 @@ from app.config import settings
 # Use in-memory SQLite for testing
 SQLALCHEMY_DATABASE_URL = "sqlite:///:memory:"
 
+# StaticPool shares the single in-memory connection, so TestClient request threads
+# see the same tables and rows as db_session
 engine = create_engine(
-    SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
+    SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}, poolclass=StaticPool
 )
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
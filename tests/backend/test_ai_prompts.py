@@ -1,5 +1,6 @@
+import asyncio
 import pytest
-from unittest.mock import MagicMock, patch
+from unittest.mock import AsyncMock, MagicMock, patch
 from app.llm_adapter import LLMAdapter, AIParseResult, AICandidate, AICommand, AIAmbiguity
 
 @pytest.fixture
@@ -61,3 +62,22 @@ def test_parse_text_ambiguity(mock_openai_client):
 
     assert len(result["ambiguities"]) == 1
     assert result["ambiguities"][0]["title"] == "Dinner"
+
+def test_parse_text_async(mock_openai_client):
+    mock_completion = MagicMock()
+    mock_completion.usage = None
+    mock_completion.choices[0].message.parsed = AIParseResult(
+        reasoning="Async reasoning",
+        tasks=[AICandidate(title="Async Task", start_time="2026-01-02T09:00:00Z", confidence=0.8)],
+        commands=[],
+        ambiguities=[]
+    )
+
+    with patch("app.llm_adapter.async_client") as mock_async_client:
+        mock_async_client.beta.chat.completions.parse = AsyncMock(return_value=mock_completion)
+        result = asyncio.run(LLMAdapter().parse_text_async("Plan an async task"))
+
+    assert result["tasks"][0]["title"] == "Async Task"
+    mock_async_client.beta.chat.completions.parse.assert_awaited_once()
+    # The blocking client is not touched on the async path
+    mock_openai_client.beta.chat.completions.parse.assert_not_called()
@@ -0,0 +1,165 @@
+import threading
+import pytest
+
+from app.cache_backends import CacheBackend, InProcessCache, SQLiteCache, make_cache_backend, encode_value, decode_value
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def make_backend(request, tmp_path):
+    clock = FakeClock()
+
+    def make(maxsize=3, ttl=60, name="test", max_bytes=1024 * 1024):
+        if request.param == "memory":
+            return InProcessCache(name, maxsize, ttl, max_bytes=max_bytes, timer=clock)
+        return SQLiteCache(name, maxsize, ttl, path=str(tmp_path / "cache.db"), max_bytes=max_bytes, timer=clock)
+
+    make.clock = clock
+    return make
+
+
+def test_get_set_and_stats(make_backend):
+    cache = make_backend()
+    assert cache.get("a") is None
+    cache.set("a", {"tasks": [1, 2]})
+    assert cache.get("a") == {"tasks": [1, 2]}
+    assert "a" in cache
+
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["hit_ratio"] == 0.5
+    assert stats["current_size"] == 1
+
+
+def test_ttl_expiry(make_backend):
+    cache = make_backend(ttl=60)
+    cache.set("a", "x")
+    make_backend.clock.now += 61
+    assert cache.get("a") is None
+    assert len(cache) == 0
+    cache.set("b", "y")
+    assert cache.stats()["expirations"] == 1
+
+
+def test_size_limit(make_backend):
+    cache = make_backend(maxsize=3)
+    for i in range(5):
+        make_backend.clock.now += 1
+        cache.set(f"k{i}", i)
+    # In-process eviction is per shard, so only the bound and the newest entry are certain
+    assert len(cache) <= 3
+    assert cache.peek("k4") == 4
+
+
+def test_sqlite_evicts_oldest(tmp_path):
+    cache = SQLiteCache("test", 3, 60, path=str(tmp_path / "cache.db"))
+    for i in range(5):
+        cache.set(f"k{i}", i)
+    assert len(cache) == 3
+    assert cache.peek("k0") is None
+
+
+def test_byte_budget(tmp_path):
+    # One shard, so the in-process budget is exact
+    clock = FakeClock()
+    big = {"text": "x" * 10 + "".join(str(i) for i in range(400))}  # ~1.1 KB, compresses poorly
+    size = len(encode_value(big))
+    for cache in (
+        InProcessCache("test", 100, 60, max_bytes=size * 3, timer=clock, stripes=1),
+        SQLiteCache("test", 100, 60, path=str(tmp_path / "cache.db"), max_bytes=size * 3, timer=clock)
+    ):
+        for i in range(5):
+            clock.now += 1
+            cache.set(f"k{i}", big)
+        stats = cache.stats()
+        assert stats["current_size"] == 3
+        assert stats["evictions"] == 2
+        assert stats["bytes_in_use"] == size * 3
+        assert stats["mean_entry_bytes"] == size
+        assert cache.peek("k0") is None
+        assert cache.peek("k4") == big
+
+
+def test_values_are_stored_compressed():
+    response = {"tasks": [{"title": "Gym", "description": "gym tomorrow at 5pm " * 20}], "commands": [], "ambiguities": []}
+    blob = encode_value(response)
+    assert blob[:1] == b"z"
+    assert len(blob) < len(str(response))
+    assert decode_value(blob) == response
+    # Tiny values aren't worth compressing
+    assert encode_value("hi")[:1] == b"j"
+    assert decode_value(encode_value("hi")) == "hi"
+
+
+def test_oversized_entry_is_not_cached():
+    cache = InProcessCache("test", 10, 60, max_bytes=64, stripes=1)
+    cache.set("big", "x" * 1000 + "".join(str(i) for i in range(100)))
+    assert cache.peek("big") is None
+    assert cache.stats()["evictions"] == 1
+
+
+def test_set_if_absent(make_backend):
+    cache = make_backend(ttl=60)
+    assert cache.set_if_absent("a", 1)
+    assert not cache.set_if_absent("a", 2)
+    assert cache.peek("a") == 1
+    # An expired entry counts as absent
+    make_backend.clock.now += 61
+    assert cache.set_if_absent("a", 3)
+    assert cache.peek("a") == 3
+
+
+def test_set_if_absent_is_atomic(make_backend):
+    cache = make_backend(maxsize=100)
+    winners = []
+
+    def claim(i):
+        if cache.set_if_absent("lock", i):
+            winners.append(i)
+
+    threads = [threading.Thread(target=claim, args=(i,)) for i in range(16)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(winners) == 1
+
+
+def test_sqlite_is_shared_between_instances(tmp_path):
+    # Two workers on one host open the same file
+    path = str(tmp_path / "shared.db")
+    worker_a = SQLiteCache("llm", 10, 60, path=path)
+    worker_b = SQLiteCache("llm", 10, 60, path=path)
+    other = SQLiteCache("transcription", 10, 60, path=path)
+
+    worker_a.set("key", {"tasks": []})
+    assert worker_b.get("key") == {"tasks": []}
+    assert other.get("key") is None
+    worker_b.clear()
+    assert worker_a.peek("key") is None
+
+
+def test_unknown_backend():
+    with pytest.raises(ValueError):
+        make_cache_backend("llm", 10, 60, backend="memcached")
+
+
+def test_incomplete_backend_fails_on_creation():
+    class NoDelete(CacheBackend):
+        def peek(self, key): return None
+        def set(self, key, value): pass
+        def set_if_absent(self, key, value): return False
+        def clear(self): pass
+        def bytes_in_use(self): return 0
+        def __len__(self): return 0
+
+    with pytest.raises(TypeError, match="delete"):
+        NoDelete("incomplete", 3, 60, 1024)
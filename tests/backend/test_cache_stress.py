@@ -0,0 +1,84 @@
+"""
+Stress test for the in-process cache: many threads mixing reads, writes,
+set-if-absent and deletes, as sync route handlers do in the threadpool.
+
+For a throughput comparison against a single lock, see
+scripts/debug_tools/bench_cache_stripes.py.
+"""
+
+import random
+import threading
+import time
+
+from app.cache_backends import InProcessCache
+
+THREADS = 16
+OPS_PER_THREAD = 5000
+KEYS = 500
+
+
+def hammer(cache, threads=THREADS, ops=OPS_PER_THREAD):
+    """Run the mixed workload; returns (gets issued, errors raised, seconds)."""
+    errors = []
+    gets = [0] * threads
+    start = threading.Barrier(threads)
+
+    def worker(n):
+        rng = random.Random(n)
+        start.wait()
+        try:
+            for _ in range(ops):
+                key = f"key-{rng.randrange(KEYS)}"
+                op = rng.random()
+                if op < 0.6:
+                    value = cache.get(key)
+                    gets[n] += 1
+                    assert value is None or value["key"] == key
+                elif op < 0.85:
+                    cache.set(key, {"key": key, "tasks": []})
+                elif op < 0.95:
+                    cache.set_if_absent(key, {"key": key, "tasks": []})
+                else:
+                    cache.delete(key)
+        except Exception as e:
+            errors.append(e)
+
+    workers = [threading.Thread(target=worker, args=(n,)) for n in range(threads)]
+    began = time.perf_counter()
+    for t in workers:
+        t.start()
+    for t in workers:
+        t.join()
+    return sum(gets), errors, time.perf_counter() - began
+
+
+def test_concurrent_mixed_workload():
+    cache = InProcessCache("stress", maxsize=200, ttl=3600)
+    gets, errors, _ = hammer(cache)
+
+    assert errors == []
+    # No lost counter updates and the size bound holds
+    assert cache.hits + cache.misses == gets
+    assert len(cache) <= 200
+
+
+def test_set_if_absent_single_winner_per_key():
+    cache = InProcessCache("stress", maxsize=1000, ttl=3600)
+    winners = {}
+    lock = threading.Lock()
+
+    def claim(n):
+        for i in range(200):
+            if cache.set_if_absent(f"job-{i}", n):
+                with lock:
+                    winners.setdefault(f"job-{i}", []).append(n)
+
+    workers = [threading.Thread(target=claim, args=(n,)) for n in range(THREADS)]
+    for t in workers:
+        t.start()
+    for t in workers:
+        t.join()
+
+    assert len(winners) == 200
+    assert all(len(claimants) == 1 for claimants in winners.values())
+
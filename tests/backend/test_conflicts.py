@@ -0,0 +1,154 @@
+import gc
+import weakref
+import pytest
+from contextlib import contextmanager
+from datetime import datetime
+from sqlalchemy import event
+from app.services import JobService
+from app.models import Task, JobCandidate, JobStatus
+from app.schemas import JobCreate
+
+def _make_service(db_session, username, llm_result=None):
+    service = JobService(db_session)
+    user = service.create_user(username, "password")
+    if llm_result is not None:
+        service.llm.parse_text = lambda *args, **kwargs: llm_result
+    return service, user.id
+
+@contextmanager
+def _count_selects(db_session):
+    statements = []
+    def before_execute(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            statements.append(statement)
+    engine = db_session.get_bind()
+    event.listen(engine, "before_cursor_execute", before_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", before_execute)
+
+def test_parse_job_batch_conflicts(db_session):
+    result = {
+        "tasks": [
+            {"title": "Standup", "start_time": "2026-09-01T09:00:00Z", "end_time": "2026-09-01T09:30:00Z", "confidence": 0.9},
+            {"title": "Coffee", "start_time": "2026-09-01T09:15:00Z", "end_time": "2026-09-01T09:45:00Z", "confidence": 0.9},
+            {"title": "Dentist", "start_time": "2026-09-01T14:00:00Z", "end_time": None, "confidence": 0.9},
+            {"title": "Hotel stay", "start_time": "2026-09-01T08:00:00Z", "end_time": "2026-09-02T11:00:00Z", "confidence": 0.9},
+        ],
+        "commands": [],
+        "ambiguities": []
+    }
+    service, user_id = _make_service(db_session, "batch_parse_user", result)
+    db_session.add(Task(user_id=user_id, title="Surgery", start_time=datetime(2026, 9, 1, 14, 30), end_time=datetime(2026, 9, 1, 16, 0), is_blocking=True))
+    db_session.commit()
+
+    job = service.create_job(JobCreate(raw_text="agenda"), user_id)
+    assert service.parse_job(job.id, user_id) == 4
+
+    by_title = {}
+    for cand in db_session.query(JobCandidate).filter(JobCandidate.job_id == job.id):
+        by_title[cand.parameters.get("title")] = cand
+
+    assert by_title["Standup"].command_type == "CREATE_TASK"
+    # Overlaps the earlier candidate in the same job
+    assert by_title["Coffee"].command_type == "AMBIGUITY"
+    assert by_title["Coffee"].parameters["existing_title"] == "Standup"
+    # Default 60 min duration runs into the existing task
+    assert by_title["Dentist"].command_type == "AMBIGUITY"
+    assert by_title["Dentist"].parameters["existing_title"] == "Surgery"
+    # Background events never raise conflicts
+    assert by_title["Hotel stay"].command_type == "CREATE_TASK"
+
+def test_accept_converts_pending_overlaps(db_session):
+    service, user_id = _make_service(db_session, "batch_accept_user")
+    job = service.create_job(JobCreate(raw_text="two things"), user_id)
+    lunch = JobCandidate(job_id=job.id, description="Lunch", command_type="CREATE_TASK",
+                         parameters={"title": "Lunch", "start_time": "2026-09-03T12:00:00Z", "end_time": "2026-09-03T13:00:00Z"})
+    meeting = JobCandidate(job_id=job.id, description="Meeting", command_type="CREATE_TASK",
+                           parameters={"title": "Meeting", "start_time": "2026-09-03T12:30:00Z", "end_time": "2026-09-03T13:30:00Z"})
+    db_session.add_all([lunch, meeting])
+    db_session.commit()
+
+    tasks = service.accept_candidates(job.id, [lunch.id], user_id)
+    assert [t.title for t in tasks] == ["Lunch"]
+
+    db_session.refresh(meeting)
+    assert meeting.command_type == "AMBIGUITY"
+    assert meeting.parameters["existing_title"] == "Lunch"
+    assert service.get_job_details(job.id, user_id).status == JobStatus.PARSED
+
+def test_conflict_suggestion_is_deferred(db_session):
+    result = {
+        "tasks": [{"title": "Call", "start_time": "2026-09-05T10:00:00Z", "end_time": "2026-09-05T10:30:00Z", "confidence": 0.9}],
+        "commands": [],
+        "ambiguities": []
+    }
+    service, user_id = _make_service(db_session, "deferred_suggestion_user", result)
+    db_session.add(Task(user_id=user_id, title="Review", start_time=datetime(2026, 9, 5, 10, 0), end_time=datetime(2026, 9, 5, 11, 0), is_blocking=True))
+    db_session.commit()
+
+    job = service.create_job(JobCreate(raw_text="call at 10"), user_id)
+    service.parse_job(job.id, user_id)
+    cand = db_session.query(JobCandidate).filter(JobCandidate.job_id == job.id).one()
+
+    # Parsing does not pay for the slot search
+    assert cand.parameters["suggestion_pending"] is True
+    assert not any(opt.get("suggested") for opt in cand.parameters["options"])
+
+    option = service.get_candidate_suggestion(cand.id, user_id)
+    assert option["display_time"] == "2026-09-05T11:15:00Z"
+
+    db_session.refresh(cand)
+    assert cand.parameters["suggestion_pending"] is False
+    assert cand.parameters["options"][0] == option
+    # Second read is served from the stored option
+    assert service.get_candidate_suggestion(cand.id, user_id) == option
+
+def test_parse_reads_are_constant(db_session):
+    def parse(username, n):
+        # Alternating tasks with and without an end time, every other one clashing with the calendar
+        tasks = [
+            {"title": f"Task {i}", "start_time": f"2026-09-10T{8 + i:02d}:00:00Z",
+             "end_time": None if i % 2 else f"2026-09-10T{8 + i:02d}:30:00Z", "confidence": 0.9}
+            for i in range(n)
+        ]
+        service, user_id = _make_service(db_session, username, {"tasks": tasks, "commands": [], "ambiguities": []})
+        for i in range(0, n, 2):
+            db_session.add(Task(user_id=user_id, title=f"Busy {i}", start_time=datetime(2026, 9, 10, 8 + i, 15),
+                                end_time=datetime(2026, 9, 10, 8 + i, 45), is_blocking=True))
+        db_session.commit()
+        job = service.create_job(JobCreate(raw_text="busy day"), user_id)
+        with _count_selects(db_session) as selects:
+            service.parse_job(job.id, user_id)
+            service.resolve_job_suggestions(job.id, user_id)
+        return len(selects)
+
+    assert parse("uow_small_user", 2) == parse("uow_large_user", 12)
+
+def test_services_share_the_session_cache_without_piling_up_listeners(db_session):
+    service = JobService(db_session)
+    user_id = service.create_user("session_cache_user", "password").id
+    start, end = datetime(2026, 11, 2, 9, 0), datetime(2026, 11, 2, 10, 0)
+    def titles(svc):
+        return [task.title for _, _, task in svc._calendar_snapshot(user_id, start, end).overlapping(start, end)]
+
+    assert titles(service) == []  # Loads the calendar window
+
+    # Services are cheap to create and don't stay reachable through the session
+    services = [weakref.ref(JobService(db_session)) for _ in range(100)]
+    gc.collect()
+    assert all(ref() is None for ref in services)
+
+    # A write through the session still invalidates every service's view
+    db_session.add(Task(user_id=user_id, title="Standup", start_time=start, end_time=end, is_blocking=True))
+    db_session.commit()
+    assert titles(JobService(db_session)) == ["Standup"]
+    assert titles(service) == ["Standup"]
+
+    # So does the end of the transaction, for bulk writes the flush hook never sees
+    db_session.query(Task).filter(Task.user_id == user_id).update(
+        {"start_time": datetime(2026, 11, 3, 9, 0), "end_time": datetime(2026, 11, 3, 10, 0)}, synchronize_session=False
+    )
+    db_session.commit()
+    assert titles(service) == []
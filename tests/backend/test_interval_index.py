@@ -0,0 +1,86 @@
+import pytest
+from datetime import datetime, timedelta
+from app.interval_index import IntervalIndex
+from app.services import JobService
+from app.models import Task
+from app.schemas import TaskUpdate
+
+def test_overlap_queries():
+    index = IntervalIndex([
+        (datetime(2026, 3, 1, 9, 0), datetime(2026, 3, 1, 10, 0), "standup", True),
+        (datetime(2026, 3, 1, 12, 0), None, "lunch", True),  # No end -> 30 min
+        (datetime(2026, 2, 28, 15, 0), datetime(2026, 3, 3, 11, 0), "hotel", False),
+    ])
+
+    hits = [key for _, _, key in index.overlapping(datetime(2026, 3, 1, 9, 30), datetime(2026, 3, 1, 12, 10))]
+    assert hits == ["hotel", "standup", "lunch"]
+
+    # Non-blocking entries are skipped when asked
+    assert index.first_overlap(datetime(2026, 3, 2, 9, 0), datetime(2026, 3, 2, 10, 0), blocking_only=True) is None
+    assert index.first_overlap(datetime(2026, 3, 2, 9, 0), datetime(2026, 3, 2, 10, 0)) == "hotel"
+
+    # Touching intervals do not overlap
+    assert index.first_overlap(datetime(2026, 3, 1, 12, 30), datetime(2026, 3, 1, 13, 0), blocking_only=True) is None
+
+def test_add_remove_keeps_order():
+    index = IntervalIndex()
+    base = datetime(2026, 3, 1, 8, 0)
+    for i in range(10, 0, -1):
+        index.add(base + timedelta(hours=i), base + timedelta(hours=i, minutes=30), i)
+    assert len(index) == 10
+    assert index.first_overlap(base + timedelta(hours=3), base + timedelta(hours=6)) == 3
+
+    index.remove(3)
+    assert index.first_overlap(base + timedelta(hours=3), base + timedelta(hours=6)) == 4
+
+    # Re-adding a key moves it rather than duplicating it
+    index.add(base, base + timedelta(minutes=30), 4)
+    assert len(index) == 9
+    assert index.first_overlap(base + timedelta(hours=3), base + timedelta(hours=6)) == 5
+
+def test_find_conflict_follows_task_writes(db_session):
+    service = JobService(db_session)
+    user_id = service.create_user("interval_index_user", "password").id
+
+    start = datetime(2026, 8, 1, 10, 0)
+    end = datetime(2026, 8, 1, 11, 0)
+    assert service._find_conflict(user_id, start, end) is None
+
+    task = Task(user_id=user_id, title="Dentist", start_time=start, end_time=end, is_blocking=True)
+    db_session.add(task)
+    db_session.commit()
+    assert service._find_conflict(user_id, start, end).id == task.id
+
+    # Moving the task moves the conflict window
+    service.update_task(task.id, TaskUpdate(start_time=datetime(2026, 8, 1, 14, 0), end_time=datetime(2026, 8, 1, 15, 0)), user_id)
+    assert service._find_conflict(user_id, start, end) is None
+    assert service._find_conflict(user_id, datetime(2026, 8, 1, 14, 30), datetime(2026, 8, 1, 16, 0)).id == task.id
+
+    service.delete_task(task.id, user_id)
+    assert service._find_conflict(user_id, datetime(2026, 8, 1, 14, 30), datetime(2026, 8, 1, 16, 0)) is None
+
+def test_find_conflict_open_ended_task(db_session):
+    service = JobService(db_session)
+    user_id = service.create_user("open_ended_user", "password").id
+
+    # No end time -> treated as a 30 minute block
+    db_session.add(Task(user_id=user_id, title="Call", start_time=datetime(2026, 8, 2, 9, 0), end_time=None, is_blocking=True))
+    db_session.commit()
+
+    assert service._find_conflict(user_id, datetime(2026, 8, 2, 9, 20), datetime(2026, 8, 2, 10, 0)) is not None
+    assert service._find_conflict(user_id, datetime(2026, 8, 2, 9, 30), datetime(2026, 8, 2, 10, 0)) is None
+    assert service._find_conflict(user_id, datetime(2026, 8, 2, 8, 0), datetime(2026, 8, 2, 9, 0)) is None
+
+def test_sweep_overlaps_pairs():
+    from app.interval_index import sweep_overlaps
+    d = lambda h, m=0: datetime(2026, 4, 1, h, m)
+    fixed = [(d(9), d(10), "gym"), (d(12), d(13), "lunch"), (d(6), d(18), "conference")]
+    probes = [(d(9, 30), d(12, 15), 0), (d(12), None, 1), (d(20), d(21), 2)]
+
+    fixed_hits, probe_hits = sweep_overlaps(fixed, probes)
+
+    assert fixed_hits[0] == ["conference", "gym", "lunch"]
+    assert fixed_hits[1] == ["conference", "lunch"]
+    assert fixed_hits[2] == []
+    assert probe_hits[0] == {1} and probe_hits[1] == {0}
+    assert probe_hits[2] == set()
@@ -0,0 +1,78 @@
+from datetime import datetime, timedelta
+
+from app.job_stats import job_status_counts
+from app.models import Job
+from app.schemas import JobCreate, JobStatus
+from app.services import JobService
+from app.worker import claim_next_job, requeue_stale_jobs
+
+
+def _changes(before, after):
+    return {
+        status: after.get(status, 0) - before.get(status, 0)
+        for status in set(before) | set(after) if after.get(status, 0) != before.get(status, 0)
+    }
+
+
+def test_counts_follow_status_changes(db_session):
+    service = JobService(db_session)
+    service.llm.parse_text = lambda **kwargs: {"tasks": [], "commands": [], "ambiguities": []}
+    user_id = service.create_user("job_stats_user", "password").id
+    before = job_status_counts(db_session)
+
+    parsed = service.create_job(JobCreate(raw_text="gym at 5"), user_id)
+    service.parse_job(parsed.id, user_id)
+    failed = service.create_job(JobCreate(raw_text="dinner at 7"), user_id)
+    service.start_background_parse(failed.id, user_id)
+    service.fail_parse(failed.id, user_id)
+    service.create_job(JobCreate(raw_text="call mom"), user_id)
+    assert _changes(before, job_status_counts(db_session)) == {"PARSED": 1, "FAILED": 1, "CREATED": 1}
+
+    # Set without loading the old status, then deleted
+    job = db_session.get(Job, parsed.id)
+    db_session.expire(job, ["status"])
+    job.status = JobStatus.ACCEPTED
+    db_session.commit()
+    assert _changes(before, job_status_counts(db_session)) == {"ACCEPTED": 1, "FAILED": 1, "CREATED": 1}
+    db_session.delete(job)
+    db_session.commit()
+    assert _changes(before, job_status_counts(db_session)) == {"FAILED": 1, "CREATED": 1}
+
+
+def test_worker_claims_and_requeues_move_counts(db_session):
+    service = JobService(db_session)
+    user_id = service.create_user("job_stats_worker_user", "password").id
+    job = service.create_job(JobCreate(raw_text="gym at 6"), user_id)
+    service.start_background_parse(job.id, user_id, queued=True)
+    # Claim exactly this job: the shared test database may hold other queued jobs
+    db_session.query(Job).filter(Job.id != job.id, Job.status == JobStatus.QUEUED).update(
+        {"queued_at": datetime.utcnow() + timedelta(days=1)}, synchronize_session=False
+    )
+    db_session.commit()
+    before = job_status_counts(db_session)
+
+    assert claim_next_job(db_session, "stats-worker")[0] == job.id
+    assert _changes(before, job_status_counts(db_session)) == {"QUEUED": -1, "PARSING": 1}
+
+    db_session.query(Job).filter(Job.id == job.id).update({"claimed_at": datetime.utcnow() - timedelta(minutes=10)})
+    db_session.commit()
+    assert requeue_stale_jobs(db_session, timeout_seconds=300) >= 1
+    db_session.expire_all()
+    assert db_session.get(Job, job.id).status == JobStatus.QUEUED
+
+
+def test_admin_stats_read_job_counts_and_job_creators(client, db_session):
+    before = client.get("/api/v1/admin/stats").json()
+    service = JobService(db_session)
+    user_id = service.create_user("job_stats_admin_user", "password").id
+    job = service.create_job(JobCreate(raw_text="gym at 8"), user_id)
+    service.create_job(JobCreate(raw_text="gym at 9"), user_id)
+    job.status = JobStatus.ACCEPTED
+    db_session.commit()
+
+    after = client.get("/api/v1/admin/stats").json()
+    assert after["overview"]["total_jobs"] == before["overview"]["total_jobs"] + 2
+    assert after["job_status_distribution"]["ACCEPTED"] == before["job_status_distribution"].get("ACCEPTED", 0) + 1
+    # Users who created a job, not users with AI usage
+    assert after["overview"]["active_users_30d"] == before["overview"]["active_users_30d"] + 1
+    assert after["overview"]["ai_active_users_30d"] == before["overview"]["ai_active_users_30d"]
@@ -0,0 +1,30 @@
+import random
+
+from app.latency_sketch import LogHistogram, RELATIVE_ACCURACY
+
+
+def test_quantiles_within_relative_accuracy():
+    rng = random.Random(7)
+    values = sorted(rng.lognormvariate(6, 1.2) for _ in range(20000))  # ~400ms median, long tail
+    sketch = LogHistogram()
+    for v in values:
+        sketch.add(v)
+
+    assert sketch.count == len(values)
+    assert len(sketch.buckets) < 300
+    for q in (0.5, 0.9, 0.99):
+        exact = values[int(q * (len(values) - 1))]
+        assert abs(sketch.quantile(q) - exact) <= exact * RELATIVE_ACCURACY * 1.01
+
+
+def test_merge_matches_a_single_sketch_and_zero_values():
+    whole, a, b = LogHistogram(), LogHistogram(), LogHistogram()
+    for i, v in enumerate([0, 0, 5, 40, 300, 2500, 9000, 120]):
+        whole.add(v)
+        (a if i % 2 else b).add(v)
+    a.merge(b)
+
+    assert a.buckets == whole.buckets
+    assert whole.quantile(0.0) == 0.0  # Zero-token local parses share bucket 0
+    assert whole.summary() == a.summary()
+    assert LogHistogram().summary() == {"p50": None, "p90": None, "p99": None}
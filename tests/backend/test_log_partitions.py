@@ -0,0 +1,59 @@
+from datetime import datetime
+
+from sqlalchemy import create_engine, inspect
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.database import Base
+from app.log_partitions import maintain_partitions
+from app.models import TokenLog, TokenLogPartition
+
+
+def _session():
+    # Rotation renames token_logs, so keep it away from the shared test database
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    return sessionmaker(bind=engine)(), engine
+
+
+def _log(db, when):
+    db.add(TokenLog(feature="partition-test", model="gpt-4o-mini", total_tokens=10, timestamp=when))
+    db.commit()
+
+
+def test_new_month_rotates_the_live_table():
+    db, engine = _session()
+    _log(db, datetime(2026, 1, 10))
+
+    assert maintain_partitions(db, retention_days=0, now=datetime(2026, 1, 20)) == {"created": [], "dropped": []}
+    assert db.get(TokenLogPartition, "token_logs").range_start == datetime(2026, 1, 1)
+
+    result = maintain_partitions(db, retention_days=0, now=datetime(2026, 2, 1, 0, 5))
+    assert result == {"created": ["token_logs_p202601"], "dropped": []}
+    assert "token_logs_p202601" in inspect(engine).get_table_names()
+    assert db.query(TokenLog).count() == 0
+
+    _log(db, datetime(2026, 2, 1, 0, 6))
+    assert db.query(TokenLog).count() == 1
+    assert db.get(TokenLogPartition, "token_logs").range_start == datetime(2026, 2, 1)
+    assert db.get(TokenLogPartition, "token_logs_p202601").range_end == datetime(2026, 2, 1, 0, 5)
+
+    # Same month again: nothing to do
+    assert maintain_partitions(db, retention_days=0, now=datetime(2026, 2, 15))["created"] == []
+
+
+def test_expired_partitions_are_dropped():
+    db, engine = _session()
+    _log(db, datetime(2026, 1, 10))
+    maintain_partitions(db, retention_days=30, now=datetime(2026, 1, 20))
+    maintain_partitions(db, retention_days=30, now=datetime(2026, 2, 2))
+
+    # January's table still holds rows newer than the cutoff
+    assert maintain_partitions(db, retention_days=30, now=datetime(2026, 2, 20))["dropped"] == []
+
+    result = maintain_partitions(db, retention_days=30, now=datetime(2026, 3, 10))
+    assert result == {"created": ["token_logs_p202602"], "dropped": ["token_logs_p202601"]}
+    tables = inspect(engine).get_table_names()
+    assert "token_logs_p202601" not in tables
+    assert "token_logs_p202602" in tables
+    assert db.get(TokenLogPartition, "token_logs_p202601") is None
@@ -0,0 +1,63 @@
+import threading
+
+from app.llm_tracking import log_token_usage
+from app.metrics import Counter, Histogram, Registry, db_pool_checkouts, llm_call_duration, llm_tokens
+
+
+def test_counter_shards_are_summed_across_threads():
+    counter = Counter("test_events_total", "Events", ("kind",))
+
+    def record():
+        for _ in range(1000):
+            counter.inc("a")
+        counter.inc("b", amount=2.5)
+
+    threads = [threading.Thread(target=record) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert counter.value("a") == 8000
+    assert counter.value("b") == 20
+    assert len(counter._shards) == 8
+
+
+def test_histogram_renders_cumulative_buckets():
+    registry = Registry()
+    histogram = registry.register(Histogram("test_seconds", "Latency", ("route",), buckets=(0.1, 1.0)))
+    for value in (0.05, 0.5, 0.7, 3.0):
+        histogram.observe(value, '/a"b')
+
+    lines = registry.render().splitlines()
+    assert lines[:2] == ["# HELP test_seconds Latency", "# TYPE test_seconds histogram"]
+    assert lines[2:] == [
+        'test_seconds_bucket{route="/a\\"b",le="0.1"} 1',
+        'test_seconds_bucket{route="/a\\"b",le="1"} 3',
+        'test_seconds_bucket{route="/a\\"b",le="+Inf"} 4',
+        'test_seconds_sum{route="/a\\"b"} 4.25',
+        'test_seconds_count{route="/a\\"b"} 4',
+    ]
+
+
+def test_llm_usage_is_recorded_per_feature():
+    before = llm_call_duration.count("metrics-feature", "gpt-4o-mini")
+    log_token_usage(None, "metrics-feature", "gpt-4o-mini", 100, 20, 120, latency_ms=350.0)
+
+    assert llm_call_duration.count("metrics-feature", "gpt-4o-mini") == before + 1
+    assert llm_tokens.count("metrics-feature", "gpt-4o-mini") == before + 1
+
+
+def test_metrics_endpoint(client):
+    client.get("/api/v1/cache-stats")
+    client.get("/api/v1/no-such-route")
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    body = response.text
+    assert 'momentra_http_request_duration_seconds_count{method="GET",route="/api/v1/cache-stats",status="200"}' in body
+    assert 'momentra_http_request_duration_seconds_count{method="GET",route="unmatched",status="404"}' in body
+    assert 'momentra_cache_requests_total{cache="llm",result="hit"}' in body
+    assert "# TYPE momentra_db_pool_checkouts_total counter" in body
+    assert db_pool_checkouts.value() > 0
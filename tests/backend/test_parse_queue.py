@@ -0,0 +1,134 @@
+import asyncio
+import json
+import threading
+import time
+from datetime import datetime, timedelta
+
+from app.services import JobService
+from app.models import Job, JobCandidate
+from app.schemas import JobCreate, JobStatus
+from app.jwt_utils import create_access_token
+from app.llm_adapter import LLMAdapter
+from app.parse_queue import parse_queue
+from conftest import TestingSessionLocal
+
+RESULT = {
+    "reasoning": "Two tasks",
+    "tasks": [
+        {"title": "Gym", "start_time": "2026-09-21T17:00:00Z", "end_time": "2026-09-21T18:00:00Z", "confidence": 0.9},
+        {"title": "Dinner", "start_time": "2026-09-21T19:00:00Z", "end_time": "2026-09-21T20:00:00Z", "confidence": 0.9},
+    ],
+    "commands": [],
+    "ambiguities": []
+}
+
+
+def _setup(db_session, monkeypatch, username, parse_text_stream):
+    monkeypatch.setattr(LLMAdapter, "parse_text_stream", parse_text_stream)
+    monkeypatch.setattr(parse_queue, "session_factory", TestingSessionLocal)
+    service = JobService(db_session)
+    user = service.create_user(username, "password")
+    job = service.create_job(JobCreate(raw_text="gym then dinner"), user.id)
+    headers = {"Authorization": f"Bearer {create_access_token(data={'sub': str(user.id)})}"}
+    return job.id, headers
+
+
+def _sse_events(body: str):
+    events = []
+    for block in body.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.splitlines() if not line.startswith(":"))
+        events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+
+def test_async_parse_returns_202_and_streams_candidates(client, db_session, monkeypatch):
+    # The "LLM" answers only once the test has subscribed to the stream
+    release = threading.Event()
+
+    async def parse_text_stream(self, on_item, **kwargs):
+        await asyncio.to_thread(release.wait, 5)
+        for task in RESULT["tasks"]:
+            await on_item("task", dict(task))
+        return dict(RESULT, tasks=[dict(t) for t in RESULT["tasks"]])
+
+    job_id, headers = _setup(db_session, monkeypatch, "async_parse_user", parse_text_stream)
+
+    response = client.post(f"/api/v1/jobs/{job_id}/parse?async=true", headers=headers)
+    assert response.status_code == 202
+    assert response.json()["status"] == JobStatus.PARSING.value
+
+    threading.Timer(0.5, release.set).start()
+    with client.stream("GET", f"/api/v1/jobs/{job_id}/events", headers=headers) as stream:
+        body = "".join(stream.iter_text())
+    events = _sse_events(body)
+    assert events[0] == ("status", {"status": "parsing"})
+    assert [data["parameters"]["title"] for e, data in events if e == "candidate"] == ["Gym", "Dinner"]
+    assert events[-1] == ("status", {"status": "parsed", "candidates_count": 2})
+
+    assert parse_queue.stats()["time_to_first_candidate_ms"]["count"] >= 1
+
+    polled = client.get(f"/api/v1/jobs/{job_id}", headers=headers).json()
+    assert polled["status"] == JobStatus.PARSED.value
+    assert len(polled["candidates"]) == 2
+
+    # Once parsed, the stream replays the result and closes
+    with client.stream("GET", f"/api/v1/jobs/{job_id}/events", headers=headers) as stream:
+        replay = _sse_events("".join(stream.iter_text()))
+    assert replay == events[1:]
+
+
+def test_failed_background_parse_marks_job_failed(client, db_session, monkeypatch):
+    async def parse_text_stream(self, on_item, **kwargs):
+        await on_item("task", dict(RESULT["tasks"][0]))
+        raise RuntimeError("LLM unavailable")
+
+    job_id, headers = _setup(db_session, monkeypatch, "async_parse_fail_user", parse_text_stream)
+    failed_before = parse_queue.stats()["failed"]
+    assert client.post(f"/api/v1/jobs/{job_id}/parse?async=true", headers=headers).status_code == 202
+
+    deadline = time.time() + 5
+    while parse_queue.stats()["failed"] == failed_before and time.time() < deadline:
+        time.sleep(0.05)
+    db_session.expire_all()
+    assert db_session.get(Job, job_id).status == JobStatus.FAILED
+
+    # The candidate streamed before the failure is gone, so late subscribers don't see it
+    assert db_session.query(JobCandidate).filter(JobCandidate.job_id == job_id).count() == 0
+    with client.stream("GET", f"/api/v1/jobs/{job_id}/events", headers=headers) as stream:
+        assert _sse_events("".join(stream.iter_text())) == [("status", {"status": "failed", "candidates_count": 0})]
+
+
+def test_async_parse_unknown_job(client, db_session, monkeypatch):
+    async def parse_text_stream(self, on_item, **kwargs):
+        return RESULT
+
+    _, headers = _setup(db_session, monkeypatch, "async_parse_404_user", parse_text_stream)
+    assert client.post("/api/v1/jobs/999999/parse?async=true", headers=headers).status_code == 404
+    assert client.get("/api/v1/jobs/999999/events", headers=headers).status_code == 404
+
+
+def test_events_refuse_jobs_nothing_will_finish(client, db_session, monkeypatch):
+    async def parse_text_stream(self, on_item, **kwargs):
+        return RESULT
+
+    job_id, headers = _setup(db_session, monkeypatch, "async_parse_idle_user", parse_text_stream)
+    # Never parsed
+    assert client.get(f"/api/v1/jobs/{job_id}/events", headers=headers).status_code == 409
+
+    # Left PARSING by a restart: not in this process's queue and claimed long ago
+    job = db_session.get(Job, job_id)
+    job.status = JobStatus.PARSING
+    job.claimed_at = datetime.utcnow() - timedelta(hours=1)
+    db_session.commit()
+    assert client.get(f"/api/v1/jobs/{job_id}/events", headers=headers).status_code == 409
+
+
+def test_async_parse_needs_a_running_queue(client, db_session, monkeypatch):
+    async def parse_text_stream(self, on_item, **kwargs):
+        return RESULT
+
+    job_id, headers = _setup(db_session, monkeypatch, "async_parse_stopped_user", parse_text_stream)
+    monkeypatch.setattr(parse_queue, "_workers", [])
+    assert client.post(f"/api/v1/jobs/{job_id}/parse?async=true", headers=headers).status_code == 503
+    db_session.expire_all()
+    assert db_session.get(Job, job_id).status == JobStatus.CREATED
@@ -0,0 +1,89 @@
+import asyncio
+import copy
+
+from app.services import JobService
+from app.models import Job, JobCandidate, UserPreferences
+from app.schemas import JobCreate
+
+RESULT = {
+    "reasoning": "One task",
+    "tasks": [{"title": "Gym", "start_time": "2026-09-20T17:00:00Z", "end_time": None, "confidence": 0.9}],
+    "commands": [],
+    "ambiguities": []
+}
+
+
+def _counting_service(db_session, result=RESULT):
+    service = JobService(db_session)
+    calls = []
+
+    def parse_text(**kwargs):
+        calls.append(kwargs)
+        return copy.deepcopy(result)
+
+    service.llm.parse_text = parse_text
+    return service, calls
+
+
+def test_unchanged_reparse_skips_llm(db_session):
+    service, calls = _counting_service(db_session)
+    user_id = service.create_user("reuse_user", "password").id
+    job = service.create_job(JobCreate(raw_text="gym at 5pm", user_local_time="2026-09-20T09:00:00+00:00"), user_id)
+
+    assert service.parse_job(job.id, user_id) == 1
+    assert service.parse_job(job.id, user_id) == 1
+    assert len(calls) == 1
+
+    stored = db_session.get(Job, job.id)
+    assert stored.parse_result == RESULT
+    assert len(stored.parse_input_hash) == 64
+    # Candidates are rebuilt, not duplicated; the default end time is applied each time
+    cands = db_session.query(JobCandidate).filter(JobCandidate.job_id == job.id).all()
+    assert len(cands) == 1
+    assert cands[0].parameters["end_time"].startswith("2026-09-20T18:00:00")
+
+
+def test_changed_inputs_reparse(db_session, monkeypatch):
+    service, calls = _counting_service(db_session)
+    user_id = service.create_user("reuse_changed_user", "password").id
+    job = service.create_job(JobCreate(raw_text="gym at 5pm"), user_id)
+    service.parse_job(job.id, user_id)
+
+    db_session.add(UserPreferences(user_id=user_id, ai_temperature=0.0, personal_context="I lift on Mondays"))
+    db_session.commit()
+    service = JobService(db_session)
+    service.llm.parse_text = lambda **kwargs: calls.append(kwargs) or copy.deepcopy(RESULT)
+    service.parse_job(job.id, user_id)
+    assert len(calls) == 2
+
+    monkeypatch.setattr("app.services.PROMPT_VERSION", 999)
+    service.parse_job(job.id, user_id)
+    assert len(calls) == 3
+
+
+def test_failed_parse_is_not_stored(db_session):
+    error = {"tasks": [], "commands": [], "ambiguities": [{"type": "error", "message": "AI Parsing Error: timeout"}]}
+    service, calls = _counting_service(db_session, error)
+    user_id = service.create_user("reuse_error_user", "password").id
+    job = service.create_job(JobCreate(raw_text="gym at 5pm"), user_id)
+
+    service.parse_job(job.id, user_id)
+    service.parse_job(job.id, user_id)
+    assert len(calls) == 2
+    assert db_session.get(Job, job.id).parse_result is None
+
+
+def test_async_parse_holds_no_transaction_during_the_llm_call(db_session):
+    service = JobService(db_session)
+    user_id = service.create_user("reuse_async_user", "password").id
+    job = service.create_job(JobCreate(raw_text="gym at 5pm"), user_id)
+    in_transaction = []
+
+    async def parse_text_async(**kwargs):
+        in_transaction.append(db_session.in_transaction())
+        return copy.deepcopy(RESULT)
+
+    service.llm.parse_text_async = parse_text_async
+    assert asyncio.run(service.parse_job_async(job.id, user_id)) == 1
+    assert in_transaction == [False]
+    assert db_session.get(Job, job.id).parse_result == RESULT
@@ -32,6 +32,9 @@ def test_cache_stats_endpoint():
     assert "ttl_seconds" in data
     assert data["max_size"] == 1000
     assert data["ttl_seconds"] == 3600
+    for key in ("hits", "misses", "evictions", "expirations", "bytes_in_use", "mean_entry_bytes"):
+        assert key in data
+        assert key in data["transcription"]
 
 def test_rate_limit_on_register():
     """Test that register endpoint is rate limited."""
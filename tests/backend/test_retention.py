@@ -0,0 +1,33 @@
+import pytest
+from datetime import datetime, timedelta
+from app.services import JobService
+from app.models import Task
+from app.retention import sweep_expired_tasks, retention_cutoff
+
+def test_sweep_deletes_expired_tasks_for_all_users(db_session):
+    service = JobService(db_session)
+    alice = service.create_user("retention_alice", "password").id
+    bob = service.create_user("retention_bob", "password").id
+
+    now = datetime(2026, 10, 10, 12, 0)
+    cutoff = retention_cutoff(3, now=now)
+    for user_id in (alice, bob):
+        for days_ago in (10, 5, 4):
+            db_session.add(Task(user_id=user_id, title=f"Old {days_ago}", start_time=now - timedelta(days=days_ago)))
+        db_session.add(Task(user_id=user_id, title="Recent", start_time=now - timedelta(days=1)))
+    db_session.commit()
+
+    # Small batches exercise the loop
+    assert sweep_expired_tasks(db_session, cutoff, batch_size=2) == 6
+    remaining = db_session.query(Task).filter(Task.user_id.in_([alice, bob])).all()
+    assert sorted(t.title for t in remaining) == ["Recent", "Recent"]
+
+def test_get_tasks_does_not_delete(db_session):
+    service = JobService(db_session)
+    user_id = service.create_user("retention_reader", "password").id
+    db_session.add(Task(user_id=user_id, title="Long ago", start_time=datetime(2020, 1, 1, 9, 0), end_time=datetime(2020, 1, 1, 10, 0)))
+    db_session.commit()
+
+    rows, _ = service.get_tasks_page(None, None, user_id, fields=["title"])
+    assert [r["title"] for r in rows] == ["Long ago"]
+    assert db_session.query(Task).filter(Task.user_id == user_id).count() == 1
@@ -0,0 +1,76 @@
+import asyncio
+import threading
+import time
+from unittest.mock import AsyncMock, MagicMock, patch
+from app.single_flight import SingleFlight
+from app.llm_adapter import LLMAdapter, AIParseResult
+
+def test_threads_share_one_call():
+    flight = SingleFlight()
+    calls = []
+    started = threading.Event()
+
+    def work():
+        calls.append(1)
+        started.set()
+        time.sleep(0.2)
+        return {"ok": True}
+
+    results = []
+    leader = threading.Thread(target=lambda: results.append(flight.do("k", work)))
+    leader.start()
+    started.wait()
+    followers = [threading.Thread(target=lambda: results.append(flight.do("k", work))) for _ in range(4)]
+    for t in followers:
+        t.start()
+    for t in [leader] + followers:
+        t.join()
+
+    assert len(calls) == 1
+    assert results == [{"ok": True}] * 5
+    assert flight.stats() == {"leaders": 1, "coalesced": 4, "in_flight": 0}
+
+    # Once settled, the next call runs again
+    flight.do("k", work)
+    assert len(calls) == 2
+
+def test_errors_reach_every_waiter():
+    flight = SingleFlight()
+
+    async def boom():
+        await asyncio.sleep(0.05)
+        raise RuntimeError("llm down")
+
+    async def run():
+        return await asyncio.gather(*(flight.do_async("k", boom) for _ in range(3)), return_exceptions=True)
+
+    errors = asyncio.run(run())
+    assert all(isinstance(e, RuntimeError) for e in errors)
+    assert flight.in_flight() == 0
+
+def test_concurrent_identical_parses_coalesce():
+    from app.rate_limit import llm_flight
+
+    completion = MagicMock()
+    completion.usage = None
+    completion.choices[0].message.parsed = AIParseResult(reasoning="r", tasks=[], commands=[], ambiguities=[])
+
+    async def slow_parse(**kwargs):
+        await asyncio.sleep(0.1)
+        return completion
+
+    async def run():
+        adapter = LLMAdapter()
+        return await asyncio.gather(*(
+            adapter.parse_text_async("Team offsite planning session", user_local_time="2026-03-02T09:00:00+00:00")
+            for _ in range(5)
+        ))
+
+    before = llm_flight.coalesced
+    with patch("app.llm_adapter.client"), patch("app.llm_adapter.async_client") as mock_async_client:
+        mock_async_client.beta.chat.completions.parse = AsyncMock(side_effect=slow_parse)
+        results = asyncio.run(run())
+
+    assert mock_async_client.beta.chat.completions.parse.await_count == 1
+    assert all(r["reasoning"] == "r" for r in results)
+    assert llm_flight.coalesced - before == 4
@@ -0,0 +1,70 @@
+import pytest
+from datetime import datetime
+from app.slot_search import SlotSearch, merge_intervals, iter_free_gaps
+
+def D(day, h, m=0):
+    return datetime(2026, 5, day, h, m)
+
+def test_merge_and_gaps():
+    busy = merge_intervals([(D(1, 9), D(1, 10)), (D(1, 9, 30), D(1, 11)), (D(1, 13), D(1, 14))])
+    assert busy == [(D(1, 9), D(1, 11)), (D(1, 13), D(1, 14))]
+    assert list(iter_free_gaps(busy, D(1, 8), D(1, 15))) == [
+        (D(1, 8), D(1, 9)), (D(1, 11), D(1, 13)), (D(1, 14), D(1, 15))
+    ]
+
+def test_respects_buffer_after_busy_block():
+    search = SlotSearch([(D(1, 10), D(1, 11))], anchor=D(1, 10), duration_minutes=60, buffer_minutes=15)
+    (score, start), = search.best()
+    assert start == D(1, 11, 15)
+    assert score == 75
+
+def test_looks_past_a_fully_booked_day():
+    # Busy from 07:00 until midnight: nothing left later today, tomorrow's work hours are free
+    busy = [(D(1, 0), D(1, 7)), (D(1, 7), D(2, 0))]
+    search = SlotSearch(busy, anchor=D(1, 18), duration_minutes=60, buffer_minutes=0)
+    (_, start), = search.best()
+    assert start == D(2, 8)
+
+def test_next_day_slots_stay_inside_work_hours():
+    busy = [(D(1, 0), D(2, 0)), (D(2, 8), D(2, 20))]
+    search = SlotSearch(busy, anchor=D(1, 12), duration_minutes=60, buffer_minutes=0, work_start_hour=8, work_end_hour=22)
+    (_, start), = search.best()
+    assert start == D(2, 20)
+
+def test_top_k_ranked():
+    busy = [(D(1, 9), D(1, 12)), (D(1, 13), D(1, 17))]
+    search = SlotSearch(busy, anchor=D(1, 9), duration_minutes=60, buffer_minutes=0)
+    results = search.best(k=4)
+    # The earlier 08:00 slot is penalized: later starts in the 17:00 gap beat it
+    assert [start for _, start in results] == [D(1, 12), D(1, 17), D(1, 17, 15), D(1, 17, 30)]
+    assert [score for score, _ in results] == sorted(score for score, _ in results)
+    assert search.best(k=8)[-1] == (560, D(1, 8))
+
+def test_top_k_within_one_long_gap():
+    search = SlotSearch([], anchor=D(1, 10), duration_minutes=60, buffer_minutes=0)
+    assert search.best(k=5) == [(0, D(1, 10)), (15, D(1, 10, 15)), (30, D(1, 10, 30)), (45, D(1, 10, 45)), (60, D(1, 11))]
+
+    # Before the anchor, slots come latest first
+    search = SlotSearch([(D(1, 10), D(2, 0))], anchor=D(1, 12), duration_minutes=60, buffer_minutes=0)
+    assert [start for _, start in search.best(k=3)] == [D(1, 9), D(1, 8, 45), D(1, 8, 30)]
+
+def test_slots_endpoint(client, db_session):
+    from app.services import JobService
+    from app.models import Task
+    from app.jwt_utils import create_access_token
+
+    user = JobService(db_session).create_user("slots_endpoint_user", "password")
+    db_session.add(Task(user_id=user.id, title="Workshop", start_time=D(4, 9), end_time=D(4, 12), is_blocking=True))
+    db_session.commit()
+    headers = {"Authorization": f"Bearer {create_access_token(data={'sub': str(user.id)})}"}
+
+    response = client.get("/api/v1/slots", params={"near": "2026-05-04T09:00:00Z", "duration": 30, "k": 2}, headers=headers)
+    assert response.status_code == 200
+    slots = response.json()
+    assert len(slots) == 2
+    # Default 15 min buffer after the workshop
+    assert slots[0]["start_time"] == "2026-05-04T12:15:00"
+    assert slots[0]["end_time"] == "2026-05-04T12:45:00"
+    assert slots[0]["score"] <= slots[1]["score"]
+
+    assert client.get("/api/v1/slots", params={"k": 0}, headers=headers).status_code == 422
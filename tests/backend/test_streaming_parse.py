@@ -0,0 +1,141 @@
+import asyncio
+import copy
+import json
+
+from app import llm_tracking
+from app.services import JobService
+from app.models import Job, JobCandidate
+from app.schemas import JobCreate
+from app.llm_adapter import LLMAdapter
+from app.stream_parser import ParseResultScanner
+
+RESULT = {
+    "reasoning": "Gym {then} \"dinner\" [overlapping]",
+    "tasks": [
+        {"title": "Gym", "start_time": "2026-09-22T17:00:00Z", "end_time": "2026-09-22T18:00:00Z", "description": None, "confidence": 0.9},
+        {"title": "Dinner", "start_time": "2026-09-22T17:30:00Z", "end_time": "2026-09-22T19:00:00Z", "description": "at {Luigi's}", "confidence": 0.9},
+    ],
+    "commands": [],
+    "ambiguities": [
+        {"title": "Call", "type": "missing_time", "message": "When?", "options": [{"label": "8 AM", "value": "{\"start_time\": \"08:00\"}"}]}
+    ]
+}
+
+
+def _job(db_session, username, text="gym then dinner"):
+    service = JobService(db_session)
+    user_id = service.create_user(username, "password").id
+    return service, service.create_job(JobCreate(raw_text=text), user_id), user_id
+
+
+def test_scanner_emits_each_item_once_in_order():
+    doc = json.dumps(RESULT)
+    scanner = ParseResultScanner()
+    items = []
+    for i in range(0, len(doc), 7):
+        items += scanner.feed(doc[i:i + 7])
+
+    assert [kind for kind, _ in items] == ["task", "task", "ambiguity"]
+    assert [item for _, item in items] == RESULT["tasks"] + RESULT["ambiguities"]
+    assert scanner.text == doc
+
+
+def test_candidates_are_committed_while_the_completion_streams(db_session, monkeypatch):
+    service, job, user_id = _job(db_session, "stream_user")
+    seen_mid_stream = []
+
+    async def parse_text_stream(self, on_item, **kwargs):
+        await on_item("task", dict(RESULT["tasks"][0]))
+        seen_mid_stream.append(db_session.query(JobCandidate).filter(JobCandidate.job_id == job.id).count())
+        for task in RESULT["tasks"][1:]:
+            await on_item("task", dict(task))
+        for amb in RESULT["ambiguities"]:
+            await on_item("ambiguity", copy.deepcopy(amb))
+        return copy.deepcopy(RESULT)
+
+    monkeypatch.setattr(LLMAdapter, "parse_text_stream", parse_text_stream)
+    delivered = []
+
+    async def on_candidate(candidate):
+        delivered.append(candidate)
+
+    assert asyncio.run(service.parse_job_streaming(job.id, user_id, on_candidate)) == 3
+    assert seen_mid_stream == [1]
+    assert [c["command_type"] for c in delivered] == ["CREATE_TASK", "AMBIGUITY", "AMBIGUITY"]
+    assert delivered[1]["description"] == "Conflict: Dinner"
+    assert db_session.get(Job, job.id).parse_result == RESULT
+
+    # Same candidates as the batch path
+    batch_service, batch_job, batch_user = _job(db_session, "stream_batch_user")
+    batch_service.llm.parse_text = lambda **kwargs: copy.deepcopy(RESULT)
+    batch_service.parse_job(batch_job.id, batch_user)
+    batch = db_session.query(JobCandidate).filter(JobCandidate.job_id == batch_job.id).order_by(JobCandidate.id).all()
+    assert [(c.command_type, c.description) for c in batch] == [(c["command_type"], c["description"]) for c in delivered]
+
+
+def test_unstreamed_results_and_errors_are_delivered_at_the_end(db_session, monkeypatch):
+    service, job, user_id = _job(db_session, "stream_error_user")
+    error = {"tasks": [], "commands": [], "ambiguities": [{"type": "error", "message": "AI Parsing Error: reset"}]}
+
+    async def parse_text_stream(self, on_item, **kwargs):
+        await on_item("task", dict(RESULT["tasks"][0]))
+        return copy.deepcopy(error)  # The connection dropped after the first task
+
+    monkeypatch.setattr(LLMAdapter, "parse_text_stream", parse_text_stream)
+    delivered, discarded = [], []
+
+    async def on_candidate(candidate):
+        delivered.append(candidate)
+
+    async def on_discard(candidate_ids):
+        discarded.extend(candidate_ids)
+
+    assert asyncio.run(service.parse_job_streaming(job.id, user_id, on_candidate, on_discard)) == 1
+    assert [c["description"] for c in delivered] == ["Gym", "Ambiguity: AI Parsing Error: reset"]
+    # The half-parsed task is taken back: only the error is left on the job
+    assert discarded == [delivered[0]["id"]]
+    stored = db_session.query(JobCandidate).filter(JobCandidate.job_id == job.id).all()
+    assert [c.id for c in stored] == [delivered[1]["id"]]
+    assert db_session.get(Job, job.id).parse_result is None
+
+
+def test_error_after_streamed_ambiguities_is_still_delivered(db_session, monkeypatch):
+    service, job, user_id = _job(db_session, "stream_late_error_user")
+    error = {"tasks": [], "commands": [], "ambiguities": [{"type": "error", "message": "AI Parsing Error: reset"}]}
+    in_transaction = []
+
+    async def parse_text_stream(self, on_item, **kwargs):
+        in_transaction.append(db_session.in_transaction())
+        await on_item("ambiguity", copy.deepcopy(RESULT["ambiguities"][0]))
+        in_transaction.append(db_session.in_transaction())
+        return copy.deepcopy(error)
+
+    monkeypatch.setattr(LLMAdapter, "parse_text_stream", parse_text_stream)
+    delivered = []
+
+    async def on_candidate(candidate):
+        delivered.append(candidate)
+
+    assert asyncio.run(service.parse_job_streaming(job.id, user_id, on_candidate)) == 1
+    assert [c["description"] for c in delivered] == ["Call", "Ambiguity: AI Parsing Error: reset"]
+    assert in_transaction == [False, False]
+
+
+def test_adapter_streams_items_from_completion_deltas(monkeypatch):
+    doc = json.dumps(RESULT)
+
+    async def fake_stream(on_delta, **kwargs):
+        for i in range(0, len(doc), 5):
+            await on_delta(doc[i:i + 5])
+        return copy.deepcopy(RESULT)
+
+    monkeypatch.setattr(llm_tracking, "stream_llm_with_tracking_async", fake_stream)
+    monkeypatch.setattr(LLMAdapter, "_parse_without_llm", lambda self, *args: None)
+    items = []
+
+    async def on_item(kind, item):
+        items.append(kind)
+
+    result = asyncio.run(LLMAdapter().parse_text_stream("streamed gym then dinner unique", on_item=on_item))
+    assert result == RESULT
+    assert items == ["task", "task", "ambiguity"]
@@ -0,0 +1,54 @@
+import pytest
+from datetime import datetime, timedelta
+from app.services import JobService
+from app.models import Task
+from app.jwt_utils import create_access_token
+
+def _seed(db_session, username):
+    user = JobService(db_session).create_user(username, "password")
+    base = datetime(2026, 6, 1, 9, 0)
+    # Pairs share a start time so the id tiebreak is exercised
+    for i in range(7):
+        db_session.add(Task(user_id=user.id, title=f"Task {i}", start_time=base + timedelta(hours=i // 2),
+                            end_time=base + timedelta(hours=i // 2, minutes=30), description="notes"))
+    db_session.commit()
+    return user
+
+def test_keyset_pages_cover_every_task_once(db_session):
+    user = _seed(db_session, "keyset_service_user")
+    service = JobService(db_session)
+
+    seen, cursor = [], None
+    while True:
+        rows, cursor = service.get_tasks_page(None, None, user.id, limit=3, cursor=cursor, fields=["title"])
+        seen.extend(rows)
+        if not cursor:
+            break
+    assert [r["title"] for r in seen] == [f"Task {i}" for i in range(7)]
+    assert set(seen[0]) == {"id", "title"}
+
+    with pytest.raises(ValueError):
+        service.get_tasks_page(None, None, user.id, fields=["hashed_password"])
+    with pytest.raises(ValueError):
+        service.get_tasks_page(None, None, user.id, cursor="not-a-cursor")
+
+def test_tasks_endpoint_pagination(client, db_session):
+    user = _seed(db_session, "keyset_endpoint_user")
+    headers = {"Authorization": f"Bearer {create_access_token(data={'sub': str(user.id)})}"}
+
+    # Without paging parameters the full list keeps the TaskRead shape
+    full = client.get("/api/v1/tasks", headers=headers)
+    assert full.status_code == 200
+    assert len(full.json()) == 7
+    assert full.json()[0]["start_time"] == "2026-06-01T09:00:00"
+    assert "X-Next-Cursor" not in full.headers
+
+    first = client.get("/api/v1/tasks", params={"limit": 4, "fields": "title,start_time"}, headers=headers)
+    assert [t["title"] for t in first.json()] == ["Task 0", "Task 1", "Task 2", "Task 3"]
+    assert set(first.json()[0]) == {"id", "title", "start_time"}
+
+    second = client.get("/api/v1/tasks", params={"limit": 4, "cursor": first.headers["X-Next-Cursor"]}, headers=headers)
+    assert [t["title"] for t in second.json()] == ["Task 4", "Task 5", "Task 6"]
+    assert "X-Next-Cursor" not in second.headers
+
+    assert client.get("/api/v1/tasks", params={"fields": "owner"}, headers=headers).status_code == 400
@@ -0,0 +1,73 @@
+import pytest
+from datetime import datetime
+from app.services import JobService
+from app.models import Task, TaskTombstone
+from app.schemas import TaskUpdate
+from app.retention import sweep_expired_tasks
+from app.task_sync import prune_tombstones
+from app.jwt_utils import create_access_token
+
+def test_changes_since_cursor(db_session):
+    service = JobService(db_session)
+    user_id = service.create_user("sync_user", "password").id
+
+    snapshot = service.get_task_changes(user_id)
+    assert snapshot["reset"] and snapshot["changes"] == []
+    cursor = snapshot["cursor"]
+
+    gym = Task(user_id=user_id, title="Gym", start_time=datetime(2026, 11, 2, 17, 0), end_time=datetime(2026, 11, 2, 18, 0))
+    dentist = Task(user_id=user_id, title="Dentist", start_time=datetime(2026, 11, 3, 9, 0), end_time=datetime(2026, 11, 3, 10, 0))
+    db_session.add_all([gym, dentist])
+    db_session.commit()
+
+    delta = service.get_task_changes(user_id, cursor)
+    assert not delta["reset"]
+    assert {t.title for t in delta["changes"]} == {"Gym", "Dentist"}
+    cursor = delta["cursor"]
+
+    # Nothing new: no rows
+    assert service.get_task_changes(user_id, cursor)["changes"] == []
+
+    service.update_task(gym.id, TaskUpdate(title="Gym (legs)"), user_id)
+    dentist_id = dentist.id
+    service.delete_task(dentist_id, user_id)
+
+    delta = service.get_task_changes(user_id, cursor)
+    assert [t.title for t in delta["changes"]] == ["Gym (legs)"]
+    assert delta["deleted"] == [dentist_id]
+    assert int(delta["cursor"]) > int(cursor)
+
+    with pytest.raises(ValueError):
+        service.get_task_changes(user_id, "abc")
+
+def test_retention_tombstones_and_pruning(db_session):
+    service = JobService(db_session)
+    user_id = service.create_user("sync_retention_user", "password").id
+    old = Task(user_id=user_id, title="Old", start_time=datetime(2020, 1, 1, 9, 0))
+    db_session.add(old)
+    db_session.commit()
+    old_id = old.id
+    cursor = service.get_task_changes(user_id)["cursor"]
+
+    sweep_expired_tasks(db_session, datetime(2021, 1, 1))
+    assert service.get_task_changes(user_id, cursor)["deleted"] == [old_id]
+
+    # Once the tombstone is pruned, the old cursor can no longer be served incrementally
+    prune_tombstones(db_session, datetime(2100, 1, 1))
+    db_session.commit()
+    assert db_session.query(TaskTombstone).filter(TaskTombstone.user_id == user_id).count() == 0
+    assert service.get_task_changes(user_id, cursor)["reset"] is True
+
+def test_changes_endpoint(client, db_session):
+    user = JobService(db_session).create_user("sync_endpoint_user", "password")
+    headers = {"Authorization": f"Bearer {create_access_token(data={'sub': str(user.id)})}"}
+
+    first = client.get("/api/v1/tasks/changes", headers=headers).json()
+    assert first["reset"] is True
+
+    db_session.add(Task(user_id=user.id, title="Standup", start_time=datetime(2026, 11, 4, 9, 0), end_time=datetime(2026, 11, 4, 9, 15)))
+    db_session.commit()
+
+    delta = client.get("/api/v1/tasks/changes", params={"since": first["cursor"]}, headers=headers).json()
+    assert [t["title"] for t in delta["changes"]] == ["Standup"]
+    assert delta["changes"][0]["version"] == int(delta["cursor"])
@@ -0,0 +1,103 @@
+import json
+import pytest
+
+from app.template_cache import canonicalize, cache_template, get_templated_response, template_cache
+
+
+@pytest.fixture(autouse=True)
+def clear_templates():
+    template_cache.clear()
+    yield
+    template_cache.clear()
+
+
+def gym_result(start, end, title="Gym"):
+    return {
+        "reasoning": "User wants gym tomorrow",
+        "tasks": [{"title": title, "description": None, "start_time": start, "end_time": end, "confidence": 0.95}],
+        "commands": [],
+        "ambiguities": []
+    }
+
+
+def test_same_shape_shares_key():
+    key_a, _ = canonicalize("gym tomorrow at 5pm", "2026-03-02T09:00:00+02:00")
+    key_b, _ = canonicalize("Gym  tomorrow at 6:30 PM", "2026-03-05T10:15:00-05:00")
+    assert key_a == key_b
+    # A time that has already passed may change the LLM's choice of day
+    key_c, _ = canonicalize("gym tomorrow at 5pm", "2026-03-02T18:00:00+02:00")
+    assert key_c != key_a
+
+
+def test_untemplatable_requests():
+    assert canonicalize("gym on Feb 20 at 5pm", "2026-03-02T09:00:00+02:00") is None
+    assert canonicalize("buy milk", "2026-03-02T09:00:00+02:00") is None
+    assert canonicalize("gym at 5pm", None) is None
+
+
+def test_reinstantiates_for_new_day_time_and_offset():
+    # Monday 09:00 at UTC+2: tomorrow 17:00-18:00 local
+    stored = cache_template(
+        "gym tomorrow at 5pm", "2026-03-02T09:00:00+02:00",
+        gym_result("2026-03-03T15:00:00Z", "2026-03-03T16:00:00Z", title="Gym at 5pm")
+    )
+    assert stored
+
+    # Thursday 10:00 at UTC-5, asking for 6:30 PM
+    result = get_templated_response("Gym tomorrow at 6:30 PM", "2026-03-05T10:00:00-05:00")
+    task = result["tasks"][0]
+    assert task["start_time"] == "2026-03-06T23:30:00Z"
+    assert task["end_time"] == "2026-03-07T00:30:00Z"
+    assert task["title"] == "Gym at 6:30 PM"
+    assert result["reasoning"] == "Momentra Template Cache"
+
+
+def test_weekday_placeholder():
+    # Monday: "friday" is 4 days out
+    cache_template("dentist friday at 10am", "2026-03-02T09:00:00+00:00",
+                   gym_result("2026-03-06T10:00:00Z", "2026-03-06T11:00:00Z", title="Dentist (Friday)"))
+
+    # Wednesday: "monday" is 5 days out
+    result = get_templated_response("dentist monday at 11am", "2026-03-04T09:00:00+00:00")
+    task = result["tasks"][0]
+    assert task["start_time"] == "2026-03-09T11:00:00Z"
+    assert task["title"] == "Dentist (Monday)"
+
+
+def test_ambiguity_option_values_are_templated():
+    result = {
+        "reasoning": "",
+        "tasks": [],
+        "commands": [],
+        "ambiguities": [{
+            "type": "missing_duration",
+            "title": "Meeting",
+            "message": "How long is the meeting at 3pm?",
+            "options": [{
+                "label": "1 hour",
+                "value": json.dumps({"title": "Meeting", "start_time": "2026-03-02T15:00:00Z", "end_time": "2026-03-02T16:00:00Z"})
+            }]
+        }]
+    }
+    assert cache_template("meeting at 3pm", "2026-03-02T09:00:00+00:00", result)
+
+    instantiated = get_templated_response("meeting at 4pm", "2026-03-10T08:00:00+00:00")
+    ambiguity = instantiated["ambiguities"][0]
+    assert ambiguity["message"] == "How long is the meeting at 4pm?"
+    value = json.loads(ambiguity["options"][0]["value"])
+    assert value["start_time"] == "2026-03-10T16:00:00Z"
+    assert value["end_time"] == "2026-03-10T17:00:00Z"
+
+
+def test_rejects_outputs_it_cannot_account_for():
+    # The title mentions a time the input never did
+    assert not cache_template("gym tomorrow at 5pm", "2026-03-02T09:00:00+02:00",
+                              gym_result("2026-03-03T15:00:00Z", "2026-03-03T16:00:00Z", title="Gym 17:00-18:00 slot 7:15"))
+    assert get_templated_response("gym tomorrow at 5pm", "2026-03-02T09:00:00+02:00") is None
+
+
+def test_rejects_text_that_looks_like_a_placeholder():
+    for title in ("Gym {T3}", "Gym {T0}", "Review {W1}"):
+        assert not cache_template("gym tomorrow at 5pm", "2026-03-02T09:00:00+02:00",
+                                  gym_result("2026-03-03T15:00:00Z", "2026-03-03T16:00:00Z", title=title))
+        assert get_templated_response("gym tomorrow at 6pm", "2026-03-02T09:00:00+02:00") is None
@@ -0,0 +1,57 @@
+import threading
+from datetime import datetime
+
+from app.llm_tracking import TokenLogWriter
+from app.models import TokenLog
+from conftest import TestingSessionLocal
+
+
+def _row(feature, tokens=10):
+    return {
+        "user_id": None, "feature": feature, "model": "gpt-4o-mini", "prompt_tokens": tokens,
+        "completion_tokens": tokens, "total_tokens": 2 * tokens, "cost_usd": 0.0001,
+        "latency_ms": 12.0, "timestamp": datetime.utcnow()
+    }
+
+
+def _logged(db_session, feature):
+    return db_session.query(TokenLog).filter(TokenLog.feature == feature).count()
+
+
+def test_rows_are_written_in_batches_and_flushed_on_stop(db_session):
+    writer = TokenLogWriter(session_factory=TestingSessionLocal, flush_interval_ms=60_000, batch_size=4)
+    writer.start()
+    for _ in range(10):
+        assert writer.submit(_row("writer-batch"))
+    writer.stop()
+
+    assert _logged(db_session, "writer-batch") == 10
+    stats = writer.stats()
+    assert stats["written"] == 10
+    assert stats["batches"] == 3  # 4 + 4 + the 2 flushed on stop
+    assert stats["queued"] == 0
+
+
+def test_writer_refuses_rows_when_stopped_or_full(db_session):
+    entered, release = threading.Event(), threading.Event()
+
+    def slow_session():
+        # The first flush holds the writer thread until the queue has filled up
+        entered.set()
+        release.wait(5)
+        return TestingSessionLocal()
+
+    writer = TokenLogWriter(session_factory=slow_session, flush_interval_ms=10, batch_size=1, maxsize=2)
+    assert writer.submit(_row("writer-full")) is False  # Not started: the caller writes
+
+    writer.start()
+    assert writer.submit(_row("writer-full"))
+    entered.wait(5)
+    assert writer.submit(_row("writer-full"))
+    assert writer.submit(_row("writer-full"))
+    assert writer.submit(_row("writer-full")) is False
+    assert writer.stats()["backpressure"] == 1
+
+    release.set()
+    writer.stop()
+    assert _logged(db_session, "writer-full") == 3
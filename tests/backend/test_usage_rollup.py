@@ -0,0 +1,59 @@
+from datetime import datetime, timedelta
+
+from app.llm_tracking import TokenLogWriter
+from app.models import UsageDailyRollup
+from app.services import JobService
+from conftest import TestingSessionLocal
+
+
+def _row(feature, user_id=None, model="gpt-4o-mini", cost=0.5, latency=100.0, when=None):
+    return {
+        "user_id": user_id, "feature": feature, "model": model, "prompt_tokens": 10,
+        "completion_tokens": 5, "total_tokens": 15, "cost_usd": cost,
+        "latency_ms": latency, "timestamp": when or datetime.utcnow()
+    }
+
+
+def test_rollup_is_updated_with_each_batch(db_session):
+    writer = TokenLogWriter(session_factory=TestingSessionLocal)
+    user_id = JobService(db_session).create_user("rollup_user", "password").id
+    writer.write([_row("rollup-feature", user_id), _row("rollup-feature", user_id), _row("rollup-feature")])
+    writer.write([_row("rollup-feature", user_id, latency=400.0)])
+
+    rows = {r.user_id: r for r in db_session.query(UsageDailyRollup).filter(UsageDailyRollup.feature == "rollup-feature")}
+    assert set(rows) == {user_id, 0}  # Anonymous usage under user 0
+    mine = rows[user_id]
+    assert (mine.requests, mine.total_tokens, mine.cost_usd, mine.latency_ms_sum) == (3, 45, 1.5, 600.0)
+    assert mine.day == datetime.utcnow().date()
+    assert rows[0].requests == 1
+
+
+def test_admin_stats_read_the_rollup(client, db_session):
+    before = client.get("/api/v1/admin/stats").json()
+    day = datetime.utcnow() - timedelta(days=12)
+    user_id = JobService(db_session).create_user("rollup_admin_user", "password").id
+    TokenLogWriter(session_factory=TestingSessionLocal).write([
+        _row("scheduler", user_id, model="rollup-model", cost=0.25, latency=200.0, when=day),
+        _row("scheduler", user_id, model="rollup-model", cost=0.75, latency=400.0, when=day),
+    ])
+
+    after = client.get("/api/v1/admin/stats").json()
+    assert after["overview"]["total_requests"] == before["overview"]["total_requests"] + 2
+    assert round(after["overview"]["total_cost_usd"] - before["overview"]["total_cost_usd"], 4) == 1.0
+    assert after["overview"]["ai_active_users_30d"] == before["overview"]["ai_active_users_30d"] + 1
+    assert {"model": "rollup-model", "cost": 1.0, "calls": 2} in after["model_usage"]
+    assert any(d["date"] == str(day.date()) and d["total_requests"] >= 2 for d in after["daily_stats"])
+
+
+def test_admin_stats_report_percentiles_per_model_and_feature(client, db_session):
+    rows = [_row("sketch-feature", model="sketch-model", latency=float(ms)) for ms in range(100, 1100)]
+    rows += [_row("sketch-feature", model="sketch-model", latency=30000.0) for _ in range(20)]  # A slow tail
+    TokenLogWriter(session_factory=TestingSessionLocal).write(rows)
+
+    stats = client.get("/api/v1/admin/stats?percentile_days=1").json()["latency_percentiles"]
+    assert stats["window_days"] == 1
+    entry = next(e for e in stats["by_model_feature"] if e["model"] == "sketch-model")
+    assert entry["calls"] == 1020
+    assert abs(entry["latency_ms"]["p50"] - 600) < 600 * 0.03
+    assert entry["latency_ms"]["p99"] > 25000
+    assert abs(entry["tokens_per_call"]["p50"] - 15) < 1
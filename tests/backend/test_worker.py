@@ -0,0 +1,138 @@
+import copy
+from datetime import datetime, timedelta
+
+from app.services import JobService
+from app.models import Job, ParseWorker
+from app.schemas import JobCreate, JobStatus
+from app.jwt_utils import create_access_token
+from app.llm_adapter import LLMAdapter
+from app.worker import Worker, claim_next_job, requeue_stale_jobs, get_queue_stats
+from app import routes
+from conftest import TestingSessionLocal
+
+RESULT = {
+    "reasoning": "One task",
+    "tasks": [{"title": "Gym", "start_time": "2026-09-21T17:00:00Z", "end_time": "2026-09-21T18:00:00Z", "confidence": 0.9}],
+    "commands": [],
+    "ambiguities": []
+}
+
+
+def _queued_jobs(db_session, username, count=1):
+    # The test database is shared across tests; start from an empty queue
+    db_session.query(Job).filter(Job.status.in_([JobStatus.QUEUED, JobStatus.PARSING])).update(
+        {"status": JobStatus.CREATED}, synchronize_session=False
+    )
+    service = JobService(db_session)
+    user = service.create_user(username, "password")
+    jobs = []
+    for i in range(count):
+        job = service.create_job(JobCreate(raw_text=f"gym {i}"), user.id)
+        jobs.append(service.start_background_parse(job.id, user.id, queued=True))
+    return user, jobs
+
+
+def test_route_queues_job_for_database_backend(client, db_session, monkeypatch):
+    monkeypatch.setattr(routes.settings, "PARSE_QUEUE_BACKEND", "database")
+    service = JobService(db_session)
+    user = service.create_user("db_queue_route_user", "password")
+    job = service.create_job(JobCreate(raw_text="gym at 5"), user.id)
+    headers = {"Authorization": f"Bearer {create_access_token(data={'sub': str(user.id)})}"}
+
+    response = client.post(f"/api/v1/jobs/{job.id}/parse?async=true", headers=headers)
+    assert response.status_code == 202
+    assert response.json()["status"] == JobStatus.QUEUED.value
+
+    stats = client.get("/api/v1/queue-stats").json()
+    assert stats["depth"] >= 1
+    assert stats["in_process"]["pending"] == 0
+
+
+def test_claims_are_exclusive_and_in_queue_order(db_session):
+    _, jobs = _queued_jobs(db_session, "claim_user", count=2)
+
+    first = claim_next_job(db_session, "w1")
+    second = claim_next_job(db_session, "w2")
+    assert [first[0], second[0]] == [jobs[0].id, jobs[1].id]
+    assert claim_next_job(db_session, "w3") is None
+
+    db_session.expire_all()
+    claimed = db_session.get(Job, jobs[0].id)
+    assert claimed.status == JobStatus.PARSING
+    assert claimed.claimed_by == "w1"
+
+
+def test_worker_parses_queued_job_and_reports_throughput(db_session, monkeypatch):
+    monkeypatch.setattr(LLMAdapter, "parse_text", lambda self, **kwargs: copy.deepcopy(RESULT))
+    _, jobs = _queued_jobs(db_session, "worker_ok_user")
+    worker = Worker(session_factory=TestingSessionLocal, worker_id="test-worker-ok")
+    worker.register()
+
+    assert worker.run_once() is True
+    assert worker.run_once() is False
+
+    db_session.expire_all()
+    job = db_session.get(Job, jobs[0].id)
+    assert job.status == JobStatus.PARSED
+    assert len(job.candidates) == 1
+
+    stats = get_queue_stats(db_session)
+    entry = next(w for w in stats["workers"] if w["id"] == "test-worker-ok")
+    assert entry["alive"] is True
+    assert entry["jobs_parsed"] == 1
+    assert entry["jobs_per_minute"] > 0
+
+    worker.unregister()
+    assert db_session.get(ParseWorker, "test-worker-ok") is None
+
+
+def test_worker_marks_failed_parse(db_session, monkeypatch):
+    def parse_text(self, **kwargs):
+        raise RuntimeError("LLM unavailable")
+
+    monkeypatch.setattr(LLMAdapter, "parse_text", parse_text)
+    _, jobs = _queued_jobs(db_session, "worker_fail_user")
+    worker = Worker(session_factory=TestingSessionLocal, worker_id="test-worker-fail")
+    worker.register()
+
+    assert worker.run_once() is True
+    db_session.expire_all()
+    assert db_session.get(Job, jobs[0].id).status == JobStatus.FAILED
+    assert db_session.get(ParseWorker, "test-worker-fail").jobs_failed == 1
+    worker.unregister()
+
+
+def test_stale_claims_are_requeued(db_session):
+    _, jobs = _queued_jobs(db_session, "stale_user", count=2)
+    claim_next_job(db_session, "dead-worker")
+    claim_next_job(db_session, "live-worker")
+    db_session.query(Job).filter(Job.claimed_by == "dead-worker").update(
+        {"claimed_at": datetime.utcnow() - timedelta(minutes=10)}
+    )
+    db_session.commit()
+
+    assert requeue_stale_jobs(db_session, timeout_seconds=300) == 1
+    db_session.expire_all()
+    assert db_session.get(Job, jobs[0].id).status == JobStatus.QUEUED
+    assert db_session.get(Job, jobs[0].id).claimed_by is None
+    assert db_session.get(Job, jobs[1].id).status == JobStatus.PARSING
+
+
+def test_busy_worker_requeues_stale_claims(db_session, monkeypatch):
+    monkeypatch.setattr(LLMAdapter, "parse_text", lambda self, **kwargs: copy.deepcopy(RESULT))
+    _, jobs = _queued_jobs(db_session, "busy_requeue_user", count=2)
+    claim_next_job(db_session, "dead-worker")
+    db_session.query(Job).filter(Job.claimed_by == "dead-worker").update(
+        {"claimed_at": datetime.utcnow() - timedelta(minutes=10)}
+    )
+    db_session.commit()
+
+    # The queue never runs dry, yet the dead worker's job is picked up again
+    worker = Worker(session_factory=TestingSessionLocal, worker_id="test-worker-busy")
+    worker.register()
+    assert worker.run_once() is True
+    assert worker.run_once() is True
+    worker.unregister()
+
+    db_session.expire_all()
+    assert [db_session.get(Job, job.id).status for job in jobs] == [JobStatus.PARSED, JobStatus.PARSED]